@@ -10,24 +10,45 @@ PubMed2Zhihu - 命令行入口
     python run.py step <项目名> <步骤号>       # 执行指定步骤
     python run.py collect <项目名>            # 收集总结（Step 5）
     python run.py report <项目名>             # 生成HTML报告（Step 6）
+    python run.py --version                   # 显示版本号
+
+说明:
+    --version/-v 在 main() 开头直接处理：只读取 src/_version.py，不构建 argparse、
+    不导入 Config/Logger 等模块，供补全脚本等频繁探测时快速返回。
+    新增类似的"只读信息"选项时，也应放在 argparse 之前处理。
 """
 import sys
 import os
 import argparse
+import functools
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.utils.config import Config
-from src.utils.logger import Logger
-from src.utils.file_manager import FileManager
-from src.core.processor import PubMedProcessor
+# src.* 模块均在各命令函数内按需导入，--help/list/status 等命令无需加载步骤模块
+
+
+@functools.lru_cache(maxsize=1)
+def _config():
+    """获取配置（每个进程只解析一次 config.ini）"""
+    from src.utils.config import Config
+    return Config()
+
+
+@functools.lru_cache(maxsize=1)
+def _logger():
+    """获取命令行日志记录器（每个进程只创建一次）"""
+    from src.utils.logger import Logger
+    return Logger("run")
 
 
 def cmd_search(args):
     """执行PubMed搜索（Step 1-3）"""
+    from src.core.processor import PubMedProcessor
+    
+    processor = None
     try:
-        processor = PubMedProcessor()
+        processor = PubMedProcessor(config=_config())
         result = processor.execute_steps_1_to_3(args.query)
         
         if result['success']:
@@ -47,12 +68,17 @@ def cmd_search(args):
     except Exception as e:
         print(f"\n执行异常: {str(e)}")
         return 1
+    finally:
+        if processor:
+            processor.close()
 
 
 def cmd_status(args):
     """查看项目状态"""
-    config = Config()
-    logger = Logger("run")
+    from src.utils.file_manager import FileManager
+    
+    config = _config()
+    logger = _logger()
     file_manager = FileManager(config, logger)
     
     if args.project:
@@ -87,8 +113,10 @@ def cmd_status(args):
 
 def cmd_list(args):
     """列出所有项目"""
-    config = Config()
-    logger = Logger("run")
+    from src.utils.file_manager import FileManager
+    
+    config = _config()
+    logger = _logger()
     file_manager = FileManager(config, logger)
     
     projects = file_manager.list_projects()
@@ -112,9 +140,12 @@ def cmd_list(args):
 
 def cmd_step(args):
     """执行指定步骤"""
+    from src.core.processor import PubMedProcessor
+    
+    processor = None
     try:
-        config = Config()
-        logger = Logger("run")
+        config = _config()
+        logger = _logger()
         
         # 获取项目路径
         project_path = os.path.join(config.get('basic', 'output_dir'), args.project)
@@ -122,7 +153,7 @@ def cmd_step(args):
             logger.error(f"项目不存在: {args.project}")
             return 1
         
-        processor = PubMedProcessor()
+        processor = PubMedProcessor(config=config)
         result = processor.execute_step(project_path, args.step_num)
         
         if result['success']:
@@ -133,14 +164,17 @@ def cmd_step(args):
             return 1
             
     except Exception as e:
-        logger = Logger("run")
+        logger = _logger()
         logger.error(f"执行异常: {str(e)}")
         return 1
+    finally:
+        if processor:
+            processor.close()
 
 
 def cmd_collect(args):
     """收集总结"""
-    logger = Logger("run")
+    logger = _logger()
     logger.info(f"收集项目 {args.project} 的总结")
     logger.info("此功能将在Step 5实现后可用")
     # TODO: 实现总结收集
@@ -149,7 +183,7 @@ def cmd_collect(args):
 
 def cmd_report(args):
     """生成HTML报告"""
-    logger = Logger("run")
+    logger = _logger()
     logger.info(f"生成项目 {args.project} 的HTML报告")
     logger.info("此功能将在Step 6实现后可用")
     # TODO: 实现报告生成
@@ -158,7 +192,9 @@ def cmd_report(args):
 
 def cmd_test(args):
     """测试基础架构"""
-    logger = Logger("run")
+    from src.utils.file_manager import FileManager
+    
+    logger = _logger()
     
     logger.info("=" * 50)
     logger.info("PubMed2Zhihu 基础架构测试")
@@ -166,7 +202,7 @@ def cmd_test(args):
     
     # 测试配置加载
     try:
-        config = Config()
+        config = _config()
         logger.success("配置文件加载成功")
         logger.info(f"  输出目录: {config.get('basic', 'output_dir')}")
         logger.info(f"  最大结果数: {config.get_int('basic', 'max_results')}")
@@ -214,7 +250,50 @@ def cmd_test(args):
     return 0
 
 
+# 子命令定义：(名称, 帮助, [(参数名, add_argument参数), ...], 处理函数名)
+# 顺序即帮助信息中的显示顺序；处理函数按名称在构建时从 globals() 解析
+_SUBCOMMANDS = [
+    ('search', '执行PubMed搜索', [
+        ('query', {'type': str, 'help': '搜索关键词'}),
+    ], 'cmd_search'),
+    ('status', '查看项目状态', [
+        ('project', {'nargs': '?', 'type': str, 'help': '项目名称（可选）'}),
+    ], 'cmd_status'),
+    ('list', '列出所有项目', [], 'cmd_list'),
+    ('step', '执行指定步骤', [
+        ('project', {'type': str, 'help': '项目名称'}),
+        ('step_num', {'type': int, 'help': '步骤号 (1-6)'}),
+    ], 'cmd_step'),
+    ('collect', '收集总结', [
+        ('project', {'type': str, 'help': '项目名称'}),
+    ], 'cmd_collect'),
+    ('report', '生成HTML报告', [
+        ('project', {'type': str, 'help': '项目名称'}),
+    ], 'cmd_report'),
+    ('test', '测试基础架构', [], 'cmd_test'),
+]
+
+_SUBCOMMAND_NAMES = frozenset(spec[0] for spec in _SUBCOMMANDS)
+
+
+def _add_subparsers(subparsers, only=None):
+    """按 _SUBCOMMANDS 构建子解析器；only 非空时只构建该命令"""
+    for name, help_txt, args_spec, func_name in _SUBCOMMANDS:
+        if only and name != only:
+            continue
+        sp = subparsers.add_parser(name, help=help_txt)
+        for arg, kwargs in args_spec:
+            sp.add_argument(arg, **kwargs)
+        sp.set_defaults(func=globals()[func_name])
+
+
 def main():
+    # 快速路径：--version 不构建解析器、不导入配置与日志模块
+    if len(sys.argv) >= 2 and sys.argv[1] in ('-v', '--version'):
+        from src._version import __version__
+        print(f'pubmed2zhihu {__version__}')
+        return 0
+    
     parser = argparse.ArgumentParser(
         description='PubMed2Zhihu - PubMed论文检索与总结工具',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -229,39 +308,15 @@ def main():
     
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
-    # search 命令
-    search_parser = subparsers.add_parser('search', help='执行PubMed搜索')
-    search_parser.add_argument('query', type=str, help='搜索关键词')
-    search_parser.set_defaults(func=cmd_search)
-    
-    # status 命令
-    status_parser = subparsers.add_parser('status', help='查看项目状态')
-    status_parser.add_argument('project', nargs='?', type=str, help='项目名称（可选）')
-    status_parser.set_defaults(func=cmd_status)
+    # 先嗅探子命令，只构建被选中的子解析器；
+    # 无法识别时（帮助、未知命令）才构建全部，以便输出完整的命令列表
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    _add_subparsers(subparsers, command if command in _SUBCOMMAND_NAMES else None)
     
-    # list 命令
-    list_parser = subparsers.add_parser('list', help='列出所有项目')
-    list_parser.set_defaults(func=cmd_list)
-    
-    # step 命令
-    step_parser = subparsers.add_parser('step', help='执行指定步骤')
-    step_parser.add_argument('project', type=str, help='项目名称')
-    step_parser.add_argument('step_num', type=int, help='步骤号 (1-6)')
-    step_parser.set_defaults(func=cmd_step)
-    
-    # collect 命令
-    collect_parser = subparsers.add_parser('collect', help='收集总结')
-    collect_parser.add_argument('project', type=str, help='项目名称')
-    collect_parser.set_defaults(func=cmd_collect)
-    
-    # report 命令
-    report_parser = subparsers.add_parser('report', help='生成HTML报告')
-    report_parser.add_argument('project', type=str, help='项目名称')
-    report_parser.set_defaults(func=cmd_report)
-    
-    # test 命令
-    test_parser = subparsers.add_parser('test', help='测试基础架构')
-    test_parser.set_defaults(func=cmd_test)
+    # 无参数或仅请求帮助时直接输出帮助并返回，不进入子命令分发
+    if len(sys.argv) == 1 or sys.argv[1] in ('-h', '--help'):
+        parser.print_help()
+        return 0
     
     args = parser.parse_args()
     
@@ -2,7 +2,7 @@
 PubMed2Zhihu - PubMed论文检索与总结工具
 """
 
-__version__ = "1.0.0"
+from ._version import __version__
 __author__ = "PubMed2Zhihu"
 
 
@@ -0,0 +1,5 @@
+"""
+版本号（不导入任何模块，供 run.py --version 快速路径直接读取）
+"""
+
+__version__ = "1.0.0"
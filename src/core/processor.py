@@ -2,28 +2,78 @@
 主处理器 - 协调各个步骤的执行
 """
 import os
-import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+from ..utils.config import Config
+from ..utils.logger import Logger
+from ..utils.file_manager import FileManager
 
-from src.utils.config import Config
-from src.utils.logger import Logger
-from src.utils.file_manager import FileManager
-from src.core.steps.step1_search_pubmed import PubMedSearcher
-from src.core.steps.step2_fetch_details import PaperDetailsFetcher
-from src.core.steps.step3_fetch_figures import PMCFigureFetcher
-from src.core.steps.step4_generate_prompts import PromptGenerator
-from src.core.steps.step5_generate_overview import MergedPromptGenerator
-from src.core.steps.step6_generate_report import ReportGenerator
+# 各步骤模块依赖较重（Entrez、Playwright、PyMuPDF等），在对应的 _execute_stepN 中按需导入
 
 
 class PubMedProcessor:
-    def __init__(self, config_path: str = "config/config.ini"):
-        self.config = Config(config_path)
-        self.logger = Logger("processor")
+    __slots__ = (
+        'config', 'logger', 'file_manager',
+        '_summary_cache', '_summary_path', '_summary_dirty',
+        '_http', '_fetchers',
+    )
+    
+    # 步骤执行顺序：(步骤号, 处理方法名)
+    _STEP_SEQUENCE = (
+        (1, '_execute_step1'),
+        (2, '_execute_step2'),
+        (3, '_execute_step3'),
+        (4, '_execute_step4'),
+        (5, '_execute_step5'),
+        (6, '_execute_step6'),
+    )
+    
+    def __init__(self, config_path: str = "config/config.ini",
+                 config: Optional[Config] = None, logger: Optional[Logger] = None):
+        # 允许调用方传入已解析的配置/日志对象，避免重复解析 config.ini
+        self.config = config or Config(config_path)
+        self.logger = logger or Logger("processor")
         self.file_manager = FileManager(self.config, self.logger)
+        
+        # 项目状态缓存：同一项目只读取一次 project_summary.json，修改后统一写回
+        self._summary_cache: Optional[Dict] = None
+        self._summary_path: Optional[str] = None
+        self._summary_dirty = False
+        
+        # 步骤2/3共享的HTTP会话（连接池复用TCP/TLS连接），首次使用时创建
+        self._http = None
+        
+        # 步骤号 -> 步骤处理器实例，同一处理器多次执行步骤时复用（模板、配置只加载一次）
+        self._fetchers: Dict[int, object] = {}
+    
+    def close(self) -> None:
+        """释放共享的HTTP会话（缓存的步骤处理器持有该会话，一并丢弃）"""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        self._fetchers.clear()
+    
+    def _get_http_session(self):
+        """获取共享的 requests.Session（延迟导入requests）"""
+        if self._http is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._http = session
+        return self._http
+    
+    def _get_fetcher(self, step_num: int, factory: Callable[[], object]):
+        """获取步骤处理器实例，首次使用时通过 factory 创建"""
+        fetcher = self._fetchers.get(step_num)
+        if fetcher is None:
+            fetcher = self._fetchers[step_num] = factory()
+        return fetcher
     
     def create_project(self, query: str) -> str:
         """
@@ -48,6 +98,12 @@ class PubMedProcessor:
         }
         self.file_manager.update_project_summary(project_path, project_info)
         
+        # 直接用新建的项目信息作为缓存，无需再读回
+        self._flush_summary()
+        self._summary_cache = project_info
+        self._summary_path = project_path
+        self._summary_dirty = False
+        
         self.logger.info(f"项目创建成功: {project_path}")
         return project_path
     
@@ -62,29 +118,23 @@ class PubMedProcessor:
         Returns:
             Dict: 执行结果
         """
-        step_handlers = {
-            1: self._execute_step1,
-            2: self._execute_step2,
-            3: self._execute_step3,
-            4: self._execute_step4,
-            5: self._execute_step5,
-            6: self._execute_step6
-        }
-        
-        handler = step_handlers.get(step_num)
-        if not handler:
+        handler_name = dict(self._STEP_SEQUENCE).get(step_num)
+        if not handler_name:
             return {
                 'success': False,
                 'error': f'无效的步骤号: {step_num}'
             }
         
-        result = handler(project_path)
-        
-        # 执行成功后更新状态
-        if result.get('success'):
-            self._update_status(project_path, step_num, f'step{step_num}_completed')
-        
-        return result
+        try:
+            result = getattr(self, handler_name)(project_path)
+            
+            # 执行成功后更新状态
+            if result.get('success'):
+                self._update_status(project_path, step_num, f'step{step_num}_completed')
+            
+            return result
+        finally:
+            self._flush_summary()
     
     def execute_steps_1_to_4(self, query: str) -> Dict:
         """
@@ -104,38 +154,11 @@ class PubMedProcessor:
         project_path = self.create_project(query)
         
         try:
-            # 步骤1: 搜索
-            result = self._execute_step1(project_path, query)
+            # 步骤1-4: 搜索、获取详情、下载图片、生成Prompt（自动执行）
+            result = self._run_steps(project_path, self._STEP_SEQUENCE[:4], query)
             if not result['success']:
                 return result
             
-            # 更新状态
-            self._update_status(project_path, 1, 'step1_completed')
-            
-            # 步骤2: 获取详情
-            result = self._execute_step2(project_path)
-            if not result['success']:
-                return result
-            
-            # 更新状态
-            self._update_status(project_path, 2, 'step2_completed')
-            
-            # 步骤3: 下载图片
-            result = self._execute_step3(project_path)
-            if not result['success']:
-                return result
-            
-            # 更新状态
-            self._update_status(project_path, 3, 'step3_completed')
-            
-            # 步骤4: 生成Prompt（自动执行）
-            result = self._execute_step4(project_path)
-            if not result['success']:
-                return result
-            
-            # 更新状态
-            self._update_status(project_path, 4, 'step4_completed')
-            
             self.logger.success("步骤1-4全部完成!")
             self.logger.info(f"项目路径: {project_path}")
             self.logger.info("请查看Prompt并提交给LLM处理，完成后再执行步骤5-6")
@@ -154,6 +177,8 @@ class PubMedProcessor:
                 'error': str(e),
                 'project_path': project_path
             }
+        finally:
+            self._flush_summary()
     
     def execute_steps_5_to_6(self, project_path: str) -> Dict:
         """
@@ -170,20 +195,11 @@ class PubMedProcessor:
         self.logger.info("=" * 60)
         
         try:
-            # 步骤5: 生成综合总结Prompt
-            result = self._execute_step5(project_path)
+            # 步骤5-6: 生成综合总结Prompt、生成HTML报告
+            result = self._run_steps(project_path, self._STEP_SEQUENCE[4:])
             if not result['success']:
                 return result
             
-            self._update_status(project_path, 5, 'step5_completed')
-            
-            # 步骤6: 生成HTML报告
-            result = self._execute_step6(project_path)
-            if not result['success']:
-                return result
-            
-            self._update_status(project_path, 6, 'step6_completed')
-            
             self.logger.success("步骤5-6全部完成!")
             self.logger.info(f"HTML报告: {project_path}/FinalOutput/overview_report.html")
             
@@ -201,6 +217,8 @@ class PubMedProcessor:
                 'error': str(e),
                 'project_path': project_path
             }
+        finally:
+            self._flush_summary()
     
     def execute_steps_4_to_6(self, project_path: str) -> Dict:
         """
@@ -214,7 +232,7 @@ class PubMedProcessor:
             Dict: 执行结果
         """
         # 检查步骤4是否已完成
-        summary = self.file_manager.get_project_summary(project_path)
+        summary = self._get_summary(project_path)
         current_step = summary.get('current_step', 0)
         
         if current_step >= 4:
@@ -228,12 +246,10 @@ class PubMedProcessor:
         
         try:
             # 步骤4: 生成单篇论文Prompt
-            result = self._execute_step4(project_path)
+            result = self._run_steps(project_path, self._STEP_SEQUENCE[3:4])
             if not result['success']:
                 return result
             
-            self._update_status(project_path, 4, 'step4_completed')
-            
             # 继续执行步骤5-6
             return self.execute_steps_5_to_6(project_path)
             
@@ -245,6 +261,8 @@ class PubMedProcessor:
                 'error': str(e),
                 'project_path': project_path
             }
+        finally:
+            self._flush_summary()
     
     def execute_all_steps(self, query: str) -> Dict:
         """
@@ -266,18 +284,77 @@ class PubMedProcessor:
         # 继续执行步骤5-6
         return self.execute_steps_5_to_6(project_path)
     
+    def _run_steps(self, project_path: str, steps: tuple, query: str = None) -> Dict:
+        """
+        依次执行一组步骤，每步成功后更新状态，任一步失败即返回该步结果
+        
+        Args:
+            project_path: 项目路径
+            steps: (步骤号, 处理方法名) 序列
+            query: 搜索关键词（仅步骤1使用）
+            
+        Returns:
+            Dict: 最后一个步骤的执行结果
+        """
+        # 步骤2、3均为网络密集型，开启 parallel_fetch 时同时执行以重叠网络等待
+        step_nums = [step_num for step_num, _ in steps]
+        run_parallel = (self.config.get_boolean('basic', 'parallel_fetch', False)
+                        and 2 in step_nums and 3 in step_nums)
+        
+        result = {'success': True}
+        for step_num, handler_name in steps:
+            if run_parallel and step_num == 3:
+                continue  # 已与步骤2一起执行
+            
+            if run_parallel and step_num == 2:
+                result = self._execute_steps_2_and_3(project_path)
+                completed = (2, 3)
+            else:
+                handler = getattr(self, handler_name)
+                result = handler(project_path, query) if step_num == 1 else handler(project_path)
+                completed = (step_num,)
+            
+            if not result['success']:
+                return result
+            for num in completed:
+                self._update_status(project_path, num, f'step{num}_completed')
+        return result
+    
+    def _execute_steps_2_and_3(self, project_path: str) -> Dict:
+        """并行执行步骤2和步骤3（PMCID先一次批量获取，两个步骤共用，步骤3不依赖步骤2的输出）"""
+        # 先在主线程创建共享会话，避免两个线程各自创建
+        self._get_http_session()
+        
+        try:
+            pmcid_map = self._get_details_fetcher().fetch_pmcid_map(project_path)
+        except Exception as e:
+            self.logger.error(f"获取PMCID失败: {str(e)}")
+            return {'success': False, 'error': str(e) or '获取PMCID失败'}
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            future2 = executor.submit(self._execute_step2, project_path, pmcid_map)
+            future3 = executor.submit(self._execute_step3, project_path, pmcid_map)
+            result2 = future2.result()
+            result3 = future3.result()
+        
+        if not result2['success']:
+            return result2
+        return result3
+    
     def _execute_step1(self, project_path: str, query: str = None) -> Dict:
         """执行步骤1: PubMed搜索"""
         self.logger.step_start(1, "PubMed搜索")
         
         # 如果没有提供query，从项目信息读取
         if query is None:
-            project_info = self.file_manager.get_project_summary(project_path)
+            project_info = self._get_summary(project_path)
             query = project_info.get('search_query')
             if not query:
                 return {'success': False, 'error': '未找到搜索关键词'}
         
-        searcher = PubMedSearcher(self.config, self.logger)
+        from .steps.step1_search_pubmed import PubMedSearcher
+        
+        searcher = self._get_fetcher(1, lambda: PubMedSearcher(self.config, self.logger))
         result = searcher.search(query)
         
         if result['success']:
@@ -291,47 +368,69 @@ class PubMedProcessor:
         else:
             return {'success': False, 'error': result.get('error', '搜索失败')}
     
-    def _execute_step2(self, project_path: str) -> Dict:
-        """执行步骤2: 获取论文详情"""
+    def _get_details_fetcher(self):
+        """获取步骤2的论文详情获取器"""
+        from .steps.step2_fetch_details import PaperDetailsFetcher
+        
+        return self._get_fetcher(2, lambda: PaperDetailsFetcher(self.config, self.logger, session=self._get_http_session()))
+    
+    def _execute_step2(self, project_path: str, pmcid_map: Optional[Dict] = None) -> Dict:
+        """执行步骤2: 获取论文详情（pmcid_map 为已批量获取的PMCID，见 _execute_steps_2_and_3）"""
         self.logger.step_start(2, "获取论文详情")
         
-        fetcher = PaperDetailsFetcher(self.config, self.logger)
-        result = fetcher.fetch_details(project_path)
+        fetcher = self._get_details_fetcher()
+        step2_dir = self.file_manager.get_step_directory(project_path, 'step2_details')
+        output_file = os.path.join(step2_dir, 'papers_details.json')
         
-        if result['success']:
-            # 保存结果
-            step2_dir = self.file_manager.get_step_directory(project_path, 'step2_details')
-            output_file = os.path.join(step2_dir, 'papers_details.json')
-            self.file_manager.save_json(output_file, result)
-            
-            self.logger.step_complete(2, "获取论文详情")
-            return {'success': True, 'data': result}
-        else:
-            return {'success': False, 'error': result.get('error', '获取详情失败')}
+        # 逐篇流式写盘，不在内存中保留完整结果
+        try:
+            self.file_manager.save_json_stream(
+                output_file,
+                {'success': True, 'fetch_time': datetime.now().isoformat()},
+                'papers',
+                fetcher.iter_records(project_path, pmcid_map=pmcid_map),
+                trailer=fetcher.get_summary_fields
+            )
+        except Exception as e:
+            self.logger.error(f"获取论文详情失败: {str(e)}")
+            return {'success': False, 'error': str(e) or '获取详情失败'}
+        
+        self.logger.step_complete(2, "获取论文详情")
+        return {'success': True, 'data': fetcher.get_summary_fields()}
     
-    def _execute_step3(self, project_path: str) -> Dict:
-        """执行步骤3: 下载PMC图片"""
+    def _execute_step3(self, project_path: str, pmcid_map: Optional[Dict] = None) -> Dict:
+        """执行步骤3: 下载PMC图片（pmcid_map 同 _execute_step2）"""
         self.logger.step_start(3, "下载PMC图片")
         
-        fetcher = PMCFigureFetcher(self.config, self.logger)
-        result = fetcher.fetch_figures(project_path)
+        from .steps.step3_fetch_figures import PMCFigureFetcher
         
-        if result['success']:
-            # 保存结果
-            step3_dir = self.file_manager.get_step_directory(project_path, 'step3_figures')
-            output_file = os.path.join(step3_dir, 'figures_info.json')
-            self.file_manager.save_json(output_file, result)
-            
-            self.logger.step_complete(3, "下载PMC图片")
-            return {'success': True, 'data': result}
-        else:
-            return {'success': False, 'error': result.get('error', '下载图片失败')}
+        fetcher = self._get_fetcher(3, lambda: PMCFigureFetcher(self.config, self.logger, session=self._get_http_session()))
+        step3_dir = self.file_manager.get_step_directory(project_path, 'step3_figures')
+        output_file = os.path.join(step3_dir, 'figures_info.json')
+        
+        # 逐篇流式写盘，不在内存中保留完整结果
+        try:
+            self.file_manager.save_json_stream(
+                output_file,
+                {'success': True, 'fetch_time': datetime.now().isoformat()},
+                'papers',
+                fetcher.iter_records(project_path, pmcid_map=pmcid_map),
+                trailer=fetcher.get_summary_fields
+            )
+        except Exception as e:
+            self.logger.error(f"获取图片失败: {str(e)}")
+            return {'success': False, 'error': str(e) or '下载图片失败'}
+        
+        self.logger.step_complete(3, "下载PMC图片")
+        return {'success': True, 'data': fetcher.get_summary_fields()}
     
     def _execute_step4(self, project_path: str) -> Dict:
         """执行步骤4: 生成单篇论文Prompt"""
         self.logger.step_start(4, "生成单篇论文Prompt")
         
-        generator = PromptGenerator(self.config, self.logger)
+        from .steps.step4_generate_prompts import PromptGenerator
+        
+        generator = self._get_fetcher(4, lambda: PromptGenerator(self.config, self.logger))
         result = generator.generate_prompts(project_path)
         
         if result['success']:
@@ -349,7 +448,9 @@ class PubMedProcessor:
         """执行步骤5: 生成综合总结Prompt"""
         self.logger.step_start(5, "生成综合总结Prompt")
         
-        generator = MergedPromptGenerator(self.config, self.logger)
+        from .steps.step5_generate_overview import MergedPromptGenerator
+        
+        generator = self._get_fetcher(5, lambda: MergedPromptGenerator(self.config, self.logger))
         result = generator.generate_merged_prompt(project_path)
         
         if result['success']:
@@ -367,27 +468,45 @@ class PubMedProcessor:
         """执行步骤6: 生成HTML报告"""
         self.logger.step_start(6, "生成HTML报告")
         
-        generator = ReportGenerator(self.config, self.logger)
+        from .steps.step6_generate_report import ReportGenerator
+        
+        generator = self._get_fetcher(6, lambda: ReportGenerator(self.config, self.logger))
         result = generator.generate_report(project_path)
         
         if result['success']:
             # 保存结果
             step6_dir = self.file_manager.get_step_directory(project_path, 'step6_report')
             output_file = os.path.join(step6_dir, 'report_info.json')
-            self.file_manager.save_json(output_file, result)
+            # 与步骤6单独运行时一致，保存为缩进格式
+            self.file_manager.save_json(output_file, result, pretty=True)
             
             self.logger.step_complete(6, "生成HTML报告")
             return {'success': True, 'data': result}
         else:
             return {'success': False, 'error': result.get('error', '生成报告失败')}
     
+    def _get_summary(self, project_path: str) -> Dict:
+        """获取项目状态（同一项目仅从磁盘读取一次）"""
+        if self._summary_cache is None or project_path != self._summary_path:
+            self._flush_summary()
+            self._summary_cache = self.file_manager.get_project_summary(project_path)
+            self._summary_path = project_path
+            self._summary_dirty = False
+        return self._summary_cache
+    
+    def _flush_summary(self):
+        """将缓存的项目状态写回磁盘（仅在有修改时）"""
+        if self._summary_dirty and self._summary_path:
+            self.file_manager.update_project_summary(self._summary_path, self._summary_cache)
+            self._summary_dirty = False
+    
     def _update_status(self, project_path: str, step: int, status: str):
-        """更新项目状态"""
-        summary = self.file_manager.get_project_summary(project_path)
+        """更新项目状态（只修改缓存，由 _flush_summary 统一写回）"""
+        summary = self._get_summary(project_path)
         summary['current_step'] = step
         summary['status'] = status
         summary['last_updated'] = datetime.now().isoformat()
-        self.file_manager.update_project_summary(project_path, summary)
+        self._summary_dirty = True
     
     def get_project_status(self, project_path: str) -> Dict:
         """获取项目状态"""
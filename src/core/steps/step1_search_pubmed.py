@@ -15,11 +15,30 @@ ssl._create_default_https_context = ssl._create_unverified_context
 # Biopython Entrez模块
 from Bio import Entrez
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+# 项目根目录（直接运行本文件时加入 sys.path，已存在时不重复添加）
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.utils.config import Config
 from src.utils.logger import Logger
 from src.utils.file_manager import FileManager
+from src.utils.entrez_cache import EntrezCache, is_permanent_error
+from src.utils.xml_utils import iter_elements, element_text, compile_path, first_text
+
+# 每篇论文保留的作者姓名数量（后续步骤最多展示前5位，其余只需计数）
+MAX_AUTHORS = 5
+
+# PubmedArticle 中各字段的路径（预编译一次，每篇论文直接调用）
+_PMID_PATH = compile_path('MedlineCitation/PMID')
+_TITLE_PATH = compile_path('MedlineCitation/Article/ArticleTitle')
+_ABSTRACT_PATH = compile_path('MedlineCitation/Article/Abstract/AbstractText')
+_AUTHORS_PATH = compile_path('MedlineCitation/Article/AuthorList/Author')
+_JOURNAL_TITLE_PATH = compile_path('MedlineCitation/Article/Journal/Title')
+_JOURNAL_ISO_PATH = compile_path('MedlineCitation/Article/Journal/ISOAbbreviation')
+_ARTICLE_DATE_PATH = compile_path('MedlineCitation/Article/ArticleDate')
+_PUB_DATE_PATH = compile_path('MedlineCitation/Article/Journal/JournalIssue/PubDate')
+_DOI_PATH = compile_path("PubmedData/ArticleIdList/ArticleId[@IdType='doi']")
 
 
 class PubMedSearcher:
@@ -33,6 +52,7 @@ class PubMedSearcher:
         if api_key:
             Entrez.api_key = api_key
         Entrez.tool = config.get('pubmed', 'tool_name', 'pubmed2zhihu')
+        self.entrez = EntrezCache(config)
         
         self.retry_attempts = config.get_int('pubmed', 'retry_attempts', 3)
         self.retry_delay = config.get_int('pubmed', 'retry_delay', 2)
@@ -127,7 +147,7 @@ class PubMedSearcher:
                 
             except Exception as e:
                 self.logger.warning(f"搜索尝试 {attempt + 1}/{self.retry_attempts} 失败: {str(e)}")
-                if attempt < self.retry_attempts - 1:
+                if attempt < self.retry_attempts - 1 and not is_permanent_error(e):
                     time.sleep(self.retry_delay)
                 else:
                     raise
@@ -149,111 +169,108 @@ class PubMedSearcher:
         for attempt in range(self.retry_attempts):
             try:
                 # 使用efetch获取详细信息
-                handle = Entrez.efetch(
+                handle = self.entrez.efetch(
                     db="pubmed",
                     id=pmids,
                     rettype="xml",
                     retmode="xml"
                 )
-                records = Entrez.read(handle)
-                handle.close()
                 
-                # 解析每篇论文
-                for i, article in enumerate(records.get('PubmedArticle', [])):
-                    try:
-                        paper = self._parse_article(article)
-                        papers.append(paper)
-                        self.logger.progress(i + 1, len(pmids), f"解析论文: {paper['pmid']}")
-                    except Exception as e:
-                        self.logger.warning(f"解析论文失败: {str(e)}")
-                        continue
+                # 流式解析每篇论文（重试时从头开始）
+                papers = []
+                try:
+                    for i, article in enumerate(iter_elements(handle, 'PubmedArticle')):
+                        try:
+                            paper = self._parse_article(article)
+                            papers.append(paper)
+                            self.logger.progress(i + 1, len(pmids), f"解析论文: {paper['pmid']}")
+                        except Exception as e:
+                            self.logger.warning(f"解析论文失败: {str(e)}")
+                            continue
+                finally:
+                    handle.close()
                 
                 print()  # 换行
                 return papers
                 
             except Exception as e:
                 self.logger.warning(f"获取信息尝试 {attempt + 1}/{self.retry_attempts} 失败: {str(e)}")
-                if attempt < self.retry_attempts - 1:
+                if attempt < self.retry_attempts - 1 and not is_permanent_error(e):
                     time.sleep(self.retry_delay)
                 else:
                     raise
         
         return papers
     
-    def _parse_article(self, article: Dict) -> Dict:
+    def _parse_article(self, article) -> Dict:
         """
         解析单篇论文信息
         
         Args:
-            article: PubMed文章数据
+            article: PubmedArticle XML元素
             
         Returns:
             Dict: 解析后的论文信息
         """
-        medline = article.get('MedlineCitation', {})
-        article_data = medline.get('Article', {})
-        
         # PMID
-        pmid = str(medline.get('PMID', ''))
+        pmid = first_text(_PMID_PATH(article))
         
         # 标题
-        title = article_data.get('ArticleTitle', '')
-        if isinstance(title, list):
-            title = ' '.join(str(t) for t in title)
+        title_nodes = _TITLE_PATH(article)
+        title = element_text(title_nodes[0]) if title_nodes else ''
         
         # 摘要
-        abstract_data = article_data.get('Abstract', {})
-        abstract_texts = abstract_data.get('AbstractText', [])
-        if isinstance(abstract_texts, list):
-            abstract_parts = []
-            for text in abstract_texts:
-                if hasattr(text, 'attributes') and 'Label' in text.attributes:
-                    label = text.attributes['Label']
-                    abstract_parts.append(f"{label}: {str(text)}")
-                else:
-                    abstract_parts.append(str(text))
-            abstract = ' '.join(abstract_parts)
-        else:
-            abstract = str(abstract_texts) if abstract_texts else ''
+        abstract_parts = []
+        for text in _ABSTRACT_PATH(article):
+            label = text.get('Label')
+            if label:
+                abstract_parts.append(f"{label}: {element_text(text)}")
+            else:
+                abstract_parts.append(element_text(text))
+        abstract = ' '.join(abstract_parts)
         
         # 作者
-        author_list = article_data.get('AuthorList', [])
         authors = []
-        for author in author_list:
-            if isinstance(author, dict):
-                last_name = author.get('LastName', '')
-                fore_name = author.get('ForeName', '')
-                if last_name:
-                    authors.append(f"{last_name} {fore_name}".strip())
+        author_count = 0
+        for author in _AUTHORS_PATH(article):
+            last_name = author.findtext('LastName', '')
+            if not last_name:
+                continue
+            author_count += 1
+            if author_count <= MAX_AUTHORS:
+                fore_name = author.findtext('ForeName', '')
+                authors.append(f"{last_name} {fore_name}".strip())
         
         # 期刊
-        journal_info = article_data.get('Journal', {})
-        journal = journal_info.get('Title', '')
+        journal = first_text(_JOURNAL_TITLE_PATH(article))
         if not journal:
-            journal = journal_info.get('ISOAbbreviation', '')
+            journal = first_text(_JOURNAL_ISO_PATH(article))
         
         # 发表日期
-        pub_date_data = article_data.get('ArticleDate', [])
-        if pub_date_data:
-            date_info = pub_date_data[0] if isinstance(pub_date_data, list) else pub_date_data
-            year = date_info.get('Year', '')
-            month = date_info.get('Month', '')
-            pub_date = f"{year}-{month}" if month else year
-        else:
+        date_nodes = _ARTICLE_DATE_PATH(article)
+        if not date_nodes:
             # 尝试从Journal获取日期
-            journal_issue = journal_info.get('JournalIssue', {})
-            pub_date_info = journal_issue.get('PubDate', {})
-            year = pub_date_info.get('Year', '')
-            month = pub_date_info.get('Month', '')
+            date_nodes = _PUB_DATE_PATH(article)
+        if date_nodes:
+            date_info = date_nodes[0]
+            year = date_info.findtext('Year', '')
+            month = date_info.findtext('Month', '')
             pub_date = f"{year}-{month}" if month else year
+        else:
+            pub_date = ''
+        
+        # DOI（同一份efetch结果中已包含，无需在步骤2逐篇再请求）
+        doi = first_text(_DOI_PATH(article), None)
         
         return {
             'pmid': pmid,
             'title': title,
             'abstract': abstract,
             'authors': authors,
+            'author_count': author_count,
             'journal': journal,
-            'pub_date': pub_date
+            'pub_date': pub_date,
+            'doi': doi
         }
 
 
@@ -9,10 +9,13 @@ import ssl
 import time
 import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
 # 处理SSL证书验证问题
 ssl._create_default_https_context = ssl._create_unverified_context
@@ -30,15 +33,167 @@ try:
 except ImportError:
     PYMUPDF_AVAILABLE = False
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+# 项目根目录（直接运行本文件时加入 sys.path，已存在时不重复添加）
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.utils.config import Config
 from src.utils.logger import Logger
 from src.utils.file_manager import FileManager
+from src.utils.entrez_cache import EntrezCache, get_ncbi_throttle, is_permanent_error
+from src.utils.xml_utils import iter_elements
+
+# 全文清理用正则（模块加载时编译一次）
+_WS_RE = re.compile(r'\s+')
+_CTRL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+_HYPHEN_RE = re.compile(r'(\w)-\s+(\w)')
+
+# 关键章节标题：合并为一个正则，一次扫描即可得到所有章节标题的位置（分组名即章节名）
+_SECTION_RE = re.compile(
+    r'\b(?P<Abstract>abstract)\b'
+    r'|\b(?P<Introduction>introduction)\b'
+    r'|\b(?P<Methods>methods?|materials?\s+and\s+methods?)\b'
+    r'|\b(?P<Results>results?)\b'
+    r'|\b(?P<Discussion>discussion)\b'
+    r'|\b(?P<Conclusion>conclusion|conclusions)\b',
+    re.I
+)
+_SECTION_NAMES = ('Abstract', 'Introduction', 'Methods', 'Results', 'Discussion', 'Conclusion')
+
+# PDF文本提取进程的启动方式：支持时使用 forkserver，不在已有下载线程（并行执行时还有步骤3的线程和事件循环）的进程中直接 fork
+_EXTRACT_MP_CONTEXT = (multiprocessing.get_context('forkserver')
+                       if 'forkserver' in multiprocessing.get_all_start_methods() else None)
+
+# PDF/全文文本写盘缓冲区大小（1MB，减少写系统调用次数）
+_WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _clean_text(text: str) -> str:
+    """
+    清理提取的文本
+    
+    Args:
+        text: 原始文本
+        
+    Returns:
+        str: 清理后的文本
+    """
+    # 移除多余空白
+    text = _WS_RE.sub(' ', text)
+    # 移除特殊字符
+    text = _CTRL_RE.sub('', text)
+    # 修复常见的PDF提取问题
+    text = _HYPHEN_RE.sub(r'\1\2', text)  # 修复断字
+    return text.strip()
+
+
+def _extract_key_sections(text: str, max_words: int) -> str:
+    """
+    从全文中提取关键章节
+    
+    Args:
+        text: 全文文本
+        max_words: 最大词数
+        
+    Returns:
+        str: 提取的关键章节
+    """
+    # 一次扫描：每个章节取其标题首次出现的位置，到下一个任意章节标题出现处为止
+    starts = {}
+    ends = {}
+    pending = None
+    for match in _SECTION_RE.finditer(text):
+        if pending:
+            ends[pending] = match.start()
+            pending = None
+            if len(ends) == len(_SECTION_NAMES):
+                break
+        section_name = match.lastgroup
+        if section_name not in starts:
+            starts[section_name] = match.start()
+            pending = section_name
+    if pending:
+        ends[pending] = len(text)
+    
+    extracted_sections = []
+    
+    for section_name in _SECTION_NAMES:
+        if section_name in starts:
+            section_text = text[starts[section_name]:ends[section_name]].strip()
+            # 限制每个章节的长度
+            words = section_text.split()
+            if len(words) > 2000:
+                section_text = ' '.join(words[:2000]) + '...'
+            
+            extracted_sections.append(f"## {section_name}\n{section_text}")
+    
+    if extracted_sections:
+        result = '\n\n'.join(extracted_sections)
+        # 确保不超过最大词数
+        words = result.split()
+        if len(words) > max_words:
+            result = ' '.join(words[:max_words]) + '...'
+        return result
+    
+    # 如果无法识别章节，返回前max_words个词
+    words = text.split()
+    return ' '.join(words[:max_words]) + ('...' if len(words) > max_words else '')
+
+
+def _extract_pdf_text(pdf_path: str, output_path: str, max_words: int) -> Dict:
+    """
+    从PDF提取并清理全文，写入文本文件（模块级函数，可在进程池中执行）
+    
+    Args:
+        pdf_path: PDF文件路径
+        output_path: 文本输出路径
+        max_words: 最大词数
+        
+    Returns:
+        Dict: {'word_count': int}
+    """
+    # 逐页收集后一次性拼接，避免字符串反复累加复制；
+    # 已提取的词数足够后续截取（约3倍上限）时不再解析剩余页面
+    parts = []
+    running_words = 0
+    target_words = max_words * 3
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            page_text = page.get_text()
+            parts.append(page_text)
+            # 按空格和换行数粗略估计词数
+            running_words += page_text.count(' ') + page_text.count('\n')
+            if running_words >= target_words:
+                break
+    full_text = "".join(parts)
+    
+    # 清理文本
+    full_text = _clean_text(full_text)
+    word_count = len(full_text.split())
+    
+    # 如果超过最大词数，提取关键章节
+    if word_count > max_words:
+        full_text = _extract_key_sections(full_text, max_words)
+        word_count = len(full_text.split())
+    
+    # 保存文本文件：先写临时文件再改名，中断时不会留下被当作缓存命中的不完整文本
+    tmp_path = output_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+            f.write(full_text)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    return {'word_count': word_count}
 
 
 class PaperDetailsFetcher:
-    def __init__(self, config: Config, logger: Logger):
+    def __init__(self, config: Config, logger: Logger,
+                 session: Optional[requests.Session] = None):
         self.config = config
         self.logger = logger
         
@@ -48,6 +203,7 @@ class PaperDetailsFetcher:
         if api_key:
             Entrez.api_key = api_key
         Entrez.tool = config.get('pubmed', 'tool_name', 'pubmed2zhihu')
+        self.entrez = EntrezCache(config)
         
         self.retry_attempts = config.get_int('pubmed', 'retry_attempts', 3)
         self.retry_delay = config.get_int('pubmed', 'retry_delay', 2)
@@ -55,15 +211,58 @@ class PaperDetailsFetcher:
         # PDF下载配置
         self.pdf_enabled = config.get_boolean('pmc', 'pdf_download_enabled', True)
         self.pdf_timeout = config.get_int('pmc', 'pdf_download_timeout', 60)
+        # 返回404的PDF来源在有效期内不再尝试（天），0 表示不记录
+        self.pdf_failed_ttl = config.get_float('pmc', 'pdf_failed_cache_days', 7) * 86400
         self.fulltext_max_words = config.get_int('pmc', 'fulltext_max_words', 8000)
         self.max_workers = config.get_int('pmc', 'pdf_download_workers', 4)
+        # PDF文本提取进程数（文本清理是纯Python的CPU计算，放到子进程与下载并行），0 表示在下载线程中提取；
+        # 进程数不超过下载线程数
+        extract_workers = config.get_int('pmc', 'pdf_extract_workers', os.cpu_count() or 1)
+        self.extract_workers = min(extract_workers, self.max_workers)
+        self._extract_pool: Optional[ProcessPoolExecutor] = None
+        
+        # 多线程下载时把访问NCBI的请求限制在每秒请求数以内（与步骤3共用），避免超出速率限制被拒后进入重试等待
+        self._ncbi_throttle = get_ncbi_throttle(config)
         
         # HTTP请求头
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'application/pdf,*/*',
             'Accept-Language': 'en-US,en;q=0.9',
+            # 声明可解压的压缩格式（gzip/deflate，安装了brotli/zstandard时也包括br/zstd），由requests自动解压
+            'Accept-Encoding': ACCEPT_ENCODING,
         }
+        
+        # HTTP会话：优先使用调用方传入的共享 Session，否则自建带连接池的 Session，
+        # 同一主机的多次PDF请求复用TCP/TLS连接
+        self._owns_session = session is None
+        self.http = session if session is not None else self._create_session()
+        
+        # 最近一次 iter_records 的查询词与统计信息；搜索结果中没有论文时只有说明 message
+        self.query = ''
+        self.stats: Dict = {}
+        self.message: Optional[str] = None
+        
+        # PDF下载缓存（pdfs/pmcid_cache.json）：
+        # {pmcid: {'working_url': 可用来源序号, 'failed_urls': {404来源序号: 记录时间戳}, 'word_count': 全文词数}}
+        self._pmcid_cache: Dict[str, Dict] = {}
+        self._pmcid_cache_lock = threading.Lock()
+        self._pmcid_cache_dirty = False
+    
+    def _create_session(self) -> requests.Session:
+        """创建带连接池的 requests.Session（重试由 _download_pdf 自行控制）"""
+        session = requests.Session()
+        session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(10, self.max_workers))
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def close(self) -> None:
+        """关闭自建的HTTP会话（调用方传入的共享会话由调用方负责关闭）"""
+        if self._owns_session:
+            self.http.close()
+            self._owns_session = False
     
     def fetch_details(self, project_path: str) -> Dict:
         """
@@ -75,114 +274,15 @@ class PaperDetailsFetcher:
         Returns:
             Dict: 详情获取结果
         """
-        self.logger.info("开始获取论文详细信息")
-        
         try:
-            # 加载Step 1的搜索结果
-            file_manager = FileManager(self.config, self.logger)
-            step1_dir = file_manager.get_step_directory(project_path, 'step1_search')
-            search_results_file = os.path.join(step1_dir, 'search_results.json')
-            
-            if not os.path.exists(search_results_file):
-                raise FileNotFoundError(f"未找到搜索结果文件: {search_results_file}")
-            
-            search_results = file_manager.load_json(search_results_file)
-            papers = search_results.get('papers', [])
-            
-            if not papers:
-                self.logger.warning("搜索结果中没有论文")
-                return {
-                    'success': True,
-                    'fetch_time': datetime.now().isoformat(),
-                    'papers': [],
-                    'message': '没有论文需要获取详情'
-                }
-            
-            self.logger.info(f"需要获取 {len(papers)} 篇论文的详细信息")
-            
-            # PDF输出目录
-            pdfs_dir = os.path.join(project_path, 'step2_details', 'pdfs')
-            os.makedirs(pdfs_dir, exist_ok=True)
-            
-            # 获取每篇论文的详细信息
-            detailed_papers = []
-            pmids = [p['pmid'] for p in papers]
-            
-            # 批量获取链接信息（包含PMCID）
-            link_info = self._fetch_pmc_links(pmids)
-            
-            # 多线程并行处理
-            self.logger.info(f"使用 {self.max_workers} 个线程并行下载")
-            
-            # 线程安全的进度计数器和统计变量
-            progress_lock = threading.Lock()
-            progress_counter = [0]  # 使用列表以便在闭包中修改
-            papers_with_fulltext = [0]
-            papers_pdf_failed = [0]
-            
-            # 创建 pmid 到原始索引的映射，用于保持结果顺序
-            pmid_to_index = {paper['pmid']: i for i, paper in enumerate(papers)}
-            results_dict = {}
-            
-            def process_paper_wrapper(paper):
-                """线程任务包装器"""
-                pmid = paper['pmid']
-                try:
-                    result = self._download_single_paper(paper, link_info, pdfs_dir)
-                    
-                    # 更新统计
-                    with progress_lock:
-                        if result.get('fulltext_status') == 'success':
-                            papers_with_fulltext[0] += 1
-                        elif result.get('fulltext_status') in ['download_failed', 'extract_failed']:
-                            papers_pdf_failed[0] += 1
-                        
-                        progress_counter[0] += 1
-                        self.logger.progress(progress_counter[0], len(papers), f"完成: {pmid}")
-                    
-                    return pmid, result
-                except Exception as e:
-                    self.logger.error(f"处理论文 {pmid} 时出错: {str(e)}")
-                    with progress_lock:
-                        progress_counter[0] += 1
-                        self.logger.progress(progress_counter[0], len(papers), f"失败: {pmid}")
-                    return pmid, paper.copy()
-            
-            # 使用线程池并行处理
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                futures = {executor.submit(process_paper_wrapper, paper): paper for paper in papers}
-                
-                for future in as_completed(futures):
-                    pmid, result = future.result()
-                    results_dict[pmid] = result
-            
-            # 按原始顺序组装结果
-            detailed_papers = [results_dict[paper['pmid']] for paper in papers]
-            
-            print()  # 换行
-            
-            # 统计
-            papers_with_pmc = sum(1 for p in detailed_papers if p.get('pmcid'))
+            detailed_papers = list(self.iter_records(project_path))
             
             result = {
                 'success': True,
                 'fetch_time': datetime.now().isoformat(),
-                'query': search_results.get('query', ''),
                 'papers': detailed_papers,
-                'stats': {
-                    'total_papers': len(detailed_papers),
-                    'papers_with_pmc': papers_with_pmc,
-                    'papers_without_pmc': len(detailed_papers) - papers_with_pmc,
-                    'papers_with_fulltext': papers_with_fulltext[0],
-                    'papers_pdf_failed': papers_pdf_failed[0]
-                }
             }
-            
-            self.logger.success(f"详情获取完成: {len(detailed_papers)} 篇论文")
-            self.logger.info(f"有PMC全文: {papers_with_pmc} 篇, 无PMC全文: {len(detailed_papers) - papers_with_pmc} 篇")
-            if self.pdf_enabled:
-                self.logger.info(f"PDF全文提取成功: {papers_with_fulltext[0]} 篇, 失败: {papers_pdf_failed[0]} 篇")
-            
+            result.update(self.get_summary_fields())
             return result
             
         except Exception as e:
@@ -193,89 +293,237 @@ class PaperDetailsFetcher:
                 'fetch_time': datetime.now().isoformat()
             }
     
-    def _fetch_pmc_links(self, pmids: List[str]) -> Dict[str, Dict]:
+    def get_summary_fields(self) -> Dict:
+        """
+        返回最近一次 iter_records 迭代结束后的查询词与统计信息
+        
+        没有论文时只返回说明 message（与旧版 fetch_details 的空结果字段一致）
+        """
+        if self.message:
+            return {'message': self.message}
+        return {
+            'query': self.query,
+            'stats': self.stats
+        }
+    
+    def fetch_pmcid_map(self, project_path: str) -> Dict[str, Optional[str]]:
         """
-        批量获取PMCID信息
+        读取Step 1的搜索结果，一次elink请求批量获取所有论文的PMCID
+        
+        与步骤3并行执行时由调用方先获取一次，再分别传给两个步骤的 iter_records
         
         Args:
-            pmids: PMID列表
+            project_path: 项目路径
             
         Returns:
-            Dict: {pmid: {'pmcid': 'PMCxxxxxxx'}}
+            Dict: {pmid: 'PMCxxxxxxx' 或 None}
         """
-        link_info = {}
+        file_manager = FileManager(self.config, self.logger)
+        pmids = [p['pmid'] for p in self._load_search_results(file_manager, project_path).get('papers', [])]
+        return self.entrez.fetch_pmcids(pmids, self.logger) if pmids else {}
+    
+    def _load_search_results(self, file_manager: FileManager, project_path: str) -> Dict:
+        """加载Step 1的搜索结果"""
+        step1_dir = file_manager.get_step_directory(project_path, 'step1_search')
+        search_results_file = os.path.join(step1_dir, 'search_results.json')
         
-        for attempt in range(self.retry_attempts):
+        if not os.path.exists(search_results_file):
+            raise FileNotFoundError(f"未找到搜索结果文件: {search_results_file}")
+        
+        return file_manager.load_json(search_results_file)
+    
+    def iter_records(self, project_path: str,
+                     pmcid_map: Optional[Dict[str, Optional[str]]] = None) -> Iterator[Dict]:
+        """
+        逐篇产出论文详情（按搜索结果原顺序），供流式写盘使用
+        
+        迭代结束后 self.query / self.stats 为本次结果的查询词与统计信息
+        
+        Args:
+            project_path: 项目路径
+            pmcid_map: 已获取的 {pmid: PMCID}（见 fetch_pmcid_map），为None时自行批量获取
+            
+        Yields:
+            Dict: 单篇论文详情
+        """
+        self.logger.info("开始获取论文详细信息")
+        
+        # 加载Step 1的搜索结果
+        file_manager = FileManager(self.config, self.logger)
+        search_results = self._load_search_results(file_manager, project_path)
+        papers = search_results.get('papers', [])
+        self.query = search_results.get('query', '')
+        self.message = None
+        self.stats = {
+            'total_papers': 0,
+            'papers_with_pmc': 0,
+            'papers_without_pmc': 0,
+            'papers_with_fulltext': 0,
+            'papers_pdf_failed': 0
+        }
+        
+        if not papers:
+            self.logger.warning("搜索结果中没有论文")
+            self.message = '没有论文需要获取详情'
+            return
+        
+        self.logger.info(f"需要获取 {len(papers)} 篇论文的详细信息")
+        
+        # PDF输出目录
+        pdfs_dir = os.path.join(project_path, 'step2_details', 'pdfs')
+        os.makedirs(pdfs_dir, exist_ok=True)
+        
+        # 加载PDF下载缓存
+        pmcid_cache_file = os.path.join(pdfs_dir, 'pmcid_cache.json')
+        self._pmcid_cache = {}
+        self._pmcid_cache_dirty = False
+        if os.path.exists(pmcid_cache_file):
             try:
-                # 使用elink获取PMC链接
-                handle = Entrez.elink(
-                    dbfrom="pubmed",
-                    db="pmc",
-                    id=pmids,
-                    linkname="pubmed_pmc"
-                )
-                records = Entrez.read(handle)
-                handle.close()
+                self._pmcid_cache = file_manager.load_json(pmcid_cache_file)
+            except Exception as e:
+                self.logger.warning(f"PDF缓存读取失败，将重新下载: {str(e)}")
+        
+        pmids = [p['pmid'] for p in papers]
+        
+        # 批量获取链接信息（包含PMCID）
+        if pmcid_map is None:
+            pmcid_map = self.entrez.fetch_pmcids(pmids, self.logger)
+        link_info = {pmid: {'pmcid': pmcid} for pmid, pmcid in pmcid_map.items()}
+        
+        # 旧版本搜索结果不含DOI时，一次批量请求补全
+        missing_doi = [p['pmid'] for p in papers if 'doi' not in p]
+        if missing_doi:
+            for pmid, doi in self._fetch_dois_batch(missing_doi).items():
+                link_info.setdefault(pmid, {})['doi'] = doi
+        
+        # 多线程并行处理
+        self.logger.info(f"使用 {self.max_workers} 个线程并行下载")
+        
+        # 线程安全的进度计数器和统计变量
+        progress_lock = threading.Lock()
+        progress_counter = [0]  # 使用列表以便在闭包中修改
+        papers_with_fulltext = [0]
+        papers_pdf_failed = [0]
+        
+        def process_paper_wrapper(paper):
+            """线程任务包装器"""
+            pmid = paper['pmid']
+            try:
+                result, extract_future = self._download_single_paper(paper, link_info, pdfs_dir)
                 
-                # 解析链接结果
-                for record in records:
-                    pmid = record.get('IdList', [''])[0]
-                    linksets = record.get('LinkSetDb', [])
+                # 更新统计（文本提取仍在进行的论文在产出时统计）
+                with progress_lock:
+                    if result.get('fulltext_status') == 'success':
+                        papers_with_fulltext[0] += 1
+                    elif result.get('fulltext_status') in ['download_failed', 'extract_failed']:
+                        papers_pdf_failed[0] += 1
                     
-                    pmcid = None
-                    for linkset in linksets:
-                        if linkset.get('LinkName') == 'pubmed_pmc':
-                            links = linkset.get('Link', [])
-                            if links:
-                                pmc_id = links[0].get('Id', '')
-                                pmcid = f"PMC{pmc_id}" if pmc_id else None
-                                break
-                    
-                    link_info[pmid] = {'pmcid': pmcid}
-                
-                return link_info
+                    progress_counter[0] += 1
+                    self.logger.progress(progress_counter[0], len(papers), f"完成: {pmid}", task='step2')
                 
+                return result, extract_future
             except Exception as e:
-                self.logger.warning(f"获取PMC链接尝试 {attempt + 1}/{self.retry_attempts} 失败: {str(e)}")
-                if attempt < self.retry_attempts - 1:
-                    time.sleep(self.retry_delay)
-                else:
-                    # 失败时返回空信息
-                    return {pmid: {'pmcid': None} for pmid in pmids}
+                self.logger.error(f"处理论文 {pmid} 时出错: {str(e)}")
+                with progress_lock:
+                    progress_counter[0] += 1
+                    self.logger.progress(progress_counter[0], len(papers), f"失败: {pmid}", task='step2')
+                return paper, None
+        
+        # 下载线程完成下载后把文本提取提交给进程池，不等待结果即处理下一篇论文的网络请求；
+        # 提取结果在按顺序产出该论文时再取回
+        if self.pdf_enabled and PYMUPDF_AVAILABLE and self.extract_workers > 0:
+            self._extract_pool = ProcessPoolExecutor(max_workers=self.extract_workers, mp_context=_EXTRACT_MP_CONTEXT)
+        
+        # 使用线程池并行处理；乱序完成的结果暂存，按原始顺序尽早产出并释放
+        total_papers = 0
+        papers_with_pmc = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(process_paper_wrapper, paper) for paper in papers]
+                
+                pending = {}
+                next_index = 0
+                index_of = {future: i for i, future in enumerate(futures)}
+                for future in as_completed(futures):
+                    pending[index_of[future]] = future.result()
+                    while next_index in pending:
+                        record, extract_future = pending.pop(next_index)
+                        next_index += 1
+                        if extract_future is not None:
+                            self._collect_extract_result(record, extract_future)
+                            with progress_lock:
+                                if record['fulltext_status'] == 'success':
+                                    papers_with_fulltext[0] += 1
+                                else:
+                                    papers_pdf_failed[0] += 1
+                        total_papers += 1
+                        if record.get('pmcid'):
+                            papers_with_pmc += 1
+                        yield record
+        finally:
+            if self._extract_pool is not None:
+                self._extract_pool.shutdown(cancel_futures=True)
+                self._extract_pool = None
+            # 中途出错也保留已获得的缓存信息
+            if self._pmcid_cache_dirty:
+                file_manager.save_json(pmcid_cache_file, self._pmcid_cache, atomic=True)
+                self._pmcid_cache_dirty = False
+        
+        print()  # 换行
+        
+        # 统计
+        self.stats = {
+            'total_papers': total_papers,
+            'papers_with_pmc': papers_with_pmc,
+            'papers_without_pmc': total_papers - papers_with_pmc,
+            'papers_with_fulltext': papers_with_fulltext[0],
+            'papers_pdf_failed': papers_pdf_failed[0]
+        }
         
-        return link_info
+        self.logger.success(f"详情获取完成: {total_papers} 篇论文")
+        self.logger.info(f"有PMC全文: {papers_with_pmc} 篇, 无PMC全文: {total_papers - papers_with_pmc} 篇")
+        if self.pdf_enabled:
+            self.logger.info(f"PDF全文提取成功: {papers_with_fulltext[0]} 篇, 失败: {papers_pdf_failed[0]} 篇")
     
-    def _fetch_doi(self, pmid: str) -> Optional[str]:
+    def _fetch_dois_batch(self, pmids: List[str]) -> Dict[str, Optional[str]]:
         """
-        获取论文DOI
+        批量获取论文DOI（一次efetch请求）
+        
+        步骤1的搜索结果已包含DOI，仅用于补全旧版本搜索结果中缺失的DOI
         
         Args:
-            pmid: PubMed ID
+            pmids: PMID列表
             
         Returns:
-            str: DOI或None
+            Dict: {pmid: DOI或None}
         """
-        try:
-            handle = Entrez.efetch(
-                db="pubmed",
-                id=pmid,
-                rettype="xml",
-                retmode="xml"
-            )
-            records = Entrez.read(handle)
-            handle.close()
-            
-            for article in records.get('PubmedArticle', []):
-                article_ids = article.get('PubmedData', {}).get('ArticleIdList', [])
-                for article_id in article_ids:
-                    if hasattr(article_id, 'attributes'):
-                        if article_id.attributes.get('IdType') == 'doi':
-                            return str(article_id)
-            
-            return None
-            
-        except Exception:
-            return None
+        dois = {pmid: None for pmid in pmids}
+        
+        for attempt in range(self.retry_attempts):
+            try:
+                handle = self.entrez.efetch(
+                    db="pubmed",
+                    id=pmids,
+                    rettype="xml",
+                    retmode="xml"
+                )
+                try:
+                    for article in iter_elements(handle, 'PubmedArticle'):
+                        pmid = article.findtext('MedlineCitation/PMID', '')
+                        dois[pmid] = article.findtext("PubmedData/ArticleIdList/ArticleId[@IdType='doi']")
+                finally:
+                    handle.close()
+                
+                return dois
+                
+            except Exception as e:
+                self.logger.warning(f"获取DOI尝试 {attempt + 1}/{self.retry_attempts} 失败: {str(e)}")
+                if is_permanent_error(e):
+                    break
+                if attempt < self.retry_attempts - 1:
+                    time.sleep(self.retry_delay)
+        
+        return dois
     
     def _download_pdf(self, pmcid: str, output_dir: str) -> Optional[str]:
         """
@@ -315,56 +563,96 @@ class PaperDetailsFetcher:
             f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/pdf/main.pdf",
         ]
         
-        for pdf_url in pdf_urls:
+        # 根据缓存调整尝试顺序：上次成功的来源优先，有效期内返回过404的来源跳过
+        cache_entry = self._pmcid_cache.get(pmcid, {})
+        failed_urls = cache_entry.get('failed_urls')
+        expire_before = time.time() - self.pdf_failed_ttl
+        url_order = [
+            i for i in range(len(pdf_urls))
+            if not isinstance(failed_urls, dict) or failed_urls.get(str(i), 0) < expire_before
+        ]
+        working_url = cache_entry.get('working_url')
+        if working_url in url_order:
+            url_order.remove(working_url)
+            url_order.insert(0, working_url)
+        
+        # 下载中的临时文件，写完并校验后再改名，避免留下不完整的PDF
+        part_path = pdf_path + '.part'
+        
+        for url_index in url_order:
+            pdf_url = pdf_urls[url_index]
+            is_ncbi = 'ncbi.nlm.nih.gov' in pdf_url
             for attempt in range(self.retry_attempts):
                 try:
-                    response = requests.get(
-                        pdf_url,
-                        headers=self.headers,
-                        timeout=self.pdf_timeout,
-                        allow_redirects=True,
-                        verify=False,
-                        proxies=no_proxy
-                    )
-                    
-                    # 检查是否是PDF
-                    content_type = response.headers.get('Content-Type', '')
-                    is_pdf = (response.status_code == 200 and 
-                              (response.content[:4] == b'%PDF' or 'pdf' in content_type.lower()))
+                    if is_ncbi:
+                        self._ncbi_throttle.acquire()
+                    try:
+                        response = self.http.get(
+                            pdf_url,
+                            headers=self.headers,
+                            timeout=self.pdf_timeout,
+                            allow_redirects=True,
+                            verify=False,
+                            proxies=no_proxy,
+                            stream=True
+                        )
+                    finally:
+                        if is_ncbi:
+                            self._ncbi_throttle.release()
                     
-                    if is_pdf and len(response.content) > 1000:
-                        with open(pdf_path, 'wb') as f:
-                            f.write(response.content)
-                        
-                        # 验证文件
-                        if os.path.exists(pdf_path) and os.path.getsize(pdf_path) > 1000:
-                            self.logger.info(f"PDF下载成功: {pmcid} (来源: {pdf_url[:30]}...)")
-                            return pdf_path
-                        else:
-                            if os.path.exists(pdf_path):
-                                os.remove(pdf_path)
+                    try:
+                        if response.status_code == 200:
+                            # 只读取前5个字节判断是否是PDF（错误页等非PDF响应不再继续下载），再边下载边写盘
+                            prefix = response.raw.read(5, decode_content=True)
+                            content_type = response.headers.get('Content-Type', '').lower()
+                            
+                            if prefix.startswith(b'%PDF-') or 'pdf' in content_type:
+                                with open(part_path, 'wb', buffering=_WRITE_BUFFER_SIZE) as f:
+                                    f.write(prefix)
+                                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                                        f.write(chunk)
+                                
+                                # 验证文件
+                                if os.path.getsize(part_path) > 1000:
+                                    os.replace(part_path, pdf_path)
+                                    self.logger.info(f"PDF下载成功: {pmcid} (来源: {pdf_url[:30]}...)")
+                                    self._update_pmcid_cache(pmcid, working_url=url_index)
+                                    return pdf_path
+                                os.remove(part_path)
+                        elif response.status_code == 404 and self.pdf_failed_ttl > 0:
+                            # 该来源没有此论文的PDF，有效期内的后续运行不再尝试
+                            self._update_pmcid_cache(pmcid, failed_url=url_index)
+                    finally:
+                        response.close()
                     
-                    # 如果不是PDF，尝试下一个URL
+                    # 服务器临时错误（5xx）和请求过多（429）稍后重试该来源；
+                    # 非PDF或其他4xx（404/403等）重试也不会成功，直接尝试下一个URL
+                    retryable = response.status_code >= 500 or response.status_code == 429
+                    if retryable and attempt < self.retry_attempts - 1:
+                        time.sleep(self.retry_delay)
+                        continue
                     break
                         
                 except Exception as e:
                     self.logger.warning(f"PDF下载尝试失败 ({pmcid}): {str(e)}")
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
                     if attempt < self.retry_attempts - 1:
                         time.sleep(self.retry_delay)
         
         self.logger.warning(f"PDF下载失败: {pmcid} (已尝试所有来源)")
         return None
     
-    def _extract_text_from_pdf(self, pdf_path: str, output_path: str) -> Optional[Dict]:
+    def _extract_text_from_pdf(self, pdf_path: str, output_path: str):
         """
-        从PDF提取文本
+        从PDF提取文本（有进程池时提交到子进程后立即返回，不占用下载线程）
         
         Args:
             pdf_path: PDF文件路径
             output_path: 文本输出路径
             
         Returns:
-            Dict: {'text': str, 'word_count': int} 或 None
+            Dict: {'word_count': int}；有进程池时为产出该结果的 Future；失败返回None
         """
         if not PYMUPDF_AVAILABLE:
             self.logger.warning("PyMuPDF未安装，无法提取PDF文本")
@@ -374,108 +662,64 @@ class PaperDetailsFetcher:
             return None
         
         try:
-            doc = fitz.open(pdf_path)
-            full_text = ""
-            
-            for page in doc:
-                full_text += page.get_text()
-            
-            doc.close()
-            
-            # 清理文本
-            full_text = self._clean_text(full_text)
-            word_count = len(full_text.split())
-            
-            # 如果超过最大词数，提取关键章节
-            if word_count > self.fulltext_max_words:
-                full_text = self._extract_key_sections(full_text)
-                word_count = len(full_text.split())
-            
-            # 保存文本文件
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(full_text)
-            
-            return {
-                'text': full_text,
-                'word_count': word_count
-            }
-            
+            if self._extract_pool is not None:
+                return self._extract_pool.submit(
+                    _extract_pdf_text, pdf_path, output_path, self.fulltext_max_words
+                )
+            return _extract_pdf_text(pdf_path, output_path, self.fulltext_max_words)
         except Exception as e:
             self.logger.warning(f"PDF文本提取失败: {str(e)}")
             return None
     
-    def _clean_text(self, text: str) -> str:
-        """
-        清理提取的文本
+    def _collect_extract_result(self, record: Dict, extract_future: Future) -> None:
+        """取回进程池中的文本提取结果，补充到论文详情中"""
+        try:
+            extract_result = extract_future.result()
+        except Exception as e:
+            self.logger.warning(f"PDF文本提取失败: {str(e)}")
+            extract_result = None
         
-        Args:
-            text: 原始文本
-            
-        Returns:
-            str: 清理后的文本
-        """
-        # 移除多余空白
-        text = re.sub(r'\s+', ' ', text)
-        # 移除特殊字符
-        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
-        # 修复常见的PDF提取问题
-        text = re.sub(r'(\w)-\s+(\w)', r'\1\2', text)  # 修复断字
-        return text.strip()
+        pdf_result = self._apply_extract_result(record['pmcid'], {'pdf_path': record['pdf_path']}, extract_result)
+        self._set_fulltext_fields(record, pdf_result)
     
-    def _extract_key_sections(self, text: str) -> str:
-        """
-        从全文中提取关键章节
-        
-        Args:
-            text: 全文文本
-            
-        Returns:
-            str: 提取的关键章节
-        """
-        # 定义关键章节标题的正则模式
-        section_patterns = [
-            (r'(?i)\b(abstract)\b', 'Abstract'),
-            (r'(?i)\b(introduction)\b', 'Introduction'),
-            (r'(?i)\b(methods?|materials?\s+and\s+methods?)\b', 'Methods'),
-            (r'(?i)\b(results?)\b', 'Results'),
-            (r'(?i)\b(discussion)\b', 'Discussion'),
-            (r'(?i)\b(conclusion|conclusions)\b', 'Conclusion'),
-        ]
-        
-        extracted_sections = []
-        
-        for pattern, section_name in section_patterns:
-            match = re.search(pattern, text)
-            if match:
-                start = match.start()
-                # 找到下一个章节的开始位置
-                end = len(text)
-                for next_pattern, _ in section_patterns:
-                    next_match = re.search(next_pattern, text[start + len(match.group()):])
-                    if next_match:
-                        potential_end = start + len(match.group()) + next_match.start()
-                        if potential_end < end:
-                            end = potential_end
-                
-                section_text = text[start:end].strip()
-                # 限制每个章节的长度
-                words = section_text.split()
-                if len(words) > 2000:
-                    section_text = ' '.join(words[:2000]) + '...'
-                
-                extracted_sections.append(f"## {section_name}\n{section_text}")
-        
-        if extracted_sections:
-            result = '\n\n'.join(extracted_sections)
-            # 确保不超过最大词数
-            words = result.split()
-            if len(words) > self.fulltext_max_words:
-                result = ' '.join(words[:self.fulltext_max_words]) + '...'
-            return result
-        
-        # 如果无法识别章节，返回前max_words个词
-        words = text.split()
-        return ' '.join(words[:self.fulltext_max_words]) + ('...' if len(words) > self.fulltext_max_words else '')
+    def _apply_extract_result(self, pmcid: str, result: Dict, extract_result: Optional[Dict]) -> Dict:
+        """根据文本提取结果更新 result 的全文路径、状态和词数"""
+        if extract_result:
+            result['fulltext_path'] = f"pdfs/{pmcid}.txt"
+            result['status'] = 'success'
+            result['word_count'] = extract_result['word_count']
+            self._update_pmcid_cache(pmcid, word_count=extract_result['word_count'])
+        else:
+            result['fulltext_path'] = None
+            result['status'] = 'extract_failed'
+            result['word_count'] = 0
+        return result
+    
+    @staticmethod
+    def _set_fulltext_fields(detailed_paper: Dict, pdf_result: Dict) -> None:
+        """把PDF下载和全文提取结果写入论文详情"""
+        detailed_paper['pdf_path'] = pdf_result.get('pdf_path')
+        detailed_paper['fulltext_path'] = pdf_result.get('fulltext_path')
+        detailed_paper['fulltext_status'] = pdf_result.get('status')
+        detailed_paper['fulltext_word_count'] = pdf_result.get('word_count', 0)
+    
+    def _update_pmcid_cache(self, pmcid: str, working_url: Optional[int] = None,
+                            failed_url: Optional[int] = None,
+                            word_count: Optional[int] = None) -> None:
+        """更新PDF下载缓存（线程安全，在 iter_records 结束时统一写盘）"""
+        with self._pmcid_cache_lock:
+            entry = self._pmcid_cache.setdefault(pmcid, {})
+            if working_url is not None:
+                entry['working_url'] = working_url
+            if failed_url is not None:
+                failed_urls = entry.get('failed_urls')
+                if not isinstance(failed_urls, dict):
+                    # 旧格式（不带时间的列表）不再沿用
+                    failed_urls = entry['failed_urls'] = {}
+                failed_urls[str(failed_url)] = time.time()
+            if word_count is not None:
+                entry['word_count'] = word_count
+            self._pmcid_cache_dirty = True
     
     def _download_and_extract_pdf(self, pmcid: str, output_dir: str) -> Dict:
         """
@@ -486,7 +730,8 @@ class PaperDetailsFetcher:
             output_dir: 输出目录
             
         Returns:
-            Dict: 包含 pdf_path, fulltext_path, status, word_count
+            Dict: 包含 pdf_path, fulltext_path, status, word_count；
+                  文本提取提交到进程池时 status 为 extracting，extract_future 为提取任务
         """
         result = {
             'pdf_path': None,
@@ -498,6 +743,23 @@ class PaperDetailsFetcher:
         if not pmcid:
             return result
         
+        # 已提取过全文时直接复用，跳过下载和PyMuPDF解析
+        txt_filename = f"{pmcid}.txt"
+        txt_path = os.path.join(output_dir, txt_filename)
+        if os.path.exists(txt_path) and os.path.getsize(txt_path) > 0:
+            word_count = self._pmcid_cache.get(pmcid, {}).get('word_count')
+            if word_count is None:
+                with open(txt_path, 'r', encoding='utf-8') as f:
+                    word_count = len(f.read().split())
+                self._update_pmcid_cache(pmcid, word_count=word_count)
+            if os.path.exists(os.path.join(output_dir, f"{pmcid}.pdf")):
+                result['pdf_path'] = f"pdfs/{pmcid}.pdf"
+            result['fulltext_path'] = f"pdfs/{txt_filename}"
+            result['status'] = 'success'
+            result['word_count'] = word_count
+            self.logger.info(f"全文已缓存，跳过下载: {pmcid}")
+            return result
+        
         # 下载PDF
         pdf_path = self._download_pdf(pmcid, output_dir)
         
@@ -508,21 +770,17 @@ class PaperDetailsFetcher:
         result['pdf_path'] = f"pdfs/{pmcid}.pdf"
         
         # 提取文本
-        txt_filename = f"{pmcid}.txt"
-        txt_path = os.path.join(output_dir, txt_filename)
-        
         extract_result = self._extract_text_from_pdf(pdf_path, txt_path)
         
-        if extract_result:
-            result['fulltext_path'] = f"pdfs/{txt_filename}"
-            result['status'] = 'success'
-            result['word_count'] = extract_result['word_count']
-        else:
-            result['status'] = 'extract_failed'
+        if isinstance(extract_result, Future):
+            result['status'] = 'extracting'
+            result['extract_future'] = extract_result
+            return result
         
-        return result
+        return self._apply_extract_result(pmcid, result, extract_result)
     
-    def _download_single_paper(self, paper: Dict, link_info: Dict, pdfs_dir: str) -> Dict:
+    def _download_single_paper(self, paper: Dict, link_info: Dict,
+                               pdfs_dir: str) -> Tuple[Dict, Optional[Future]]:
         """
         处理单篇论文的详情获取（线程安全）
         
@@ -532,12 +790,13 @@ class PaperDetailsFetcher:
             pdfs_dir: PDF输出目录
             
         Returns:
-            Dict: 处理后的详细论文信息
+            Tuple[Dict, Optional[Future]]: (处理后的详细论文信息（即补充了字段的 paper 本身）,
+                                           进程池中尚未完成的文本提取任务)
         """
         pmid = paper['pmid']
         
-        # 合并基本信息和链接信息
-        detailed_paper = paper.copy()
+        # 搜索结果在 iter_records 中专门加载、之后不再使用，直接在原字典上补充字段，不再逐篇复制
+        detailed_paper = paper
         
         # 添加PMCID信息
         pmc_info = link_info.get(pmid, {})
@@ -554,26 +813,25 @@ class PaperDetailsFetcher:
         else:
             detailed_paper['authors_short'] = 'Unknown'
         
-        # 尝试获取DOI
-        doi = self._fetch_doi(pmid)
-        detailed_paper['doi'] = doi
+        # DOI（步骤1已解析，旧版本结果由批量请求补全）
+        if 'doi' not in detailed_paper:
+            detailed_paper['doi'] = pmc_info.get('doi')
         
         # PDF下载和全文提取
+        extract_future = None
         if self.pdf_enabled:
             if pmcid:
                 self.logger.info(f"下载PDF: {pmcid}")
                 pdf_result = self._download_and_extract_pdf(pmcid, pdfs_dir)
-                detailed_paper['pdf_path'] = pdf_result.get('pdf_path')
-                detailed_paper['fulltext_path'] = pdf_result.get('fulltext_path')
-                detailed_paper['fulltext_status'] = pdf_result.get('status')
-                detailed_paper['fulltext_word_count'] = pdf_result.get('word_count', 0)
+                extract_future = pdf_result.get('extract_future')
+                self._set_fulltext_fields(detailed_paper, pdf_result)
             else:
                 detailed_paper['pdf_path'] = None
                 detailed_paper['fulltext_path'] = None
                 detailed_paper['fulltext_status'] = 'no_pmcid'
                 detailed_paper['fulltext_word_count'] = 0
         
-        return detailed_paper
+        return detailed_paper, extract_future
 
 
 def main(project_path: str) -> bool:
@@ -591,7 +849,10 @@ def main(project_path: str) -> bool:
         logger.step_start(2, "获取论文详情")
         
         fetcher = PaperDetailsFetcher(config, logger)
-        result = fetcher.fetch_details(project_path)
+        try:
+            result = fetcher.fetch_details(project_path)
+        finally:
+            fetcher.close()
         
         if result['success']:
             # 保存结果
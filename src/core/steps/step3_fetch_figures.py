@@ -7,47 +7,170 @@ import os
 import sys
 import ssl
 import time
-import re
+import io
 import asyncio
 import requests
-import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from urllib3.util.request import ACCEPT_ENCODING
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 # 处理SSL证书验证问题
 ssl._create_default_https_context = ssl._create_unverified_context
 
 from Bio import Entrez
 
-# 浏览器自动化（异步API）
+# 浏览器自动化（异步API）：导入较慢，只在需要启动浏览器时由 _import_playwright 导入
+# （缓存全部命中或直接下载原图成功时不需要浏览器）
+async_playwright = None
+PlaywrightTimeout = TimeoutError  # 导入后替换为Playwright的超时异常类型
+
+
+def _import_playwright() -> bool:
+    """导入Playwright（只导入一次），未安装时返回False"""
+    global async_playwright, PlaywrightTimeout
+    if async_playwright is None:
+        try:
+            from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+        except ImportError:
+            return False
+    return True
+
+# lxml（可选）：C实现的HTML解析，未安装时使用BeautifulSoup
+try:
+    from lxml import etree as lxml_etree, html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Pillow（可选）：整页截图一次后在本地裁剪各figure；未安装时逐个元素截图
 try:
-    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
-    PLAYWRIGHT_AVAILABLE = True
+    from PIL import Image
+    PIL_AVAILABLE = True
 except ImportError:
-    PLAYWRIGHT_AVAILABLE = False
+    PIL_AVAILABLE = False
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+# 项目根目录（直接运行本文件时加入 sys.path，已存在时不重复添加）
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.utils.config import Config
 from src.utils.logger import Logger
 from src.utils.file_manager import FileManager
+from src.utils.entrez_cache import EntrezCache, get_ncbi_throttle
+
+# 截图时不需要的资源：字体、音视频等类型以及统计/广告脚本直接拦截，减少页面加载量
+# （图片和样式表保留，截图需要正常渲染的图片和版式）
+_BLOCKED_RESOURCE_TYPES = frozenset(('font', 'media', 'websocket', 'eventsource', 'manifest', 'texttrack'))
+_BLOCKED_URL_KEYWORDS = ('google-analytics', 'googletagmanager', 'doubleclick', 'googlesyndication')
+
+# PMC页面中figure元素和caption的CSS选择器
+_FIGURE_SELECTOR = 'figure.fig, div.fig, [id^="fig"], [id^="F"]'
+_CAPTION_SELECTOR = 'figcaption, .caption, .fig-caption'
+# 浏览器中查找figure元素：先用主选择器，找不到时再用备用选择器
+_BROWSER_FIGURE_SELECTOR = 'figure.fig, div.fig'
+_BROWSER_FIGURE_FALLBACK_SELECTOR = '[id^="fig"], [id^="F"], .figure'
+
+# 浏览器启动参数：关闭截图用不到的扩展、后台联网和同步功能；/dev/shm 较小的容器中改用临时目录
+_BROWSER_LAUNCH_ARGS = [
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-sync',
+    '--disable-dev-shm-usage',
+]
+
+# 浏览器超时（毫秒）：页面导航，以及等待元素等其他操作。
+# 正常页面几秒内完成，注定失败的页面不必等满 figure_download_timeout；
+# 截图（长页面整页截图需要较长时间）单独使用 figure_download_timeout
+_NAVIGATION_TIMEOUT_MS = 10000
+_ACTION_TIMEOUT_MS = 5000
+
+# lxml 下预编译为与上述CSS选择器等价的XPath（结果按文档顺序）
+if LXML_AVAILABLE:
+    _FIGURE_XPATH = lxml_etree.XPath(
+        "//*[(self::figure or self::div) and contains(concat(' ', normalize-space(@class), ' '), ' fig ')]"
+        " | //*[starts-with(@id, 'fig') or starts-with(@id, 'F')]"
+    )
+    _IMG_XPATH = lxml_etree.XPath(".//img")
+    _CAPTION_XPATH = lxml_etree.XPath(
+        ".//figcaption"
+        " | .//*[contains(concat(' ', normalize-space(@class), ' '), ' caption ')]"
+        " | .//*[contains(concat(' ', normalize-space(@class), ' '), ' fig-caption ')]"
+    )
+
+# 等待给定figure元素中的图片全部加载完成（改为立即加载，已加载或加载失败的不再等待）
+_WAIT_FIGURE_IMAGES_JS = """
+figs => Promise.all(figs.flatMap(fig => Array.from(fig.querySelectorAll('img'))).map(img => {
+    img.loading = 'eager';
+    if (img.complete) return null;
+    return new Promise(resolve => {
+        img.addEventListener('load', resolve);
+        img.addEventListener('error', resolve);
+    });
+}))
+"""
+
+# 一次取回给定figure元素的ID、caption和在整个页面中的位置（代替逐个元素 get_attribute / query_selector / inner_text）
+_FIGURE_INFO_JS = """
+({figs, captionSelector}) => figs.map(fig => {
+    const caption = fig.querySelector(captionSelector);
+    const rect = fig.getBoundingClientRect();
+    return {
+        id: fig.id,
+        caption: caption ? caption.innerText : '',
+        x: rect.left + window.scrollX,
+        y: rect.top + window.scrollY,
+        width: rect.width,
+        height: rect.height
+    };
+})
+"""
+
+# 整页截图后裁剪的页面高度上限（像素），更长的页面整页截图过大，改为逐个元素截图
+_MAX_FULL_PAGE_HEIGHT = 16000
+
+# 图片截图的JPEG质量
+_SCREENSHOT_QUALITY = 85
+
+# 直接下载原图时按 Content-Type 确定文件扩展名
+_IMAGE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/tiff': '.tif',
+}
 
 
 class PMCFigureFetcher:
-    def __init__(self, config: Config, logger: Logger):
+    def __init__(self, config: Config, logger: Logger,
+                 session: Optional[requests.Session] = None):
         self.config = config
         self.logger = logger
         
+        # HTTP客户端：由调用方传入共享的 Session 以复用连接，未传入时直接使用 requests 模块函数
+        self.http = session if session is not None else requests
+        
         # Entrez设置
         Entrez.email = config.get('pubmed', 'email', 'user@example.com')
         api_key = config.get('pubmed', 'api_key', '')
         if api_key:
             Entrez.api_key = api_key
+        self.entrez = EntrezCache(config)
+        # PMC页面和原图请求的NCBI限流器（与步骤2的PDF下载共用）
+        self._ncbi_throttle = get_ncbi_throttle(config)
         
         self.timeout = config.get_int('pmc', 'figure_download_timeout', 30)
         self.max_figures = config.get_int('pmc', 'max_figures_per_paper', 5)
         self.retry_attempts = config.get_int('pubmed', 'retry_attempts', 3)
+        self.retry_delay = config.get_int('pubmed', 'retry_delay', 2)
         self.max_concurrent_pages = config.get_int('pmc', 'figure_download_workers', 4)
+        # 先尝试从页面HTML直接下载原图，失败时才使用浏览器截图
+        self.html_first = config.get_boolean('pmc', 'figure_html_first', True)
+        # 常驻浏览器的CDP地址（如 http://127.0.0.1:9222）：设置后连接已运行的Chromium，不再每次启动新浏览器
+        self.browser_cdp_url = config.get('pmc', 'browser_cdp_url', '') or os.environ.get('PMC_CHROME_CDP', '')
         
         # 请求头 - 模拟浏览器访问
         self.headers = {
@@ -55,22 +178,55 @@ class PMCFigureFetcher:
             'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9',
             'Referer': 'https://www.ncbi.nlm.nih.gov/',
+            # 声明可解压的压缩格式（gzip/deflate，安装了brotli/zstandard时也包括br/zstd），由requests自动解压
+            'Accept-Encoding': ACCEPT_ENCODING,
         }
         
-        # 浏览器实例（异步延迟初始化）
+        # 最近一次 iter_records 的统计信息
+        self.stats: Dict = {}
+        
+        # 图片结果缓存：{pmcid: [已保存到本地的图片信息]}，重新运行同一项目时直接复用，不再访问PMC页面。
+        # 每篇论文完成后立即追加到 step3_figures/figure_cache.jsonl，运行中断后重新运行可从断点继续
+        self._figure_cache: Dict[str, List[Dict]] = {}
+        self._figure_cache_file: Optional[str] = None
+        self._file_manager: Optional[FileManager] = None
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # 本次运行中已解析的PMC页面：{pmcid: _parse_page_figures 的结果}
+        self._parsed_pages: Dict[str, List[Dict]] = {}
+        
+        # 浏览器实例（异步延迟初始化）：第一篇需要截图的论文出现时才启动，
+        # _browser_task 为本次运行中唯一一次启动任务，并发的论文等待同一个结果
         self._playwright = None
         self._browser = None
+        self._browser_task: Optional[asyncio.Task] = None
+        # 浏览器上下文池：每个并发页面一个上下文，论文之间只开关页面，不重复创建上下文
+        self._contexts: List = []
+        self._context_pool: Optional[asyncio.Queue] = None
+        # 池中上下文禁用页面脚本；figure需要脚本渲染时才创建启用JavaScript的上下文（所有论文共用）
+        self._js_context = None
+        self._js_context_lock: Optional[asyncio.Lock] = None
+        # 直接HTTP请求（页面HTML、原图）使用的线程池，不阻塞事件循环
+        self._http_executor: Optional[ThreadPoolExecutor] = None
     
     async def _init_browser_async(self):
         """异步初始化浏览器"""
-        if not PLAYWRIGHT_AVAILABLE:
+        if not _import_playwright():
             self.logger.warning("Playwright未安装，无法使用浏览器截图功能")
             return False
         
         if self._browser is None:
             try:
                 self._playwright = await async_playwright().start()
-                self._browser = await self._playwright.chromium.launch(headless=True)
+                self._browser = await self._connect_or_launch_browser_async()
+                self._contexts = [
+                    await self._new_context_async(java_script_enabled=False)
+                    for _ in range(self.max_concurrent_pages)
+                ]
+                self._context_pool = asyncio.Queue()
+                self._js_context_lock = asyncio.Lock()
+                for context in self._contexts:
+                    self._context_pool.put_nowait(context)
                 self.logger.info("浏览器初始化成功")
                 return True
             except Exception as e:
@@ -78,76 +234,100 @@ class PMCFigureFetcher:
                 return False
         return True
     
+    async def _ensure_browser_async(self) -> bool:
+        """首次需要浏览器截图时启动浏览器（每次运行只启动一次），返回浏览器是否可用"""
+        if self._browser_task is None:
+            self._browser_task = asyncio.ensure_future(self._start_browser_async())
+        # shield：某篇论文的任务被取消时不取消共用的启动任务
+        return await asyncio.shield(self._browser_task)
+    
+    async def _start_browser_async(self) -> bool:
+        """启动浏览器，不可用时记录一次警告"""
+        browser_available = await self._init_browser_async()
+        if not browser_available:
+            self.logger.warning("浏览器不可用，将只保存图片URL信息")
+        return browser_available
+    
+    async def _connect_or_launch_browser_async(self):
+        """配置了CDP地址时连接常驻浏览器（失败则回退到启动新浏览器），否则启动新浏览器"""
+        if self.browser_cdp_url:
+            try:
+                browser = await self._playwright.chromium.connect_over_cdp(self.browser_cdp_url)
+                self.logger.info(f"已连接常驻浏览器: {self.browser_cdp_url}")
+                return browser
+            except Exception as e:
+                self.logger.warning(f"连接常驻浏览器失败，改为启动新浏览器: {str(e)}")
+        return await self._playwright.chromium.launch(headless=True, args=_BROWSER_LAUNCH_ARGS)
+    
+    async def _new_context_async(self, java_script_enabled: bool):
+        """创建浏览器上下文（设置视口和User-Agent，并过滤不需要的请求）"""
+        context = await self._browser.new_context(
+            viewport={'width': 1200, 'height': 800},
+            device_scale_factor=1,
+            java_script_enabled=java_script_enabled,
+            user_agent=self.headers['User-Agent']
+        )
+        navigation_timeout = min(self.timeout * 1000, _NAVIGATION_TIMEOUT_MS)
+        context.set_default_navigation_timeout(navigation_timeout)
+        context.set_default_timeout(min(navigation_timeout, _ACTION_TIMEOUT_MS))
+        await context.route("**/*", self._filter_request)
+        return context
+    
+    async def _get_js_context_async(self):
+        """获取启用JavaScript的上下文（首次使用时创建）"""
+        async with self._js_context_lock:
+            if self._js_context is None:
+                self._js_context = await self._new_context_async(java_script_enabled=True)
+                self._contexts.append(self._js_context)
+        return self._js_context
+    
+    @staticmethod
+    async def _filter_request(route):
+        """浏览器请求过滤：拦截截图不需要的资源，其余请求正常放行"""
+        request = route.request
+        if (request.resource_type in _BLOCKED_RESOURCE_TYPES
+                or any(keyword in request.url for keyword in _BLOCKED_URL_KEYWORDS)):
+            await route.abort()
+        else:
+            await route.continue_()
+    
     async def _close_browser_async(self):
         """异步关闭浏览器"""
+        for context in self._contexts:
+            await context.close()
+        self._contexts = []
+        self._context_pool = None
+        self._js_context = None
         if self._browser:
+            # 常驻浏览器只断开连接，不关闭（上面已关闭本次创建的上下文）
             await self._browser.close()
             self._browser = None
         if self._playwright:
             await self._playwright.stop()
             self._playwright = None
     
-    def fetch_figures(self, project_path: str) -> Dict:
+    def fetch_figures(self, project_path: str,
+                      pmcid_map: Optional[Dict[str, Optional[str]]] = None) -> Dict:
         """
         获取论文图片（使用浏览器截图方式，异步并发）
         
         Args:
             project_path: 项目路径
+            pmcid_map: 已获取的 {pmid: PMCID}；给定时直接读取Step 1的搜索结果，
+                       不依赖Step 2的输出（用于与Step 2并行执行）
             
         Returns:
             Dict: 图片获取结果
         """
-        self.logger.info("开始获取PMC论文图片（异步并发截图模式）")
-        
         try:
-            # 加载Step 2的详情结果
-            file_manager = FileManager(self.config, self.logger)
-            step2_dir = file_manager.get_step_directory(project_path, 'step2_details')
-            details_file = os.path.join(step2_dir, 'papers_details.json')
-            
-            if not os.path.exists(details_file):
-                raise FileNotFoundError(f"未找到论文详情文件: {details_file}")
-            
-            details_data = file_manager.load_json(details_file)
-            papers = details_data.get('papers', [])
-            
-            # 获取图片输出目录
-            step3_dir = file_manager.get_step_directory(project_path, 'step3_figures')
-            images_dir = os.path.join(step3_dir, 'images')
-            os.makedirs(images_dir, exist_ok=True)
-            
-            # 筛选有PMCID的论文
-            papers_with_pmc = [p for p in papers if p.get('pmcid')]
-            
-            self.logger.info(f"共 {len(papers)} 篇论文, 其中 {len(papers_with_pmc)} 篇有PMC全文")
-            self.logger.info(f"使用 {self.max_concurrent_pages} 个并发页面")
-            
-            # 运行异步获取
-            papers_figures, total_figures = asyncio.run(
-                self._fetch_figures_async(papers, images_dir)
-            )
-            
-            print()  # 换行
-            
-            # 统计
-            papers_with_figures = sum(1 for p in papers_figures if p['figure_count'] > 0)
+            papers_figures = list(self.iter_records(project_path, pmcid_map=pmcid_map))
             
             result = {
                 'success': True,
                 'fetch_time': datetime.now().isoformat(),
                 'papers': papers_figures,
-                'stats': {
-                    'total_papers': len(papers),
-                    'papers_with_pmc': len(papers_with_pmc),
-                    'papers_with_figures': papers_with_figures,
-                    'papers_without_figures': len(papers) - papers_with_figures,
-                    'total_figures_downloaded': total_figures
-                }
             }
-            
-            self.logger.success(f"图片获取完成: 共截图 {total_figures} 张图片")
-            self.logger.info(f"有图片: {papers_with_figures} 篇, 无图片: {len(papers) - papers_with_figures} 篇")
-            
+            result.update(self.get_summary_fields())
             return result
             
         except Exception as e:
@@ -158,65 +338,197 @@ class PMCFigureFetcher:
                 'fetch_time': datetime.now().isoformat()
             }
     
-    async def _fetch_figures_async(self, papers: List[Dict], images_dir: str) -> tuple:
+    def get_summary_fields(self) -> Dict:
+        """返回最近一次 iter_records 迭代结束后的统计信息"""
+        return {'stats': self.stats}
+    
+    def iter_records(self, project_path: str,
+                     pmcid_map: Optional[Dict[str, Optional[str]]] = None) -> Iterator[Dict]:
         """
-        异步并发获取所有论文图片
+        逐篇产出论文图片结果（按论文原顺序），供流式写盘使用
+        
+        迭代结束后 self.stats 为本次结果的统计信息
+        
+        Args:
+            project_path: 项目路径
+            pmcid_map: 同 fetch_figures
+            
+        Yields:
+            Dict: 单篇论文的图片结果
+        """
+        self.logger.info("开始获取PMC论文图片（异步并发截图模式）")
+        
+        file_manager = FileManager(self.config, self.logger)
+        
+        if pmcid_map is not None:
+            papers = self._load_papers_from_search(file_manager, project_path, pmcid_map)
+        else:
+            # 加载Step 2的详情结果
+            step2_dir = file_manager.get_step_directory(project_path, 'step2_details')
+            details_file = os.path.join(step2_dir, 'papers_details.json')
+            
+            if not os.path.exists(details_file):
+                raise FileNotFoundError(f"未找到论文详情文件: {details_file}")
+            
+            details_data = file_manager.load_json(details_file)
+            papers = details_data.get('papers', [])
+            
+            # 缺少PMCID字段的记录（如旧版本详情结果）用一次elink请求批量补全，不逐篇查询
+            missing = [p['pmid'] for p in papers if 'pmcid' not in p]
+            if missing:
+                missing_map = self.entrez.fetch_pmcids(missing, self.logger)
+                for paper in papers:
+                    if 'pmcid' not in paper:
+                        paper['pmcid'] = missing_map.get(paper['pmid'])
+        
+        # 获取图片输出目录
+        step3_dir = file_manager.get_step_directory(project_path, 'step3_figures')
+        images_dir = os.path.join(step3_dir, 'images')
+        os.makedirs(images_dir, exist_ok=True)
+        
+        # 加载图片结果缓存（同一PMCID有多条记录时以最后写入的为准）
+        self._file_manager = file_manager
+        self._figure_cache_file = os.path.join(step3_dir, 'figure_cache.jsonl')
+        self._figure_cache = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._parsed_pages = {}
+        try:
+            for record in file_manager.load_jsonl(self._figure_cache_file):
+                self._figure_cache[record['pmcid']] = record['figures']
+        except Exception as e:
+            self.logger.warning(f"图片缓存读取失败，将重新获取: {str(e)}")
+        
+        # 筛选有PMCID的论文
+        papers_with_pmc = sum(1 for p in papers if p.get('pmcid'))
+        
+        self.logger.info(f"共 {len(papers)} 篇论文, 其中 {papers_with_pmc} 篇有PMC全文")
+        self.logger.info(f"使用 {self.max_concurrent_pages} 个并发页面")
+        
+        # 逐条驱动异步生成器：每取到一篇结果就交给调用方写盘
+        papers_with_figures = 0
+        total_figures = 0
+        loop = asyncio.new_event_loop()
+        agen = self._iter_figures_async(papers, images_dir)
+        try:
+            while True:
+                try:
+                    paper_result = loop.run_until_complete(agen.__anext__())
+                except StopAsyncIteration:
+                    break
+                if paper_result['figure_count'] > 0:
+                    papers_with_figures += 1
+                if paper_result.get('figures'):
+                    total_figures += paper_result['figure_count']
+                yield paper_result
+        finally:
+            loop.run_until_complete(agen.aclose())
+            loop.close()
+        
+        print()  # 换行
+        
+        # 统计
+        self.stats = {
+            'total_papers': len(papers),
+            'papers_with_pmc': papers_with_pmc,
+            'papers_with_figures': papers_with_figures,
+            'papers_without_figures': len(papers) - papers_with_figures,
+            'total_figures_downloaded': total_figures,
+            'cache_hits': self._cache_hits,
+            'cache_misses': self._cache_misses
+        }
+        
+        self.logger.success(f"图片获取完成: 共截图 {total_figures} 张图片")
+        self.logger.info(f"有图片: {papers_with_figures} 篇, 无图片: {len(papers) - papers_with_figures} 篇")
+        if self._cache_hits:
+            self.logger.info(f"图片缓存命中: {self._cache_hits} 篇")
+    
+    def _load_papers_from_search(self, file_manager: FileManager, project_path: str,
+                                 pmcid_map: Dict[str, Optional[str]]) -> List[Dict]:
+        """
+        从Step 1的搜索结果加载论文，PMCID取自调用方已批量获取的映射
+        
+        Args:
+            file_manager: 文件管理器
+            project_path: 项目路径
+            pmcid_map: {pmid: PMCID}
+            
+        Returns:
+            List[Dict]: [{'pmid': ..., 'pmcid': ...}]
+        """
+        step1_dir = file_manager.get_step_directory(project_path, 'step1_search')
+        search_results_file = os.path.join(step1_dir, 'search_results.json')
+        
+        if not os.path.exists(search_results_file):
+            raise FileNotFoundError(f"未找到搜索结果文件: {search_results_file}")
+        
+        search_results = file_manager.load_json(search_results_file)
+        pmids = [p['pmid'] for p in search_results.get('papers', [])]
+        return [{'pmid': pmid, 'pmcid': pmcid_map.get(pmid)} for pmid in pmids]
+    
+    async def _iter_figures_async(self, papers: List[Dict], images_dir: str) -> AsyncIterator[Dict]:
+        """
+        异步并发获取所有论文图片，按论文原顺序逐篇产出结果
         
         Args:
             papers: 论文列表
             images_dir: 图片输出目录
             
-        Returns:
-            tuple: (papers_figures, total_figures)
+        Yields:
+            Dict: 单篇论文的图片结果
         """
-        # 初始化浏览器
-        browser_available = await self._init_browser_async()
-        if not browser_available:
-            self.logger.warning("浏览器不可用，将只保存图片URL信息")
+        # 浏览器在第一篇需要截图的论文出现时才启动（缓存命中或直接下载原图成功时不启动）
+        self._browser_task = None
         
-        # 信号量控制并发数
-        semaphore = asyncio.Semaphore(self.max_concurrent_pages)
+        # 直接HTTP请求（页面HTML、原图）的线程池，线程数即并发数
+        self._http_executor = ThreadPoolExecutor(max_workers=self.max_concurrent_pages)
+        
+        # 同一PMCID（如更正、重复发表的记录）只获取一次，各论文共用结果
+        pmcid_tasks: Dict[str, asyncio.Future] = {}
+        for paper in papers:
+            pmcid = paper.get('pmcid')
+            if pmcid and pmcid not in pmcid_tasks:
+                pmcid_tasks[pmcid] = asyncio.ensure_future(
+                    self._fetch_pmcid_figures_async(pmcid, images_dir)
+                )
         
         # 进度计数
         progress_counter = [0]
         total_papers = len(papers)
         
         async def process_with_progress(paper):
-            result = await self._fetch_single_paper_figures_async(
-                paper, images_dir, semaphore, browser_available
-            )
+            result = await self._fetch_single_paper_figures_async(paper, pmcid_tasks)
             progress_counter[0] += 1
-            self.logger.progress(progress_counter[0], total_papers, f"完成: {paper['pmid']}")
+            self.logger.progress(progress_counter[0], total_papers, f"完成: {paper['pmid']}", task='step3')
             return result
         
+        # 并发处理所有论文
+        tasks = [asyncio.ensure_future(process_with_progress(paper)) for paper in papers]
         try:
-            # 并发处理所有论文
-            tasks = [process_with_progress(paper) for paper in papers]
-            papers_figures = await asyncio.gather(*tasks)
-            
-            # 计算总图片数
-            total_figures = sum(p['figure_count'] for p in papers_figures if p.get('figures'))
-            
-            return list(papers_figures), total_figures
-            
+            # 按原顺序等待：已完成的任务直接取结果，后续任务在等待期间继续并发执行
+            for task in tasks:
+                yield await task
         finally:
+            all_tasks = tasks + list(pmcid_tasks.values())
+            if self._browser_task is not None:
+                all_tasks.append(self._browser_task)
+            for task in all_tasks:
+                task.cancel()
+            await asyncio.gather(*all_tasks, return_exceptions=True)
+            self._http_executor.shutdown(wait=False, cancel_futures=True)
             await self._close_browser_async()
     
     async def _fetch_single_paper_figures_async(
         self, 
         paper: Dict, 
-        images_dir: str, 
-        semaphore: asyncio.Semaphore,
-        browser_available: bool
+        pmcid_tasks: Dict[str, asyncio.Future]
     ) -> Dict:
         """
         异步获取单篇论文的图片
         
         Args:
             paper: 论文信息
-            images_dir: 图片输出目录
-            semaphore: 并发控制信号量
-            browser_available: 浏览器是否可用
+            pmcid_tasks: {pmcid: _fetch_pmcid_figures_async 任务}
             
         Returns:
             Dict: 论文图片结果
@@ -235,27 +547,170 @@ class PMCFigureFetcher:
             paper_result['note'] = '原图不可获取（非开放获取）'
             return paper_result
         
-        async with semaphore:
-            if browser_available:
-                figures = await self._fetch_figures_via_browser_async(pmcid, images_dir)
-            else:
-                figures = []
-            
-            if not figures:
-                # 回退到同步方式获取URL信息
-                url_info = self._get_figure_urls_from_page(pmcid)
-                if url_info:
-                    paper_result['figures'] = url_info
-                    paper_result['figure_count'] = len(url_info)
-                    paper_result['note'] = '图片URL已获取（可在浏览器中查看）'
-                else:
-                    paper_result['note'] = '无法获取图片信息'
-            else:
-                paper_result['figures'] = figures
-                paper_result['figure_count'] = len(figures)
+        figures, note = await pmcid_tasks[pmcid]
+        paper_result['figures'] = list(figures)
+        paper_result['figure_count'] = len(figures)
+        if note:
+            paper_result['note'] = note
         
         return paper_result
     
+    async def _fetch_pmcid_figures_async(
+        self, 
+        pmcid: str, 
+        images_dir: str
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        异步获取一个PMC页面的图片（缓存 -> 直接下载原图 -> 浏览器截图 -> 只获取URL）
+        
+        Args:
+            pmcid: PMC ID
+            images_dir: 图片输出目录
+            
+        Returns:
+            Tuple[List[Dict], Optional[str]]: (图片信息列表, 说明)，图片已保存到本地时说明为None
+        """
+        cached = self._get_cached_figures(pmcid, images_dir)
+        if cached is not None:
+            self._cache_hits += 1
+            return cached, None
+        self._cache_misses += 1
+        
+        figures = []
+        if self.html_first:
+            # 快速路径：直接下载原图（在线程中执行，不阻塞事件循环）
+            figures = await self._run_http_async(self._download_figures_from_page, pmcid, images_dir)
+        
+        # 需要截图时才启动浏览器；浏览器截图的并发数由浏览器上下文池的大小限制
+        if not figures and await self._ensure_browser_async():
+            figures = await self._fetch_figures_via_browser_async(pmcid, images_dir)
+        
+        if figures:
+            # 只缓存已保存到本地的图片，仅有URL的结果下次仍重新获取
+            self._save_cached_figures(pmcid, figures)
+            return figures, None
+        
+        # 回退到只获取URL信息
+        url_info = await self._run_http_async(self._get_figure_urls_from_page, pmcid)
+        if url_info:
+            return url_info, '图片URL已获取（可在浏览器中查看）'
+        return [], '无法获取图片信息'
+    
+    async def _run_http_async(self, func, *args):
+        """在HTTP线程池中执行同步请求函数并等待结果"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._http_executor, func, *args)
+    
+    async def _capture_figure_async(self, fig_elem, fig_id: str, caption: str, pmcid: str,
+                                    pmc_url: str, output_dir: str) -> Optional[Dict]:
+        """
+        截取单个figure元素
+        
+        Args:
+            fig_elem: figure元素句柄
+            fig_id: figure ID
+            caption: figure标题
+            pmcid: PMC ID
+            pmc_url: 文章页面URL
+            output_dir: 图片输出目录
+            
+        Returns:
+            Dict: 图片信息，失败返回None
+        """
+        try:
+            # 截图保存为JPEG（比PNG小数倍、编码更快；截图时会自动滚动到元素位置）
+            screenshot_filename = f"{pmcid}_{fig_id}.jpg"
+            screenshot_path = os.path.join(output_dir, screenshot_filename)
+            await fig_elem.screenshot(path=screenshot_path, type='jpeg', quality=_SCREENSHOT_QUALITY,
+                                      timeout=self.timeout * 1000)
+            return self._screenshot_result(screenshot_path, fig_id, caption, pmc_url)
+        except Exception as e:
+            self.logger.warning(f"截图失败 {pmcid}/{fig_id}: {str(e)}")
+        return None
+    
+    def _crop_figures(self, full_page: bytes, infos: List[Dict], pmcid: str,
+                      pmc_url: str, output_dir: str) -> List[Optional[Dict]]:
+        """
+        从整页截图中按位置裁剪各figure并保存为JPEG（在线程中调用）
+        
+        Args:
+            full_page: 整页截图（PNG）
+            infos: _FIGURE_INFO_JS 返回的figure信息（ID、caption、页面坐标）
+            pmcid: PMC ID
+            pmc_url: 文章页面URL
+            output_dir: 图片输出目录
+            
+        Returns:
+            List[Optional[Dict]]: 与 infos 一一对应的图片信息，失败为None
+        """
+        results = []
+        with Image.open(io.BytesIO(full_page)) as image:
+            image = image.convert('RGB')
+            for info in infos:
+                fig_id = info['id']
+                box = (
+                    max(0, round(info['x'])),
+                    max(0, round(info['y'])),
+                    min(image.width, round(info['x'] + info['width'])),
+                    min(image.height, round(info['y'] + info['height']))
+                )
+                if box[2] <= box[0] or box[3] <= box[1]:
+                    results.append(None)
+                    continue
+                try:
+                    screenshot_path = os.path.join(output_dir, f"{pmcid}_{fig_id}.jpg")
+                    image.crop(box).save(screenshot_path, 'JPEG', quality=_SCREENSHOT_QUALITY)
+                    results.append(self._screenshot_result(screenshot_path, fig_id, info['caption'], pmc_url))
+                except Exception as e:
+                    self.logger.warning(f"截图失败 {pmcid}/{fig_id}: {str(e)}")
+                    results.append(None)
+        return results
+    
+    @staticmethod
+    def _screenshot_result(screenshot_path: str, fig_id: str, caption: str, pmc_url: str) -> Optional[Dict]:
+        """检查截图文件是否有效，有效时返回图片信息，无效时删除文件并返回None"""
+        # 一次stat同时判断存在和大小
+        try:
+            valid = os.stat(screenshot_path).st_size > 1000
+        except FileNotFoundError:
+            valid = False
+        if valid:
+            return {
+                'figure_id': fig_id,
+                'caption': caption,
+                'local_path': f"images/{os.path.basename(screenshot_path)}",
+                'original_url': f"{pmc_url}#{fig_id}",
+                'is_original': True,
+                'method': 'browser_screenshot'
+            }
+        # 截图失败，删除无效文件
+        try:
+            os.remove(screenshot_path)
+        except FileNotFoundError:
+            pass
+        return None
+    
+    def _save_cached_figures(self, pmcid: str, figures: List[Dict]) -> None:
+        """记录图片结果到缓存，并立即追加写入缓存文件"""
+        self._figure_cache[pmcid] = figures
+        if self._figure_cache_file:
+            try:
+                self._file_manager.append_jsonl(self._figure_cache_file, {'pmcid': pmcid, 'figures': figures})
+            except OSError as e:
+                self.logger.warning(f"图片缓存写入失败: {str(e)}")
+    
+    def _get_cached_figures(self, pmcid: str, images_dir: str) -> Optional[List[Dict]]:
+        """返回缓存的图片列表；未缓存或本地图片文件已被删除时返回None"""
+        figures = self._figure_cache.get(pmcid)
+        if not figures:
+            return None
+        step3_dir = os.path.dirname(images_dir)
+        for fig in figures:
+            local_path = fig.get('local_path')
+            if not local_path or not os.path.exists(os.path.join(step3_dir, local_path)):
+                return None
+        return figures
+    
     async def _fetch_figures_via_browser_async(self, pmcid: str, output_dir: str) -> List[Dict]:
         """
         异步使用浏览器截图获取论文图片
@@ -270,136 +725,275 @@ class PMCFigureFetcher:
         if not self._browser:
             return []
         
+        # 从池中取出一个浏览器上下文（池空时等待其他论文用完），用完放回
+        context = await self._context_pool.get()
+        try:
+            figures = await self._capture_page_figures_async(context, pmcid, output_dir)
+        finally:
+            self._context_pool.put_nowait(context)
+        
+        if figures is None:
+            # 禁用脚本时页面中没有figure元素，可能需要脚本渲染，启用JavaScript后重试一次
+            js_context = await self._get_js_context_async()
+            figures = await self._capture_page_figures_async(js_context, pmcid, output_dir)
+        
+        return figures or []
+    
+    async def _capture_page_figures_async(self, context, pmcid: str, output_dir: str) -> Optional[List[Dict]]:
+        """
+        在给定上下文中打开PMC文章页面并截取figure元素
+        
+        Returns:
+            Optional[List[Dict]]: 图片信息列表；页面中没有找到figure元素时返回None
+        """
         figures = []
         pmc_url = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/"
         
+        page = None
         try:
-            # 创建新页面
-            page = await self._browser.new_page()
-            await page.set_viewport_size({"width": 1200, "height": 800})
+            # 在复用的上下文中创建新页面（视口大小已在上下文中设置）
+            page = await context.new_page()
             
-            # 访问PMC文章页面
-            await page.goto(pmc_url, timeout=self.timeout * 1000)
+            # 访问PMC文章页面，DOM解析完成即可（不等待load事件，图片加载由下面的脚本单独等待）；
+            # 页面导航同样计入NCBI请求速率，并发数已由上下文池限制
+            await self._ncbi_throttle.wait_async()
+            await page.goto(pmc_url, wait_until="domcontentloaded")
             
-            # 等待页面加载完成
-            await page.wait_for_load_state("networkidle", timeout=self.timeout * 1000)
+            # 只需要figure元素，出现即可继续；超时说明页面没有figure，按下面的选择器结果处理
+            try:
+                await page.wait_for_selector(_FIGURE_SELECTOR)
+            except PlaywrightTimeout:
+                pass
             
             # 查找所有figure元素
-            figure_elements = await page.query_selector_all('figure.fig, div.fig')
+            figure_elements = await page.query_selector_all(_BROWSER_FIGURE_SELECTOR)
             
             if not figure_elements:
                 # 尝试其他选择器
-                figure_elements = await page.query_selector_all('[id^="fig"], [id^="F"], .figure')
+                figure_elements = await page.query_selector_all(_BROWSER_FIGURE_FALLBACK_SELECTOR)
+            
+            if not figure_elements:
+                return None
             
             self.logger.info(f"{pmcid}: 找到 {len(figure_elements)} 个图片元素")
             
-            for i, fig_elem in enumerate(figure_elements[:self.max_figures]):
-                try:
-                    # 获取figure ID
-                    fig_id = await fig_elem.get_attribute('id') or f"fig{i+1}"
-                    
-                    # 获取caption
-                    caption = ""
-                    caption_elem = await fig_elem.query_selector('figcaption, .caption, .fig-caption')
-                    if caption_elem:
-                        caption_text = await caption_elem.inner_text()
-                        caption = caption_text[:500] if caption_text else ""
-                    
-                    # 滚动到元素位置
-                    await fig_elem.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.5)  # 等待图片加载
-                    
-                    # 截图保存
-                    screenshot_filename = f"{pmcid}_{fig_id}.png"
-                    screenshot_path = os.path.join(output_dir, screenshot_filename)
-                    
-                    # 截取figure元素
-                    await fig_elem.screenshot(path=screenshot_path)
-                    
-                    # 检查截图文件是否有效
-                    if os.path.exists(screenshot_path) and os.path.getsize(screenshot_path) > 1000:
-                        figures.append({
-                            'figure_id': fig_id,
-                            'caption': caption,
-                            'local_path': f"images/{screenshot_filename}",
-                            'original_url': f"{pmc_url}#{fig_id}",
-                            'is_original': True,
-                            'method': 'browser_screenshot'
-                        })
-                    else:
-                        # 截图失败，删除无效文件
-                        if os.path.exists(screenshot_path):
-                            os.remove(screenshot_path)
-                            
-                except Exception as e:
-                    self.logger.warning(f"截图失败 {pmcid}/{fig_id}: {str(e)}")
-                    continue
+            targets = figure_elements[:self.max_figures]
+            
+            # 滚动到页面底部触发懒加载，并一次性等待所有目标图片加载完成（代替逐张滚动后固定等待）
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            try:
+                await asyncio.wait_for(page.evaluate(_WAIT_FIGURE_IMAGES_JS, targets), timeout=5)
+            except Exception:
+                # 等待超时或失败时按当前渲染状态截图
+                pass
+            
+            infos = await page.evaluate(_FIGURE_INFO_JS, {'figs': targets, 'captionSelector': _CAPTION_SELECTOR})
             
-            await page.close()
+            for i, info in enumerate(infos):
+                info['id'] = info['id'] or f"fig{i+1}"
+                info['caption'] = (info['caption'] or '')[:500]
+            
+            if PIL_AVAILABLE and max(info['y'] + info['height'] for info in infos) <= _MAX_FULL_PAGE_HEIGHT:
+                # 整页只截图一次，在线程中按各figure的位置裁剪保存（避免逐个元素滚动、重新布局）
+                full_page = await page.screenshot(full_page=True, type='png', timeout=self.timeout * 1000)
+                results = await asyncio.to_thread(
+                    self._crop_figures, full_page, infos, pmcid, pmc_url, output_dir
+                )
+            else:
+                results = await asyncio.gather(*(
+                    self._capture_figure_async(fig_elem, info['id'], info['caption'], pmcid, pmc_url, output_dir)
+                    for fig_elem, info in zip(targets, infos)
+                ))
+            figures = [fig for fig in results if fig]
             
         except PlaywrightTimeout:
             self.logger.warning(f"页面加载超时: {pmcid}")
         except Exception as e:
             self.logger.warning(f"浏览器获取 {pmcid} 图片失败: {str(e)}")
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
         
         return figures
     
-    def _get_figure_urls_from_page(self, pmcid: str) -> List[Dict]:
+    def _parse_page_figures(self, pmcid: str) -> List[Dict]:
         """
-        从PMC页面获取图片URL和caption信息（不下载）
+        请求PMC文章页面HTML，解析图片URL和caption
+        
+        在线程中调用（不阻塞事件循环）；超时、连接错误和5xx会重试，4xx直接失败。
+        解析结果在本次运行内按PMCID保留，直接下载失败后获取URL信息时不再重复请求页面
         
         Args:
             pmcid: PMC ID
             
         Returns:
-            List[Dict]: 图片信息列表
+            List[Dict]: [{'figure_id': ..., 'caption': ..., 'img_url': ...}]，请求失败时抛出异常
         """
-        figures = []
-        pmc_url = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/"
+        if pmcid in self._parsed_pages:
+            return self._parsed_pages[pmcid]
         
-        try:
-            # 尝试获取页面HTML
-            response = requests.get(pmc_url, headers=self.headers, timeout=self.timeout, verify=False)
+        pmc_url = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/"
+        for attempt in range(self.retry_attempts):
+            try:
+                with self._ncbi_throttle:
+                    response = self.http.get(pmc_url, headers=self.headers, timeout=self.timeout, verify=False)
+            except requests.RequestException:
+                if attempt < self.retry_attempts - 1:
+                    time.sleep(self.retry_delay)
+                    continue
+                raise
+            if response.status_code >= 500 and attempt < self.retry_attempts - 1:
+                time.sleep(self.retry_delay)
+                continue
             response.raise_for_status()
+            break
+        
+        if LXML_AVAILABLE:
+            page_figures = self._select_figures_lxml(response.content)
+        else:
+            page_figures = self._select_figures_bs4(response.text)
+        
+        parsed = []
+        for i, (fig_id, img_url, caption) in enumerate(page_figures):
+            fig_id = fig_id or f'fig{i+1}'
+            if img_url and not img_url.startswith('http'):
+                img_url = f"https://www.ncbi.nlm.nih.gov{img_url}"
+            caption = caption[:500]
             
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.text, 'html.parser')
+            if img_url or caption:
+                parsed.append({'figure_id': fig_id, 'caption': caption, 'img_url': img_url})
+        
+        self._parsed_pages[pmcid] = parsed
+        return parsed
+    
+    def _select_figures_lxml(self, content: bytes) -> List[tuple]:
+        """用lxml解析页面，返回前 max_figures 个figure的 (id, 图片地址, caption)"""
+        doc = lxml_html.fromstring(content)
+        results = []
+        for fig_elem in _FIGURE_XPATH(doc)[:self.max_figures]:
+            img_url = ""
+            img_elems = _IMG_XPATH(fig_elem)
+            if img_elems:
+                img_url = img_elems[0].get('src', '') or img_elems[0].get('data-src', '')
+            caption = ""
+            caption_elems = _CAPTION_XPATH(fig_elem)
+            if caption_elems:
+                # 与 BeautifulSoup 的 get_text(strip=True) 一致：各段文本去空白后直接拼接
+                caption = ''.join(text.strip() for text in caption_elems[0].itertext())
+            results.append((fig_elem.get('id'), img_url, caption))
+        return results
+    
+    def _select_figures_bs4(self, text: str) -> List[tuple]:
+        """未安装lxml时用BeautifulSoup解析页面，返回值同 _select_figures_lxml"""
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(text, 'html.parser')
+        results = []
+        for fig_elem in soup.select(_FIGURE_SELECTOR, limit=self.max_figures):
+            img_url = ""
+            img_elem = fig_elem.select_one('img')
+            if img_elem:
+                img_url = img_elem.get('src', '') or img_elem.get('data-src', '')
+            caption = ""
+            caption_elem = fig_elem.select_one(_CAPTION_SELECTOR)
+            if caption_elem:
+                caption = caption_elem.get_text(strip=True)
+            results.append((fig_elem.get('id'), img_url, caption))
+        return results
+    
+    def _download_figures_from_page(self, pmcid: str, output_dir: str) -> List[Dict]:
+        """
+        不使用浏览器：从PMC页面HTML解析图片地址并直接下载原图
+        
+        只有页面中的图片全部下载成功才返回结果，否则删除本次已写入的图片并返回空列表，由调用方改用浏览器截图
+        
+        Args:
+            pmcid: PMC ID
+            output_dir: 图片输出目录
             
-            # 查找figure元素
-            figure_elements = soup.select('figure.fig, div.fig, [id^="fig"], [id^="F"]')
+        Returns:
+            List[Dict]: 图片信息列表
+        """
+        pmc_url = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/"
+        figures = []
+        written = []
+        complete = False
+        
+        try:
+            parsed = self._parse_page_figures(pmcid)
+            if not parsed or not all(fig['img_url'] for fig in parsed):
+                return []
             
-            for i, fig_elem in enumerate(figure_elements[:self.max_figures]):
-                fig_id = fig_elem.get('id', f'fig{i+1}')
+            for fig in parsed:
+                throttle = self._ncbi_throttle if 'ncbi.nlm.nih.gov' in fig['img_url'] else nullcontext()
+                with throttle:
+                    response = self.http.get(fig['img_url'], headers=self.headers, timeout=self.timeout, verify=False)
+                content_type = response.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+                if response.status_code != 200 or not content_type.startswith('image/') or len(response.content) <= 1000:
+                    # 原图被拒绝访问（如403）或不是图片，改用浏览器截图
+                    return []
                 
-                # 获取图片URL
-                img_elem = fig_elem.select_one('img')
-                img_url = ""
-                if img_elem:
-                    img_url = img_elem.get('src', '') or img_elem.get('data-src', '')
-                    if img_url and not img_url.startswith('http'):
-                        img_url = f"https://www.ncbi.nlm.nih.gov{img_url}"
+                ext = _IMAGE_EXTENSIONS.get(content_type, '.jpg')
+                filename = f"{pmcid}_{fig['figure_id']}{ext}"
+                file_path = os.path.join(output_dir, filename)
+                written.append(file_path)
+                with open(file_path, 'wb') as f:
+                    f.write(response.content)
                 
-                # 获取caption
-                caption = ""
-                caption_elem = fig_elem.select_one('figcaption, .caption, .fig-caption')
-                if caption_elem:
-                    caption = caption_elem.get_text(strip=True)[:500]
-                
-                if img_url or caption:
-                    figures.append({
-                        'figure_id': fig_id,
-                        'caption': caption,
-                        'local_path': None,
-                        'original_url': img_url or f"{pmc_url}#{fig_id}",
-                        'is_original': True,
-                        'download_failed': True
-                    })
+                figures.append({
+                    'figure_id': fig['figure_id'],
+                    'caption': fig['caption'],
+                    'local_path': f"images/{filename}",
+                    'original_url': fig['img_url'],
+                    'is_original': True,
+                    'method': 'direct_download'
+                })
+            complete = True
+        except Exception as e:
+            self.logger.warning(f"直接下载 {pmcid} 图片失败，改用浏览器截图: {str(e)}")
+            return []
+        finally:
+            if not complete:
+                # 只下载了部分图片：删除已写入的文件，不留下不在结果中的图片
+                for file_path in written:
+                    try:
+                        os.remove(file_path)
+                    except OSError:
+                        pass
+        
+        self.logger.info(f"{pmcid}: 直接下载 {len(figures)} 张原图（{pmc_url}）")
+        return figures
+    
+    def _get_figure_urls_from_page(self, pmcid: str) -> List[Dict]:
+        """
+        从PMC页面获取图片URL和caption信息（不下载）
+        
+        Args:
+            pmcid: PMC ID
+            
+        Returns:
+            List[Dict]: 图片信息列表
+        """
+        figures = []
+        pmc_url = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/"
+        
+        try:
+            for fig in self._parse_page_figures(pmcid):
+                figures.append({
+                    'figure_id': fig['figure_id'],
+                    'caption': fig['caption'],
+                    'local_path': None,
+                    'original_url': fig['img_url'] or f"{pmc_url}#{fig['figure_id']}",
+                    'is_original': True,
+                    'download_failed': True
+                })
                     
         except Exception as e:
             self.logger.warning(f"获取 {pmcid} 页面信息失败: {str(e)}")
         
         return figures
-    
 
 
 def main(project_path: str) -> bool:
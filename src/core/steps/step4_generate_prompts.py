@@ -4,14 +4,37 @@
 """
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+# 项目根目录（直接运行本文件时加入 sys.path，已存在时不重复添加）
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.utils.config import Config
 from src.utils.logger import Logger
 from src.utils.file_manager import FileManager
+from src.utils.prompt_template import PromptTemplate, read_template
+from src.utils.paper_utils import format_authors, list_fulltext_files
+
+# 全文文件读取、Prompt文件写入的缓冲区大小
+_READ_BUFFER_SIZE = 1 << 20
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# 合并输出时所有Prompt写入的文件（每行一个 {"pmid": ..., "prompt": ...}）
+PROMPTS_BUNDLE_FILE = 'prompts.jsonl'
+
+# 图片说明在Prompt中保留的最大字符数
+_CAPTION_MAX_CHARS = 300
+
+# 单张图片在Prompt中的信息块
+_FIGURE_INFO_TEMPLATE = """
+### 图片 {index}: {fig_id} {status}
+- **说明**: {caption}
+- **类型**: {fig_type}
+"""
 
 
 class PromptGenerator:
@@ -22,20 +45,22 @@ class PromptGenerator:
         # 加载模板
         template_path = config.get('prompt', 'single_template', 'config/templates/prompt_single.txt')
         self.template = self._load_template(template_path)
+        self._prompt_template = PromptTemplate(self.template)
+        # 为True时所有Prompt写入同一个 prompts.jsonl，不再每篇论文单独写一个文件
+        self.bundle_prompts = config.get_boolean('prompt', 'bundle_prompts', False)
     
     def _load_template(self, template_path: str) -> str:
         """加载Prompt模板"""
         # 尝试多个路径
         paths_to_try = [
             template_path,
-            os.path.join(os.path.dirname(__file__), '../../..', template_path),
-            os.path.join(os.path.dirname(__file__), '../../../config/templates/prompt_single.txt'),
+            os.path.join(_PROJECT_ROOT, template_path),
+            os.path.join(_PROJECT_ROOT, 'config', 'templates', 'prompt_single.txt'),
         ]
         
-        for path in paths_to_try:
-            if os.path.exists(path):
-                with open(path, 'r', encoding='utf-8') as f:
-                    return f.read()
+        template = read_template(paths_to_try)
+        if template is not None:
+            return template
         
         # 使用默认模板
         self.logger.warning("未找到模板文件，使用默认模板")
@@ -98,6 +123,7 @@ class PromptGenerator:
             Dict: 生成结果
         """
         self.logger.info("开始生成单篇论文Prompt")
+        generate_time = datetime.now().isoformat()
         
         try:
             file_manager = FileManager(self.config, self.logger)
@@ -105,7 +131,7 @@ class PromptGenerator:
             # 加载论文详情
             step2_dir = file_manager.get_step_directory(project_path, 'step2_details')
             details_file = os.path.join(step2_dir, 'papers_details.json')
-            details_data = file_manager.load_json(details_file)
+            details_data = file_manager.load_json(details_file, cached=True)
             papers = details_data.get('papers', [])
             
             # 加载图片信息
@@ -113,49 +139,76 @@ class PromptGenerator:
             figures_file = os.path.join(step3_dir, 'figures_info.json')
             figures_data = {}
             if os.path.exists(figures_file):
-                figures_data = file_manager.load_json(figures_file)
+                figures_data = file_manager.load_json(figures_file, cached=True)
             
             # 构建PMID到图片的映射
-            figures_map = {}
-            for paper_fig in figures_data.get('papers', []):
-                pmid = paper_fig.get('pmid')
-                if pmid:
-                    figures_map[pmid] = paper_fig.get('figures', [])
+            figures_map = {
+                paper_fig['pmid']: paper_fig.get('figures', [])
+                for paper_fig in figures_data.get('papers', [])
+                if paper_fig.get('pmid')
+            }
+            
+            # 一次列出存在的全文文件，代替逐篇检查
+            available_fulltexts = list_fulltext_files(step2_dir, papers)
             
             # 获取输出目录
             step4_dir = file_manager.get_step_directory(project_path, 'step4_prompts')
             
-            # 为每篇论文生成Prompt
-            prompts = []
-            for i, paper in enumerate(papers):
+            bundle_path = os.path.join(step4_dir, PROMPTS_BUNDLE_FILE)
+            bundle = None
+            if self.bundle_prompts:
+                # 删除之前单独输出的Prompt文件，避免与本次合并输出的文件不一致
+                with os.scandir(step4_dir) as entries:
+                    for entry in entries:
+                        if entry.name.startswith('prompt_') and entry.name.endswith('.txt') and entry.is_file():
+                            os.remove(entry.path)
+                bundle = open(bundle_path, 'wb', buffering=_WRITE_BUFFER_SIZE)
+            elif os.path.exists(bundle_path):
+                # 删除之前合并输出的文件，避免与本次的单独文件不一致
+                os.remove(bundle_path)
+            
+            def build_prompt(paper: Dict) -> Dict:
+                """生成单篇论文的Prompt（在线程池中执行：读取全文、填充模板、写单独文件）"""
                 pmid = paper['pmid']
-                self.logger.progress(i + 1, len(papers), f"生成Prompt: {pmid}")
                 
                 # 获取该论文的图片
                 paper_figures = figures_map.get(pmid, [])
                 
                 # 生成Prompt
-                prompt = self._generate_single_prompt(paper, paper_figures, project_path)
+                prompt = self._generate_single_prompt(paper, paper_figures, project_path, available_fulltexts)
                 
-                prompt_info = {
+                if bundle is None:
+                    # 保存单独的Prompt文件
+                    prompt_file = os.path.join(step4_dir, f'prompt_{pmid}.txt')
+                    with open(prompt_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+                        f.write(prompt)
+                
+                return {
                     'pmid': pmid,
                     'title': paper.get('title', ''),
                     'prompt': prompt,
                     'has_figures': len(paper_figures) > 0,
                     'figure_count': len(paper_figures)
                 }
-                prompts.append(prompt_info)
-                
-                # 保存单独的Prompt文件
-                prompt_file = os.path.join(step4_dir, f'prompt_{pmid}.txt')
-                with open(prompt_file, 'w', encoding='utf-8') as f:
-                    f.write(prompt)
+            
+            # 为每篇论文生成Prompt：各论文互不依赖，以文件读写为主，多线程并行；结果按原顺序取回
+            prompts = []
+            try:
+                with ThreadPoolExecutor() as executor:
+                    for i, prompt_info in enumerate(executor.map(build_prompt, papers)):
+                        self.logger.progress(i + 1, len(papers), f"生成Prompt: {prompt_info['pmid']}")
+                        prompts.append(prompt_info)
+                        if bundle is not None:
+                            file_manager.write_jsonl(bundle, {'pmid': prompt_info['pmid'], 'prompt': prompt_info['prompt']})
+            finally:
+                if bundle is not None:
+                    bundle.close()
             
             print()  # 换行
             
             result = {
                 'success': True,
-                'generate_time': datetime.now().isoformat(),
+                'generate_time': generate_time,
                 'prompts': prompts,
                 'stats': {
                     'total_prompts': len(prompts),
@@ -172,16 +225,18 @@ class PromptGenerator:
             return {
                 'success': False,
                 'error': str(e),
-                'generate_time': datetime.now().isoformat()
+                'generate_time': generate_time
             }
     
-    def _get_paper_content(self, paper: Dict, project_path: str) -> Dict:
+    def _get_paper_content(self, paper: Dict, project_path: str,
+                           available_fulltexts: Optional[Set[str]] = None) -> Dict:
         """
         获取论文内容（优先全文，降级到摘要）
         
         Args:
             paper: 论文信息
             project_path: 项目路径
+            available_fulltexts: 存在的全文文件（list_fulltext_files 的结果），None 时单独检查
             
         Returns:
             Dict: {'source': 'fulltext'/'abstract', 'text': '...', 'note': '...'}
@@ -192,11 +247,18 @@ class PromptGenerator:
         # 尝试读取全文
         if fulltext_status == 'success' and fulltext_path:
             full_path = os.path.join(project_path, 'step2_details', fulltext_path)
-            if os.path.exists(full_path):
+            if available_fulltexts is None:
+                exists = os.path.exists(full_path)
+            else:
+                exists = fulltext_path in available_fulltexts
+            if exists:
                 try:
-                    with open(full_path, 'r', encoding='utf-8') as f:
+                    with open(full_path, 'r', encoding='utf-8', buffering=_READ_BUFFER_SIZE) as f:
                         fulltext = f.read()
-                    word_count = paper.get('fulltext_word_count', len(fulltext.split()))
+                    # Step 2 已记录词数时不再对全文分词
+                    word_count = paper.get('fulltext_word_count')
+                    if word_count is None:
+                        word_count = len(fulltext.split())
                     return {
                         'source': 'fulltext',
                         'text': fulltext,
@@ -223,7 +285,8 @@ class PromptGenerator:
             'note': note
         }
     
-    def _generate_single_prompt(self, paper: Dict, figures: List[Dict], project_path: str) -> str:
+    def _generate_single_prompt(self, paper: Dict, figures: List[Dict], project_path: str,
+                                available_fulltexts: Optional[Set[str]] = None) -> str:
         """
         生成单篇论文的Prompt
         
@@ -231,27 +294,22 @@ class PromptGenerator:
             paper: 论文信息
             figures: 图片信息列表
             project_path: 项目路径
+            available_fulltexts: 存在的全文文件，见 _get_paper_content
             
         Returns:
             str: 生成的Prompt
         """
         # 格式化作者列表
-        authors = paper.get('authors', [])
-        if isinstance(authors, list):
-            authors_str = ', '.join(authors[:5])
-            if len(authors) > 5:
-                authors_str += f' 等（共{len(authors)}位作者）'
-        else:
-            authors_str = str(authors)
+        authors_str = format_authors(paper)
         
         # 格式化图片信息
-        figure_info = self._format_figure_info(figures, project_path)
+        figure_info = self._format_figure_info(figures)
         
         # 获取论文内容（全文或摘要）
-        content_data = self._get_paper_content(paper, project_path)
+        content_data = self._get_paper_content(paper, project_path, available_fulltexts)
         
         # 填充模板
-        prompt = self.template.format(
+        prompt = self._prompt_template.format(
             title=paper.get('title', '未知标题'),
             authors=authors_str,
             journal=paper.get('journal', '未知期刊'),
@@ -265,13 +323,12 @@ class PromptGenerator:
         
         return prompt
     
-    def _format_figure_info(self, figures: List[Dict], project_path: str) -> str:
+    def _format_figure_info(self, figures: List[Dict]) -> str:
         """
         格式化图片信息
         
         Args:
             figures: 图片信息列表
-            project_path: 项目路径
             
         Returns:
             str: 格式化后的图片信息
@@ -283,22 +340,17 @@ class PromptGenerator:
         for i, fig in enumerate(figures, 1):
             fig_id = fig.get('figure_id', f'图{i}')
             caption = fig.get('caption', '无说明')
-            local_path = fig.get('local_path')
+            if len(caption) > _CAPTION_MAX_CHARS:
+                caption = caption[:_CAPTION_MAX_CHARS] + '...'
             is_original = fig.get('is_original', True)
             
             # 状态标记
-            if local_path:
-                status = "[原图已下载]"
-                # 构建完整路径供参考
-                full_path = os.path.join(project_path, 'step3_figures', local_path)
-            else:
-                status = "[原图URL]"
+            status = "[原图已下载]" if fig.get('local_path') else "[原图URL]"
             
-            info_parts.append(f"""
-### 图片 {i}: {fig_id} {status}
-- **说明**: {caption[:300]}{'...' if len(caption) > 300 else ''}
-- **类型**: {'论文原图' if is_original else '示意图'}
-""")
+            info_parts.append(_FIGURE_INFO_TEMPLATE.format(
+                index=i, fig_id=fig_id, status=status, caption=caption,
+                fig_type='论文原图' if is_original else '示意图'
+            ))
         
         return "\n".join(info_parts)
 
@@ -4,14 +4,57 @@
 """
 import os
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+# 项目根目录（直接运行本文件时加入 sys.path，已存在时不重复添加）
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.utils.config import Config
 from src.utils.logger import Logger
 from src.utils.file_manager import FileManager
+from src.utils.prompt_template import PromptTemplate, read_template
+from src.utils.paper_utils import list_fulltext_files
+
+# 全文文件读取、Prompt文件写入的缓冲区大小
+_IO_BUFFER_SIZE = 1 << 20
+
+# 生成合并Prompt时最多预先读取的论文数（已读取、尚未写入文件的论文内容不超过这个数量）
+_CONTENT_PREFETCH = 16
+
+# 图片说明预览的最大字符数
+_CAPTION_PREVIEW_CHARS = 200
+
+
+def _read_first_words(path: str, max_words: int) -> List[str]:
+    """
+    逐块读取文本文件，只取前 max_words 个词（按空白分词，与 str.split() 一致），取够即停止读取
+    
+    Args:
+        path: 文本文件路径
+        max_words: 最多读取的词数
+        
+    Returns:
+        List[str]: 前 max_words 个词
+    """
+    words = []
+    tail = ''
+    with open(path, 'r', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as f:
+        while len(words) < max_words:
+            chunk = f.read(_IO_BUFFER_SIZE)
+            if not chunk:
+                if tail:
+                    words.append(tail)
+                break
+            chunk_words = (tail + chunk).split()
+            # 块末尾的词可能被截断，留到和下一块拼接
+            tail = chunk_words.pop() if chunk_words and not chunk[-1].isspace() else ''
+            words.extend(chunk_words)
+    return words[:max_words]
 
 
 class MergedPromptGenerator:
@@ -21,20 +64,20 @@ class MergedPromptGenerator:
         
         template_path = config.get('prompt', 'merged_template', 'config/templates/prompt_merged.txt')
         self.template = self._load_template(template_path)
+        self._prompt_template = PromptTemplate(self.template)
         self.max_words_per_paper = config.get_int('prompt', 'max_words_per_paper', 8000)
     
     def _load_template(self, template_path: str) -> str:
         """加载Prompt模板"""
         paths_to_try = [
             template_path,
-            os.path.join(os.path.dirname(__file__), '../../..', template_path),
-            os.path.join(os.path.dirname(__file__), '../../../config/templates/prompt_merged.txt'),
+            os.path.join(_PROJECT_ROOT, template_path),
+            os.path.join(_PROJECT_ROOT, 'config', 'templates', 'prompt_merged.txt'),
         ]
         
-        for path in paths_to_try:
-            if os.path.exists(path):
-                with open(path, 'r', encoding='utf-8') as f:
-                    return f.read()
+        template = read_template(paths_to_try)
+        if template is not None:
+            return template
         
         self.logger.warning("未找到模板文件，使用默认模板")
         return self._get_default_template()
@@ -78,47 +121,56 @@ class MergedPromptGenerator:
 ```
 """
     
-    def _get_paper_content(self, paper: Dict, project_path: str) -> Dict:
+    def _resolve_fulltext_path(self, paper: Dict, project_path: str,
+                               available_fulltexts: Set[str]) -> Optional[str]:
+        """返回论文全文文件的路径，没有可用全文时返回None（available_fulltexts 为 list_fulltext_files 的结果）"""
+        if paper.get('fulltext_status', '') == 'success' and paper.get('fulltext_path'):
+            if paper['fulltext_path'] in available_fulltexts:
+                return os.path.join(project_path, 'step2_details', paper['fulltext_path'])
+        return None
+    
+    def _get_paper_content(self, paper: Dict, full_path: Optional[str]) -> Dict:
         """
         获取论文内容（优先全文，降级到摘要）
         
         Args:
             paper: 论文信息
-            project_path: 项目路径
+            full_path: 全文文件路径（_resolve_fulltext_path 的结果），None 表示使用摘要
             
         Returns:
             Dict: {'source': 'fulltext'/'abstract', 'text': '...', 'word_count': int}
         """
-        fulltext_status = paper.get('fulltext_status', '')
-        fulltext_path = paper.get('fulltext_path')
-        
-        if fulltext_status == 'success' and fulltext_path:
-            full_path = os.path.join(project_path, 'step2_details', fulltext_path)
-            if os.path.exists(full_path):
-                try:
-                    with open(full_path, 'r', encoding='utf-8') as f:
+        if full_path:
+            try:
+                # Step 2 记录的词数即全文文件的词数；已知超出上限时只读取需要的部分
+                word_count = paper.get('fulltext_word_count')
+                if word_count is not None and word_count > self.max_words_per_paper:
+                    words = _read_first_words(full_path, self.max_words_per_paper)
+                    fulltext = None
+                else:
+                    with open(full_path, 'r', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as f:
                         fulltext = f.read()
-                    
-                    words = fulltext.split()
-                    word_count = len(words)
-                    
-                    if word_count > self.max_words_per_paper:
-                        truncated_text = ' '.join(words[:self.max_words_per_paper])
-                        return {
-                            'source': 'fulltext',
-                            'text': truncated_text,
-                            'word_count': word_count,
-                            'truncated': True
-                        }
-                    else:
-                        return {
-                            'source': 'fulltext',
-                            'text': fulltext,
-                            'word_count': word_count,
-                            'truncated': False
-                        }
-                except Exception:
-                    pass
+                    if word_count is None:
+                        words = fulltext.split()
+                        word_count = len(words)
+                
+                if word_count > self.max_words_per_paper:
+                    truncated_text = ' '.join(words[:self.max_words_per_paper])
+                    return {
+                        'source': 'fulltext',
+                        'text': truncated_text,
+                        'word_count': word_count,
+                        'truncated': True
+                    }
+                else:
+                    return {
+                        'source': 'fulltext',
+                        'text': fulltext,
+                        'word_count': word_count,
+                        'truncated': False
+                    }
+            except Exception:
+                pass
         
         abstract = paper.get('abstract', '摘要不可用')
         return {
@@ -128,6 +180,24 @@ class MergedPromptGenerator:
             'truncated': False
         }
     
+    def _iter_paper_contents(self, papers: List[Dict],
+                             fulltext_paths: List[Optional[str]]) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        在线程池中并行读取论文内容，按原顺序逐篇产出 (论文信息, 内容)
+        
+        最多提前读取 _CONTENT_PREFETCH 篇，已读取的内容不会随论文总数增长而堆积
+        """
+        with ThreadPoolExecutor() as executor:
+            pending = deque()
+            for paper, full_path in zip(papers, fulltext_paths):
+                pending.append((paper, executor.submit(self._get_paper_content, paper, full_path)))
+                if len(pending) >= _CONTENT_PREFETCH:
+                    done_paper, future = pending.popleft()
+                    yield done_paper, future.result()
+            while pending:
+                done_paper, future = pending.popleft()
+                yield done_paper, future.result()
+    
     def _format_figure_info(self, figures: List[Dict]) -> str:
         """格式化图片信息"""
         if not figures:
@@ -137,13 +207,14 @@ class MergedPromptGenerator:
         for i, fig in enumerate(figures, 1):
             fig_id = fig.get('figure_id', f'图{i}')
             caption = fig.get('caption', '无说明')
-            caption_preview = caption[:200] + '...' if len(caption) > 200 else caption
-            info_parts.append(f"- {fig_id}: {caption_preview}")
+            if len(caption) > _CAPTION_PREVIEW_CHARS:
+                caption = caption[:_CAPTION_PREVIEW_CHARS] + '...'
+            info_parts.append(f"- {fig_id}: {caption}")
         
         return "\n".join(info_parts)
     
     def _generate_paper_section(self, paper: Dict, figures: List[Dict], 
-                                 index: int, project_path: str) -> str:
+                                 index: int, content_data: Dict) -> List[str]:
         """
         生成单篇论文的内容区块
         
@@ -151,10 +222,10 @@ class MergedPromptGenerator:
             paper: 论文信息
             figures: 图片信息列表
             index: 论文序号
-            project_path: 项目路径
+            content_data: _get_paper_content 的返回结果
             
         Returns:
-            str: 格式化的论文区块
+            List[str]: 格式化的论文区块片段（论文内容直接引用，不复制到新字符串中）
         """
         pmid = paper.get('pmid', '')
         title = paper.get('title', '未知标题')
@@ -169,8 +240,6 @@ class MergedPromptGenerator:
         else:
             author_str = str(authors)
         
-        content_data = self._get_paper_content(paper, project_path)
-        
         if content_data['source'] == 'fulltext':
             source_label = '[全文]'
             if content_data.get('truncated'):
@@ -180,7 +249,7 @@ class MergedPromptGenerator:
         
         figure_info = self._format_figure_info(figures)
         
-        section = f"""
+        header = f"""
 ### 论文 {index} (PMID: {pmid})
 - **标题**: {title}
 - **作者**: {author_str}
@@ -189,12 +258,62 @@ class MergedPromptGenerator:
 - **内容来源**: {source_label} (约{content_data['word_count']}词)
 
 **论文内容**:
-{content_data['text']}
+"""
+        footer = f"""
 
 **图片信息**:
 {figure_info}
 """
-        return section
+        return [header, content_data['text'], footer]
+    
+    def _write_prompt_file(self, prompt_file: str, papers: List[Dict], fulltext_paths: List[Optional[str]],
+                           figures_map: Dict[str, List[Dict]], search_query: str) -> Tuple[int, List[int]]:
+        """
+        按模板边生成边写入合并Prompt，不在内存中拼接完整的Prompt
+        
+        Args:
+            prompt_file: 输出文件路径
+            papers: 论文列表
+            fulltext_paths: 各论文的全文路径（_resolve_fulltext_path 的结果）
+            figures_map: {pmid: 图片信息列表}
+            search_query: 搜索主题
+            
+        Returns:
+            Tuple[int, List[int]]: (写入的字符数, 有全文路径但读取失败、改用摘要的论文序号)
+        """
+        fulltext_count = sum(1 for path in fulltext_paths if path)
+        abstract_count = len(papers) - fulltext_count
+        stats_header = f"**内容统计**: 共{len(papers)}篇论文，其中{fulltext_count}篇有全文，{abstract_count}篇仅有摘要\n"
+        failed_fulltexts = []
+        
+        def iter_papers_content() -> Iterator[str]:
+            """逐篇产出论文区块片段，写入文件后即可释放，内存中只保留少量论文的内容"""
+            yield stats_header
+            for i, (paper, content_data) in enumerate(self._iter_paper_contents(papers, fulltext_paths), 1):
+                pmid = paper.get('pmid', '')
+                self.logger.progress(i, len(papers), f"处理论文: {pmid}")
+                
+                if fulltext_paths[i - 1] and content_data['source'] != 'fulltext':
+                    failed_fulltexts.append(i - 1)
+                if i > 1:
+                    yield "\n"
+                yield from self._generate_paper_section(paper, figures_map.get(pmid, []), i, content_data)
+        
+        example_pmid = papers[0].get('pmid', 'PMID') if papers else 'PMID'
+        
+        prompt_char_count = 0
+        with open(prompt_file, 'w', encoding='utf-8', buffering=_IO_BUFFER_SIZE) as f:
+            for part in self._prompt_template.iter_parts(
+                paper_count=len(papers),
+                search_query=search_query,
+                papers_content=iter_papers_content(),
+                example_pmid=example_pmid
+            ):
+                f.write(part)
+                prompt_char_count += len(part)
+        
+        print()
+        return prompt_char_count, failed_fulltexts
     
     def generate_merged_prompt(self, project_path: str) -> Dict:
         """
@@ -207,82 +326,72 @@ class MergedPromptGenerator:
             Dict: 生成结果
         """
         self.logger.info("开始生成合并的综述分析Prompt")
+        generate_time = datetime.now().isoformat()
         
         try:
             file_manager = FileManager(self.config, self.logger)
             
             step1_dir = file_manager.get_step_directory(project_path, 'step1_search')
             search_file = os.path.join(step1_dir, 'search_results.json')
-            search_data = file_manager.load_json(search_file)
+            search_data = file_manager.load_json(search_file, cached=True)
             search_query = search_data.get('query', '未知主题')
             
             step2_dir = file_manager.get_step_directory(project_path, 'step2_details')
             details_file = os.path.join(step2_dir, 'papers_details.json')
-            details_data = file_manager.load_json(details_file)
+            details_data = file_manager.load_json(details_file, cached=True)
             papers = details_data.get('papers', [])
             
             step3_dir = file_manager.get_step_directory(project_path, 'step3_figures')
             figures_file = os.path.join(step3_dir, 'figures_info.json')
             figures_data = {}
             if os.path.exists(figures_file):
-                figures_data = file_manager.load_json(figures_file)
+                figures_data = file_manager.load_json(figures_file, cached=True)
             
-            figures_map = {}
-            for paper_fig in figures_data.get('papers', []):
-                pmid = paper_fig.get('pmid')
-                if pmid:
-                    figures_map[pmid] = paper_fig.get('figures', [])
+            figures_map = {
+                paper_fig['pmid']: paper_fig.get('figures', [])
+                for paper_fig in figures_data.get('papers', [])
+                if paper_fig.get('pmid')
+            }
             
-            paper_sections = []
-            papers_list = []
-            fulltext_count = 0
-            abstract_count = 0
+            # 先只判断各论文是否有可用全文（不读取内容），得到写在最前面的内容统计
+            available_fulltexts = list_fulltext_files(os.path.join(project_path, 'step2_details'), papers)
+            fulltext_paths = [
+                self._resolve_fulltext_path(paper, project_path, available_fulltexts) for paper in papers
+            ]
+            
+            step5_dir = file_manager.get_step_directory(project_path, 'step5_overview')
+            prompt_file = os.path.join(step5_dir, 'merged_prompt.txt')
+            
+            # 写入时有全文读取失败（改用了摘要）的论文：按摘要重新生成，使内容统计与实际内容一致
+            while True:
+                prompt_char_count, failed_fulltexts = self._write_prompt_file(
+                    prompt_file, papers, fulltext_paths, figures_map, search_query
+                )
+                if not failed_fulltexts:
+                    break
+                self.logger.warning(f"{len(failed_fulltexts)} 篇论文的全文读取失败，改用摘要重新生成Prompt")
+                for index in failed_fulltexts:
+                    fulltext_paths[index] = None
             
-            for i, paper in enumerate(papers, 1):
+            fulltext_count = sum(1 for path in fulltext_paths if path)
+            abstract_count = len(papers) - fulltext_count
+            
+            # 论文列表与Prompt内容的生成无关（模板中没有或有多处 {papers_content} 时也是每篇一条）
+            papers_list = []
+            for paper, full_path in zip(papers, fulltext_paths):
                 pmid = paper.get('pmid', '')
-                self.logger.progress(i, len(papers), f"处理论文: {pmid}")
-                
-                paper_figures = figures_map.get(pmid, [])
-                section = self._generate_paper_section(paper, paper_figures, i, project_path)
-                paper_sections.append(section)
-                
-                content_data = self._get_paper_content(paper, project_path)
-                if content_data['source'] == 'fulltext':
-                    fulltext_count += 1
-                else:
-                    abstract_count += 1
-                
                 papers_list.append({
                     'pmid': pmid,
                     'title': paper.get('title', ''),
                     'authors': paper.get('authors', []),
+                    'author_count': paper.get('author_count', len(paper.get('authors', []))),
                     'journal': paper.get('journal', ''),
                     'pub_date': paper.get('pub_date', ''),
                     'doi': paper.get('doi', ''),
-                    'has_fulltext': content_data['source'] == 'fulltext',
-                    'figure_count': len(paper_figures)
+                    'has_fulltext': full_path is not None,
+                    'figure_count': len(figures_map.get(pmid, []))
                 })
             
-            print()
-            
-            stats_header = f"**内容统计**: 共{len(papers)}篇论文，其中{fulltext_count}篇有全文，{abstract_count}篇仅有摘要\n"
-            papers_content = stats_header + "\n".join(paper_sections)
-            
-            example_pmid = papers[0].get('pmid', 'PMID') if papers else 'PMID'
-            
-            prompt = self.template.format(
-                paper_count=len(papers),
-                search_query=search_query,
-                papers_content=papers_content,
-                example_pmid=example_pmid
-            )
-            
-            step5_dir = file_manager.get_step_directory(project_path, 'step5_overview')
-            
-            prompt_file = os.path.join(step5_dir, 'merged_prompt.txt')
-            with open(prompt_file, 'w', encoding='utf-8') as f:
-                f.write(prompt)
-            
             papers_list_file = os.path.join(step5_dir, 'papers_list.json')
             file_manager.save_json(papers_list_file, {
                 'search_query': search_query,
@@ -292,20 +401,20 @@ class MergedPromptGenerator:
             
             result = {
                 'success': True,
-                'generate_time': datetime.now().isoformat(),
+                'generate_time': generate_time,
                 'search_query': search_query,
                 'paper_count': len(papers),
                 'fulltext_count': fulltext_count,
                 'abstract_count': abstract_count,
                 'prompt_file': prompt_file,
                 'papers_list_file': papers_list_file,
-                'prompt_char_count': len(prompt),
+                'prompt_char_count': prompt_char_count,
                 'next_step': '请将 merged_prompt.txt 的内容复制到LLM，获取JSON结果后保存到 step5_overview/llm_response.json'
             }
             
             self.logger.success(f"合并Prompt生成完成")
             self.logger.info(f"Prompt文件: {prompt_file}")
-            self.logger.info(f"字符数: {len(prompt)}")
+            self.logger.info(f"字符数: {prompt_char_count}")
             self.logger.info(f"下一步: 将prompt复制到LLM，结果保存到 llm_response.json")
             
             return result
@@ -317,7 +426,7 @@ class MergedPromptGenerator:
             return {
                 'success': False,
                 'error': str(e),
-                'generate_time': datetime.now().isoformat()
+                'generate_time': generate_time
             }
 
 
@@ -5,695 +5,136 @@
 import os
 import sys
 import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
+from html import escape
+from typing import Dict, List, Optional, Set
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+# 项目根目录（直接运行本文件时加入 sys.path，已存在时不重复添加）
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.append(_PROJECT_ROOT)
 
 from src.utils.config import Config
 from src.utils.logger import Logger
 from src.utils.file_manager import FileManager
+from src.utils.paper_utils import format_authors, list_existing_files
 
+# 生成文件名slug用的正则（去掉标点、空白和连字符合并为下划线）
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_SEPARATOR_RE = re.compile(r'[-\s]+')
 
-class ReportGenerator:
-    def __init__(self, config: Config, logger: Logger):
-        self.config = config
-        self.logger = logger
-        self.image_width = config.get_int('html', 'image_width', 600)
-    
-    def _load_llm_response(self, project_path: str) -> Optional[Dict]:
-        """
-        加载LLM返回的JSON结果
+# ASCII标题的快速路径：一次 translate 去掉标点、把空白和连字符统一为空格（与上面两个正则结果一致）
+_SLUG_ASCII_TABLE = str.maketrans({
+    chr(c): (' ' if chr(c).isspace() or chr(c) == '-' else None)
+    for c in range(128)
+    if not (chr(c).isalnum() or chr(c) == '_')
+})
+
+# 报告中的内联SVG图标
+_SVG_ATTRS = 'xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"'
+_SVG_BOOK = f'<svg {_SVG_ATTRS}><path d="M4 19.5A2.5 2.5 0 0 1 6.5 17H20"></path><path d="M6.5 2H20v20H6.5A2.5 2.5 0 0 1 4 19.5v-15A2.5 2.5 0 0 1 6.5 2z"></path></svg>'
+_SVG_CLOCK = f'<svg {_SVG_ATTRS}><circle cx="12" cy="12" r="10"></circle><polyline points="12 6 12 12 16 14"></polyline></svg>'
+_SVG_FILE = f'<svg {_SVG_ATTRS}><path d="M14 2H6a2 2 0 0 0-2 2v16a2 2 0 0 0 2 2h12a2 2 0 0 0 2-2V8z"></path><polyline points="14 2 14 8 20 8"></polyline></svg>'
+_SVG_BACK = f'<svg {_SVG_ATTRS}><polyline points="15 18 9 12 15 6"></polyline></svg>'
+_SVG_GRID = f'<svg {_SVG_ATTRS}><path d="M9 3H5a2 2 0 0 0-2 2v4m6-6h10a2 2 0 0 1 2 2v4M9 3v18m0 0h10a2 2 0 0 0 2-2V9M9 21H5a2 2 0 0 1-2-2V9m0 0h18"></path></svg>'
+_SVG_CLIPBOARD = f'<svg {_SVG_ATTRS}><path d="M16 4h2a2 2 0 0 1 2 2v14a2 2 0 0 1-2 2H6a2 2 0 0 1-2-2V6a2 2 0 0 1 2-2h2"></path><rect x="8" y="2" width="8" height="4" rx="1" ry="1"></rect></svg>'
+_SVG_ARROW = f'<svg class="arrow-icon" {_SVG_ATTRS}><polyline points="9 18 15 12 9 6"></polyline></svg>'
+
+# 论文信息中显示在HTML里、需要转义的文本字段
+_ESCAPED_PAPER_FIELDS = ('pmid', 'title', 'journal', 'pub_date', 'abstract', 'doi', 'pmcid')
+
+# HTML文件写入的缓冲区大小
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# 主报告、详情页的CSS样式（内嵌到每个HTML文件中，使文件可单独打开）
+_OVERVIEW_CSS = """
+        @import url('https://fonts.googleapis.com/css2?family=Playfair+Display:wght@400;600;700&family=Source+Serif+Pro:wght@400;600&family=Noto+Serif+SC:wght@400;600;700&display=swap');
         
-        Args:
-            project_path: 项目路径
-            
-        Returns:
-            Optional[Dict]: LLM响应数据，如果不存在则返回None
-        """
-        llm_response_file = os.path.join(project_path, 'step5_overview', 'llm_response.json')
+        :root {
+            --primary: #1a365d;
+            --primary-light: #2c5282;
+            --primary-dark: #0d1b2a;
+            --accent: #ed8936;
+            --accent-light: #fbd38d;
+            --bg-main: #f7fafc;
+            --bg-card: #ffffff;
+            --text-dark: #1a202c;
+            --text-muted: #4a5568;
+            --border-color: #e2e8f0;
+            --success: #38a169;
+            --info: #3182ce;
+        }
         
-        if os.path.exists(llm_response_file):
-            try:
-                file_manager = FileManager(self.config, self.logger)
-                data = file_manager.load_json(llm_response_file)
-                self.logger.info(f"已加载LLM响应: {llm_response_file}")
-                return data
-            except Exception as e:
-                self.logger.warning(f"加载LLM响应失败: {str(e)}")
-                return None
-        else:
-            self.logger.warning(f"未找到LLM响应文件: {llm_response_file}")
-            self.logger.info("请先将LLM输出的JSON保存到 step5_overview/llm_response.json")
-            return None
-    
-    def _load_all_data(self, project_path: str, file_manager: FileManager) -> Dict:
-        """加载所有步骤的数据"""
-        data = {}
+        * { margin: 0; padding: 0; box-sizing: border-box; }
         
-        step1_file = os.path.join(project_path, 'step1_search', 'search_results.json')
-        if os.path.exists(step1_file):
-            data['search'] = file_manager.load_json(step1_file)
+        body {
+            font-family: 'Source Serif Pro', 'Noto Serif SC', Georgia, serif;
+            line-height: 1.8;
+            color: var(--text-dark);
+            background: var(--bg-main);
+        }
         
-        step2_file = os.path.join(project_path, 'step2_details', 'papers_details.json')
-        if os.path.exists(step2_file):
-            data['details'] = file_manager.load_json(step2_file)
-            data['papers'] = data['details'].get('papers', [])
+        .container { max-width: 1000px; margin: 0 auto; padding: 0 24px; }
         
-        step3_file = os.path.join(project_path, 'step3_figures', 'figures_info.json')
-        if os.path.exists(step3_file):
-            data['figures'] = file_manager.load_json(step3_file)
-            data['figures_map'] = {}
-            for paper_fig in data['figures'].get('papers', []):
-                pmid = paper_fig.get('pmid')
-                if pmid:
-                    data['figures_map'][pmid] = paper_fig.get('figures', [])
+        /* Header */
+        header {
+            background: linear-gradient(135deg, var(--primary) 0%, var(--primary-dark) 100%);
+            color: #fff;
+            padding: 60px 0 50px;
+            position: relative;
+        }
         
-        return data
-    
-    def _generate_slug(self, title: str) -> str:
-        """生成URL友好的文件名slug"""
-        slug = re.sub(r'[^\w\s-]', '', title.lower())
-        slug = re.sub(r'[-\s]+', '_', slug)
-        return slug[:50]
-    
-    def generate_report(self, project_path: str) -> Dict:
-        """
-        生成HTML报告（主页+详情页）
+        header::after {
+            content: '';
+            position: absolute;
+            bottom: 0;
+            left: 0;
+            right: 0;
+            height: 4px;
+            background: linear-gradient(90deg, var(--accent), var(--accent-light), transparent);
+        }
         
-        Args:
-            project_path: 项目路径
-            
-        Returns:
-            Dict: 生成结果
-        """
-        self.logger.info("开始生成HTML报告")
+        .doc-type {
+            display: inline-block;
+            background: var(--accent);
+            color: var(--primary-dark);
+            font-size: 11px;
+            font-weight: 600;
+            padding: 5px 16px;
+            border-radius: 20px;
+            letter-spacing: 1.5px;
+            text-transform: uppercase;
+            margin-bottom: 20px;
+        }
         
-        try:
-            file_manager = FileManager(self.config, self.logger)
-            
-            data = self._load_all_data(project_path, file_manager)
-            llm_response = self._load_llm_response(project_path)
-            
-            final_output_dir = os.path.join(project_path, 'FinalOutput')
-            os.makedirs(final_output_dir, exist_ok=True)
-            
-            papers = data.get('papers', [])
-            figures_map = data.get('figures_map', {})
-            
-            generated_files = []
-            
-            if llm_response:
-                papers_analysis = llm_response.get('papers', {})
-                for i, paper in enumerate(papers, 1):
-                    pmid = paper.get('pmid', '')
-                    paper_analysis = papers_analysis.get(pmid, {})
-                    paper_figures = figures_map.get(pmid, [])
-                    
-                    self.logger.progress(i, len(papers), f"生成详情页: {pmid}")
-                    
-                    detail_html = self._generate_paper_detail_html(
-                        paper, paper_analysis, paper_figures, project_path
-                    )
-                    
-                    slug = self._generate_slug(paper.get('title', pmid))
-                    detail_file = os.path.join(final_output_dir, f'{pmid}_{slug}.html')
-                    with open(detail_file, 'w', encoding='utf-8') as f:
-                        f.write(detail_html)
-                    
-                    generated_files.append(f'{pmid}_{slug}.html')
-                
-                print()
-            
-            overview_html = self._generate_overview_html(data, llm_response, project_path, generated_files)
-            overview_file = os.path.join(final_output_dir, 'overview_report.html')
-            with open(overview_file, 'w', encoding='utf-8') as f:
-                f.write(overview_html)
-            
-            result = {
-                'success': True,
-                'generate_time': datetime.now().isoformat(),
-                'overview_file': overview_file,
-                'detail_files': generated_files,
-                'paper_count': len(papers),
-                'has_llm_response': llm_response is not None
-            }
-            
-            self.logger.success(f"HTML报告生成完成")
-            self.logger.info(f"主报告: {overview_file}")
-            self.logger.info(f"详情页: {len(generated_files)} 个")
-            
-            return result
-            
-        except Exception as e:
-            self.logger.error(f"生成报告失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return {
-                'success': False,
-                'error': str(e),
-                'generate_time': datetime.now().isoformat()
-            }
-    
-    def _generate_overview_html(self, data: Dict, llm_response: Optional[Dict], 
-                                 project_path: str, detail_files: List[str]) -> str:
-        """生成主报告HTML"""
-        search_query = data.get('search', {}).get('query', '未知主题')
-        papers = data.get('papers', [])
+        header h1 {
+            font-family: 'Playfair Display', 'Noto Serif SC', serif;
+            font-size: 28px;
+            font-weight: 600;
+            line-height: 1.4;
+            margin-bottom: 20px;
+        }
         
-        overview = llm_response.get('overview', {}) if llm_response else {}
-        papers_analysis = llm_response.get('papers', {}) if llm_response else {}
+        .meta-info {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 20px;
+            font-size: 14px;
+            opacity: 0.9;
+            margin-top: 20px;
+            padding-top: 16px;
+            border-top: 1px solid rgba(255,255,255,0.2);
+        }
         
-        overview_cn = overview.get('overview_cn', '等待LLM生成...')
-        overview_en = overview.get('overview_en', 'Waiting for LLM generation...')
-        research_trends = overview.get('research_trends', '')
-        key_themes = overview.get('key_themes', [])
-        evidence = overview.get('evidence', {})
-        hypotheses = overview.get('hypotheses', '')
-        open_questions = overview.get('open_questions', [])
+        .meta-item { display: flex; align-items: center; gap: 8px; }
+        .meta-item svg { width: 16px; height: 16px; opacity: 0.8; }
         
-        themes_html = self._generate_themes_html(key_themes)
-        evidence_html = self._generate_evidence_html(evidence)
-        questions_html = self._generate_questions_html(open_questions)
-        papers_list_html = self._generate_papers_list_html(papers, papers_analysis, detail_files)
+        /* Main */
+        main { padding: 50px 0 80px; }
         
-        fulltext_count = sum(1 for p in papers if p.get('fulltext_status') == 'success')
-        abstract_count = len(papers) - fulltext_count
-        
-        html = f"""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{search_query} - 文献综述</title>
-    <style>
-        {self._get_overview_css_styles()}
-    </style>
-</head>
-<body>
-    <header>
-        <div class="container header-content">
-            <span class="doc-type">Literature Review</span>
-            <h1>{search_query}</h1>
-            <div class="meta-info">
-                <span class="meta-item">
-                    <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                        <path d="M4 19.5A2.5 2.5 0 0 1 6.5 17H20"></path>
-                        <path d="M6.5 2H20v20H6.5A2.5 2.5 0 0 1 4 19.5v-15A2.5 2.5 0 0 1 6.5 2z"></path>
-                    </svg>
-                    共 {len(papers)} 篇论文
-                </span>
-                <span class="meta-item">
-                    <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                        <circle cx="12" cy="12" r="10"></circle>
-                        <polyline points="12 6 12 12 16 14"></polyline>
-                    </svg>
-                    生成时间: {datetime.now().strftime('%Y-%m-%d')}
-                </span>
-                <span class="meta-item">
-                    <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                        <path d="M14 2H6a2 2 0 0 0-2 2v16a2 2 0 0 0 2 2h12a2 2 0 0 0 2-2V8z"></path>
-                        <polyline points="14 2 14 8 20 8"></polyline>
-                    </svg>
-                    {fulltext_count}篇全文 / {abstract_count}篇摘要
-                </span>
-            </div>
-        </div>
-    </header>
-    
-    <main>
-        <div class="container">
-            <!-- 综合综述 -->
-            <section class="section">
-                <h2 class="section-title">综合综述 Overview</h2>
-                
-                <div class="overview-card">
-                    <h3><span class="lang-tag">ZH</span> 中文综述</h3>
-                    <div class="overview-content">{self._format_paragraphs(overview_cn)}</div>
-                </div>
-                
-                <div class="overview-card en-version">
-                    <h3><span class="lang-tag">EN</span> English Summary</h3>
-                    <div class="overview-content">{self._format_paragraphs(overview_en)}</div>
-                </div>
-            </section>
-            
-            <!-- 研究趋势 -->
-            {f'''<section class="section">
-                <h2 class="section-title">研究趋势 Research Trends</h2>
-                <div class="trends-box">
-                    <div class="trends-content">{self._format_paragraphs(research_trends)}</div>
-                </div>
-            </section>''' if research_trends else ''}
-            
-            <!-- 核心主题 -->
-            {f'''<section class="section">
-                <h2 class="section-title">核心研究主题 Key Themes</h2>
-                {themes_html}
-            </section>''' if key_themes else ''}
-            
-            <!-- 研究证据 -->
-            {f'''<section class="section">
-                <h2 class="section-title">研究证据 Research Evidence</h2>
-                {evidence_html}
-            </section>''' if evidence else ''}
-            
-            <!-- 推测性假说 -->
-            {f'''<section class="section">
-                <h2 class="section-title">推测性假说 Hypotheses</h2>
-                <div class="hypotheses-box">
-                    <div class="hypotheses-content">{self._format_paragraphs(hypotheses)}</div>
-                </div>
-            </section>''' if hypotheses else ''}
-            
-            <!-- 未解决问题 -->
-            {f'''<section class="section">
-                <h2 class="section-title">未解决问题与实验策略 Open Questions</h2>
-                {questions_html}
-            </section>''' if open_questions else ''}
-            
-            <!-- 论文列表 -->
-            <section class="section">
-                <h2 class="section-title">纳入文献 Included Studies</h2>
-                <div class="papers-summary">
-                    {papers_list_html}
-                </div>
-            </section>
-        </div>
-    </main>
-    
-    <footer>
-        <div class="container">
-            <p>Generated by PubMed2Zhihu | 文献综述报告</p>
-            <p>数据来源: NCBI PubMed / PubMed Central | {datetime.now().strftime('%Y-%m-%d')}</p>
-        </div>
-    </footer>
-</body>
-</html>
-"""
-        return html
-    
-    def _generate_paper_detail_html(self, paper: Dict, paper_analysis: Dict,
-                                     figures: List[Dict], project_path: str) -> str:
-        """生成单篇论文详情页HTML"""
-        pmid = paper.get('pmid', '')
-        title = paper.get('title', '未知标题')
-        authors = paper.get('authors', [])
-        journal = paper.get('journal', '未知期刊')
-        pub_date = paper.get('pub_date', '')
-        abstract = paper.get('abstract', '摘要不可用')
-        doi = paper.get('doi', '')
-        pmcid = paper.get('pmcid', '')
-        
-        if isinstance(authors, list):
-            authors_str = ', '.join(authors[:5])
-            if len(authors) > 5:
-                authors_str += f' 等（共{len(authors)}位作者）'
-        else:
-            authors_str = str(authors)
-        
-        research_content = paper_analysis.get('research_content', '')
-        future_directions = paper_analysis.get('future_directions', '')
-        paper_themes = paper_analysis.get('paper_themes', [])
-        
-        themes_tags = ''.join([f'<span class="theme-tag">{t}</span>' for t in paper_themes])
-        figures_html = self._generate_figures_html(figures, project_path)
-        
-        pubmed_link = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
-        doi_link = f"https://doi.org/{doi}" if doi else ""
-        pmc_link = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/" if pmcid else ""
-        
-        html = f"""<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title[:80]} - 论文详情</title>
-    <style>
-        {self._get_detail_css_styles()}
-    </style>
-</head>
-<body>
-    <nav class="top-nav">
-        <div class="container">
-            <a href="overview_report.html" class="back-link">
-                <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                    <polyline points="15 18 9 12 15 6"></polyline>
-                </svg>
-                返回综述
-            </a>
-        </div>
-    </nav>
-    
-    <header>
-        <div class="container header-content">
-            <span class="paper-type">Research Article</span>
-            <h1>{title}</h1>
-            <div class="paper-meta">
-                <span class="authors">{authors_str}</span>
-                <span class="journal">{journal}</span>
-                <span class="date">{pub_date}</span>
-            </div>
-            <div class="paper-links">
-                <a href="{pubmed_link}" target="_blank" class="link-btn pubmed">PubMed</a>
-                {f'<a href="{doi_link}" target="_blank" class="link-btn doi">DOI</a>' if doi_link else ''}
-                {f'<a href="{pmc_link}" target="_blank" class="link-btn pmc">PMC全文</a>' if pmc_link else ''}
-            </div>
-        </div>
-    </header>
-    
-    <main>
-        <div class="container">
-            <!-- 关键主题 -->
-            {f'''<section class="section themes-section">
-                <h2 class="section-title">关键主题 Key Themes</h2>
-                <div class="themes-container">
-                    {themes_tags}
-                </div>
-            </section>''' if paper_themes else ''}
-            
-            <!-- 研究内容 -->
-            {f'''<section class="section">
-                <h2 class="section-title">研究内容 Research Content</h2>
-                <div class="content-card">
-                    {self._format_paragraphs(research_content)}
-                </div>
-            </section>''' if research_content else ''}
-            
-            <!-- 潜在研究方向 -->
-            {f'''<section class="section">
-                <h2 class="section-title">潜在研究方向 Future Directions</h2>
-                <div class="directions-card">
-                    {self._format_paragraphs(future_directions)}
-                </div>
-            </section>''' if future_directions else ''}
-            
-            <!-- 原文摘要 -->
-            <section class="section">
-                <h2 class="section-title">原文摘要 Abstract</h2>
-                <div class="abstract-card">
-                    <p>{abstract}</p>
-                </div>
-            </section>
-            
-            <!-- 图片 -->
-            {figures_html}
-        </div>
-    </main>
-    
-    <footer>
-        <div class="container">
-            <p>PMID: {pmid} | Generated by PubMed2Zhihu</p>
-        </div>
-    </footer>
-</body>
-</html>
-"""
-        return html
-    
-    def _format_paragraphs(self, text: str) -> str:
-        """将文本格式化为HTML段落"""
-        if not text:
-            return '<p>内容待生成...</p>'
-        
-        paragraphs = text.split('\n\n')
-        if len(paragraphs) == 1:
-            paragraphs = text.split('。')
-            if len(paragraphs) > 3:
-                chunks = []
-                current = []
-                for p in paragraphs:
-                    current.append(p)
-                    if len(current) >= 3:
-                        chunks.append('。'.join(current) + '。')
-                        current = []
-                if current:
-                    chunks.append('。'.join(current))
-                paragraphs = chunks
-            else:
-                paragraphs = [text]
-        
-        return ''.join([f'<p>{p.strip()}</p>' for p in paragraphs if p.strip()])
-    
-    def _generate_themes_html(self, themes: List[Dict]) -> str:
-        """生成主题卡片HTML"""
-        if not themes:
-            return ''
-        
-        cards = []
-        for theme in themes:
-            title_cn = theme.get('title_cn', theme.get('title', ''))
-            title_en = theme.get('title_en', '')
-            description = theme.get('description', '')
-            
-            cards.append(f'''
-            <div class="theme-card">
-                <h4>{title_cn}</h4>
-                {f'<span class="theme-en">{title_en}</span>' if title_en else ''}
-                <p>{description}</p>
-            </div>
-            ''')
-        
-        return f'<div class="themes-grid">{" ".join(cards)}</div>'
-    
-    def _generate_evidence_html(self, evidence: Dict) -> str:
-        """生成研究证据HTML"""
-        if not evidence:
-            return ''
-        
-        basic = evidence.get('basic_research', '')
-        clinical = evidence.get('clinical_research', '')
-        
-        return f'''
-        <div class="evidence-grid">
-            <div class="evidence-card basic">
-                <h4>
-                    <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                        <path d="M9 3H5a2 2 0 0 0-2 2v4m6-6h10a2 2 0 0 1 2 2v4M9 3v18m0 0h10a2 2 0 0 0 2-2V9M9 21H5a2 2 0 0 1-2-2V9m0 0h18"></path>
-                    </svg>
-                    基础研究证据
-                </h4>
-                <div class="evidence-content">{self._format_paragraphs(basic)}</div>
-            </div>
-            <div class="evidence-card clinical">
-                <h4>
-                    <svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                        <path d="M16 4h2a2 2 0 0 1 2 2v14a2 2 0 0 1-2 2H6a2 2 0 0 1-2-2V6a2 2 0 0 1 2-2h2"></path>
-                        <rect x="8" y="2" width="8" height="4" rx="1" ry="1"></rect>
-                    </svg>
-                    临床研究证据
-                </h4>
-                <div class="evidence-content">{self._format_paragraphs(clinical)}</div>
-            </div>
-        </div>
-        '''
-    
-    def _generate_questions_html(self, questions: List[Dict]) -> str:
-        """生成未解决问题HTML"""
-        if not questions:
-            return ''
-        
-        items = []
-        for i, q in enumerate(questions, 1):
-            question = q.get('question', '')
-            strategy = q.get('strategy', '')
-            
-            items.append(f'''
-            <div class="question-item">
-                <div class="question-num">{i}</div>
-                <div class="question-content">
-                    <h4>{question}</h4>
-                    <div class="strategy">
-                        <span class="strategy-label">实验策略:</span>
-                        <p>{strategy}</p>
-                    </div>
-                </div>
-            </div>
-            ''')
-        
-        return f'<div class="questions-list">{" ".join(items)}</div>'
-    
-    def _generate_papers_list_html(self, papers: List[Dict], papers_analysis: Dict, 
-                                    detail_files: List[str]) -> str:
-        """生成论文列表HTML"""
-        items = []
-        
-        file_map = {}
-        for f in detail_files:
-            pmid = f.split('_')[0]
-            file_map[pmid] = f
-        
-        for i, paper in enumerate(papers, 1):
-            pmid = paper.get('pmid', '')
-            title = paper.get('title', '未知标题')
-            authors = paper.get('authors', [])
-            journal = paper.get('journal', '未知期刊')
-            pub_date = paper.get('pub_date', '')
-            
-            if isinstance(authors, list):
-                first_author = authors[0] if authors else '未知'
-            else:
-                first_author = str(authors)
-            
-            analysis = papers_analysis.get(pmid, {})
-            paper_themes = analysis.get('paper_themes', [])
-            themes_html = ''.join([f'<span class="mini-tag">{t}</span>' for t in paper_themes[:3]])
-            
-            detail_file = file_map.get(pmid, '')
-            
-            if detail_file:
-                items.append(f'''
-                <a href="{detail_file}" class="paper-item">
-                    <span class="paper-num">{i}</span>
-                    <div class="paper-info">
-                        <div class="paper-title">{title}</div>
-                        <div class="paper-meta">{first_author} 等 | {journal} | {pub_date}</div>
-                        {f'<div class="paper-themes">{themes_html}</div>' if themes_html else ''}
-                    </div>
-                    <svg class="arrow-icon" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                        <polyline points="9 18 15 12 9 6"></polyline>
-                    </svg>
-                </a>
-                ''')
-            else:
-                items.append(f'''
-                <div class="paper-item no-link">
-                    <span class="paper-num">{i}</span>
-                    <div class="paper-info">
-                        <div class="paper-title">{title}</div>
-                        <div class="paper-meta">{first_author} 等 | {journal} | {pub_date}</div>
-                    </div>
-                </div>
-                ''')
-        
-        return f'<div class="papers-list">{" ".join(items)}</div>'
-    
-    def _generate_figures_html(self, figures: List[Dict], project_path: str) -> str:
-        """生成图片展示HTML"""
-        if not figures:
-            return ''
-        
-        figures_items = []
-        for fig in figures:
-            fig_id = fig.get('figure_id', '')
-            caption = fig.get('caption', '')
-            local_path = fig.get('local_path')
-            original_url = fig.get('original_url', '')
-            
-            if local_path:
-                # 使用相对路径，使HTML文件可以直接在文件系统中打开
-                # FinalOutput目录下的HTML需要访问 ../step3_figures/images/
-                img_path = f"../step3_figures/{local_path}"
-                # 添加点击放大功能
-                img_html = f'<a href="{img_path}" target="_blank" class="figure-link"><img src="{img_path}" alt="{fig_id}" style="max-width: {self.image_width}px; cursor: pointer;" title="点击查看大图"></a>'
-            elif original_url:
-                img_html = f'<img src="{original_url}" alt="{fig_id}" style="max-width: {self.image_width}px;" onerror="this.style.display=\'none\'">'
-            else:
-                img_html = '<p class="no-image">图片不可用</p>'
-            
-            figures_items.append(f'''
-            <div class="figure-item">
-                <div class="figure-header">{fig_id}</div>
-                <div class="figure-image">{img_html}</div>
-                <div class="figure-caption">{caption}</div>
-            </div>
-            ''')
-        
-        return f'''
-        <section class="section">
-            <h2 class="section-title">图片 Figures ({len(figures)})</h2>
-            <div class="figures-grid">{" ".join(figures_items)}</div>
-        </section>
-        '''
-    
-    def _get_overview_css_styles(self) -> str:
-        """获取主报告CSS样式"""
-        return """
-        @import url('https://fonts.googleapis.com/css2?family=Playfair+Display:wght@400;600;700&family=Source+Serif+Pro:wght@400;600&family=Noto+Serif+SC:wght@400;600;700&display=swap');
-        
-        :root {
-            --primary: #1a365d;
-            --primary-light: #2c5282;
-            --primary-dark: #0d1b2a;
-            --accent: #ed8936;
-            --accent-light: #fbd38d;
-            --bg-main: #f7fafc;
-            --bg-card: #ffffff;
-            --text-dark: #1a202c;
-            --text-muted: #4a5568;
-            --border-color: #e2e8f0;
-            --success: #38a169;
-            --info: #3182ce;
-        }
-        
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        
-        body {
-            font-family: 'Source Serif Pro', 'Noto Serif SC', Georgia, serif;
-            line-height: 1.8;
-            color: var(--text-dark);
-            background: var(--bg-main);
-        }
-        
-        .container { max-width: 1000px; margin: 0 auto; padding: 0 24px; }
-        
-        /* Header */
-        header {
-            background: linear-gradient(135deg, var(--primary) 0%, var(--primary-dark) 100%);
-            color: #fff;
-            padding: 60px 0 50px;
-            position: relative;
-        }
-        
-        header::after {
-            content: '';
-            position: absolute;
-            bottom: 0;
-            left: 0;
-            right: 0;
-            height: 4px;
-            background: linear-gradient(90deg, var(--accent), var(--accent-light), transparent);
-        }
-        
-        .doc-type {
-            display: inline-block;
-            background: var(--accent);
-            color: var(--primary-dark);
-            font-size: 11px;
-            font-weight: 600;
-            padding: 5px 16px;
-            border-radius: 20px;
-            letter-spacing: 1.5px;
-            text-transform: uppercase;
-            margin-bottom: 20px;
-        }
-        
-        header h1 {
-            font-family: 'Playfair Display', 'Noto Serif SC', serif;
-            font-size: 28px;
-            font-weight: 600;
-            line-height: 1.4;
-            margin-bottom: 20px;
-        }
-        
-        .meta-info {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 20px;
-            font-size: 14px;
-            opacity: 0.9;
-            margin-top: 20px;
-            padding-top: 16px;
-            border-top: 1px solid rgba(255,255,255,0.2);
-        }
-        
-        .meta-item { display: flex; align-items: center; gap: 8px; }
-        .meta-item svg { width: 16px; height: 16px; opacity: 0.8; }
-        
-        /* Main */
-        main { padding: 50px 0 80px; }
-        
-        .section { margin-bottom: 50px; }
+        .section { margin-bottom: 50px; }
         
         .section-title {
             font-family: 'Playfair Display', 'Noto Serif SC', serif;
@@ -988,10 +429,8 @@ class ReportGenerator:
             .question-item { flex-direction: column; gap: 12px; }
         }
         """
-    
-    def _get_detail_css_styles(self) -> str:
-        """获取详情页CSS样式"""
-        return """
+
+_DETAIL_CSS = """
         @import url('https://fonts.googleapis.com/css2?family=Playfair+Display:wght@400;600;700&family=Source+Serif+Pro:wght@400;600&family=Noto+Serif+SC:wght@400;600;700&display=swap');
         
         :root {
@@ -1080,139 +519,768 @@ class ReportGenerator:
             margin-bottom: 16px;
         }
         
-        .paper-meta .journal { color: var(--accent-light); }
+        .paper-meta .journal { color: var(--accent-light); }
+        
+        .paper-links { display: flex; gap: 10px; flex-wrap: wrap; }
+        
+        .link-btn {
+            display: inline-block;
+            padding: 6px 14px;
+            border-radius: 6px;
+            font-size: 12px;
+            font-weight: 600;
+            text-decoration: none;
+            transition: transform 0.2s, box-shadow 0.2s;
+        }
+        
+        .link-btn:hover { transform: translateY(-1px); box-shadow: 0 2px 8px rgba(0,0,0,0.2); }
+        
+        .link-btn.pubmed { background: #e0f2fe; color: #0369a1; }
+        .link-btn.doi { background: #fef3c7; color: #b45309; }
+        .link-btn.pmc { background: #d1fae5; color: #047857; }
+        
+        /* Main */
+        main { padding: 40px 0 60px; }
+        
+        .section { margin-bottom: 40px; }
+        
+        .section-title {
+            font-family: 'Playfair Display', 'Noto Serif SC', serif;
+            font-size: 20px;
+            font-weight: 600;
+            color: var(--primary);
+            margin-bottom: 20px;
+            padding-bottom: 10px;
+            border-bottom: 2px solid var(--border-color);
+        }
+        
+        /* Themes */
+        .themes-container { display: flex; flex-wrap: wrap; gap: 10px; }
+        
+        .theme-tag {
+            display: inline-block;
+            background: linear-gradient(135deg, var(--accent), #dd6b20);
+            color: #fff;
+            padding: 8px 18px;
+            border-radius: 20px;
+            font-size: 14px;
+            font-weight: 500;
+        }
+        
+        /* Content Cards */
+        .content-card, .directions-card, .abstract-card {
+            background: var(--bg-card);
+            border-radius: 12px;
+            padding: 28px;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.05);
+        }
+        
+        .content-card { border-left: 4px solid var(--info); }
+        .directions-card { border-left: 4px solid var(--success); }
+        .abstract-card { border-left: 4px solid var(--primary); }
+        
+        .content-card p, .directions-card p, .abstract-card p {
+            margin-bottom: 12px;
+            text-align: justify;
+        }
+        
+        /* Figures */
+        .figures-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
+            gap: 20px;
+        }
+        
+        .figure-item {
+            background: var(--bg-card);
+            border-radius: 10px;
+            overflow: hidden;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.05);
+        }
+        
+        .figure-header {
+            background: var(--primary);
+            color: #fff;
+            padding: 10px 16px;
+            font-size: 14px;
+            font-weight: 600;
+        }
+        
+        .figure-image {
+            padding: 16px;
+            text-align: center;
+            background: #fafafa;
+        }
+        
+        .figure-image img { 
+            max-width: 100%; 
+            height: auto; 
+            border-radius: 4px; 
+            transition: transform 0.2s ease;
+        }
+        
+        .figure-link {
+            display: inline-block;
+            text-decoration: none;
+        }
+        
+        .figure-link:hover img {
+            transform: scale(1.02);
+            box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+        }
+        
+        .figure-caption {
+            padding: 14px 16px;
+            font-size: 13px;
+            color: var(--text-muted);
+            border-top: 1px solid var(--border-color);
+        }
+        
+        /* Footer */
+        footer {
+            background: var(--primary);
+            color: rgba(255,255,255,0.7);
+            padding: 20px 0;
+            text-align: center;
+            font-size: 13px;
+        }
+        
+        /* Responsive */
+        @media (max-width: 768px) {
+            header h1 { font-size: 20px; }
+            .paper-meta { flex-direction: column; gap: 8px; }
+            .figures-grid { grid-template-columns: 1fr; }
+        }
+        """
+
+
+class ReportGenerator:
+    def __init__(self, config: Config, logger: Logger):
+        self.config = config
+        self.logger = logger
+        self.image_width = config.get_int('html', 'image_width', 600)
+        # 各方法共用的文件管理器（首次使用时创建）
+        self._file_manager: Optional[FileManager] = None
+    
+    def _get_file_manager(self) -> FileManager:
+        """返回共用的文件管理器"""
+        if self._file_manager is None:
+            self._file_manager = FileManager(self.config, self.logger)
+        return self._file_manager
+    
+    def _load_llm_response(self, project_path: str) -> Optional[Dict]:
+        """
+        加载LLM返回的JSON结果
+        
+        Args:
+            project_path: 项目路径
+            
+        Returns:
+            Optional[Dict]: LLM响应数据，如果不存在则返回None
+        """
+        llm_response_file = os.path.join(project_path, 'step5_overview', 'llm_response.json')
+        
+        if os.path.exists(llm_response_file):
+            try:
+                data = self._get_file_manager().load_json(llm_response_file, cached=True)
+                self.logger.info(f"已加载LLM响应: {llm_response_file}")
+                return data
+            except Exception as e:
+                self.logger.warning(f"加载LLM响应失败: {str(e)}")
+                return None
+        else:
+            self.logger.warning(f"未找到LLM响应文件: {llm_response_file}")
+            self.logger.info("请先将LLM输出的JSON保存到 step5_overview/llm_response.json")
+            return None
+    
+    def _load_all_data(self, project_path: str, file_manager: FileManager) -> Dict:
+        """加载所有步骤的数据（文件未变化时复用 Step 4/5 已解析的结果，各步骤数据为只读视图，其中的论文记录不能修改）"""
+        data = {}
+        
+        step1_file = os.path.join(project_path, 'step1_search', 'search_results.json')
+        if os.path.exists(step1_file):
+            data['search'] = file_manager.load_json(step1_file, cached=True)
+        
+        step2_file = os.path.join(project_path, 'step2_details', 'papers_details.json')
+        if os.path.exists(step2_file):
+            data['details'] = file_manager.load_json(step2_file, cached=True)
+            data['papers'] = data['details'].get('papers', [])
+        
+        step3_file = os.path.join(project_path, 'step3_figures', 'figures_info.json')
+        if os.path.exists(step3_file):
+            data['figures'] = file_manager.load_json(step3_file, cached=True)
+            data['figures_map'] = {}
+            for paper_fig in data['figures'].get('papers', []):
+                pmid = paper_fig.get('pmid')
+                if pmid:
+                    data['figures_map'][pmid] = paper_fig.get('figures', [])
+        
+        return data
+    
+    def _generate_slug(self, title: str) -> str:
+        """生成URL友好的文件名slug"""
+        title = title.lower()
+        if not title.isascii():
+            slug = _SLUG_STRIP_RE.sub('', title)
+            return _SLUG_SEPARATOR_RE.sub('_', slug)[:50]
+        
+        text = title.translate(_SLUG_ASCII_TABLE)
+        slug = '_'.join(text.split())
+        # 首尾的空白也会被正则替换为下划线
+        if text[:1] == ' ':
+            slug = '_' + slug
+        if text[-1:] == ' ' and not text.isspace():
+            slug += '_'
+        return slug[:50]
+    
+    def _escape_paper(self, paper: Dict) -> Dict:
+        """
+        返回论文信息的副本，其中显示在HTML中的文本字段已转义
+        
+        原数据来自共享的JSON缓存，不能原地修改。另加 short_title（截断后再转义的标题，用于<title>）
+        """
+        display = dict(paper)
+        for key in _ESCAPED_PAPER_FIELDS:
+            value = paper.get(key)
+            if isinstance(value, str):
+                display[key] = escape(value)
+        
+        authors = paper.get('authors')
+        if isinstance(authors, list):
+            display['authors'] = [escape(str(author)) for author in authors]
+        elif authors is not None:
+            display['authors'] = escape(str(authors))
+        
+        display['short_title'] = escape(paper.get('title', '未知标题')[:80])
+        return display
+    
+    def generate_report(self, project_path: str) -> Dict:
+        """
+        生成HTML报告（主页+详情页）
+        
+        Args:
+            project_path: 项目路径
+            
+        Returns:
+            Dict: 生成结果
+        """
+        self.logger.info("开始生成HTML报告")
+        # 结果记录和页面上的日期使用同一个生成时间
+        generate_time = datetime.now()
+        
+        try:
+            data = self._load_all_data(project_path, self._get_file_manager())
+            llm_response = self._load_llm_response(project_path)
+            
+            final_output_dir = os.path.join(project_path, 'FinalOutput')
+            os.makedirs(final_output_dir, exist_ok=True)
+            
+            papers = data.get('papers', [])
+            figures_map = data.get('figures_map', {})
+            
+            # 显示用的文本字段预先转义一次，详情页和主报告共用
+            display_papers = [self._escape_paper(paper) for paper in papers]
+            
+            # 各全文获取状态的论文数（主报告的内容统计）
+            status_counts = Counter(paper.get('fulltext_status') for paper in papers)
+            
+            # 详情页文件名（按论文顺序；PMID重复或为空的论文各有一个详情页）
+            generated_files: List[str] = []
+            
+            if llm_response:
+                papers_analysis = llm_response.get('papers', {})
+                
+                # 一次列出已下载的图片文件，代替逐张检查
+                available_images = list_existing_files(
+                    os.path.join(project_path, 'step3_figures'),
+                    (fig.get('local_path') for figures in figures_map.values() for fig in figures)
+                )
+                
+                def write_detail_page(paper: Dict, display_paper: Dict) -> str:
+                    """生成并写入单篇论文详情页（在线程池中执行），返回文件名"""
+                    pmid = paper.get('pmid', '')
+                    detail_parts = self._generate_paper_detail_html(
+                        display_paper, papers_analysis.get(pmid, {}), figures_map.get(pmid, []), available_images
+                    )
+                    
+                    slug = self._generate_slug(paper.get('title', pmid))
+                    detail_filename = f'{pmid}_{slug}.html'
+                    detail_file = os.path.join(final_output_dir, detail_filename)
+                    with open(detail_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+                        f.writelines(detail_parts)
+                    return detail_filename
+                
+                # 各详情页互不依赖，多线程并行生成和写入；结果按原顺序取回
+                with ThreadPoolExecutor() as executor:
+                    for i, (paper, detail_filename) in enumerate(
+                            zip(papers, executor.map(write_detail_page, papers, display_papers)), 1):
+                        self.logger.progress(i, len(papers), f"生成详情页: {paper.get('pmid', '')}")
+                        generated_files.append(detail_filename)
+                
+                print()
+            
+            # 主报告中论文链接用的 PMID -> 详情页文件名（PMID重复时链接到最后一个）
+            detail_file_map = {
+                paper.get('pmid', ''): detail_filename
+                for paper, detail_filename in zip(papers, generated_files)
+            }
+            overview_parts = self._generate_overview_html(
+                data, llm_response, project_path, display_papers, detail_file_map, status_counts,
+                generate_time.strftime('%Y-%m-%d')
+            )
+            overview_file = os.path.join(final_output_dir, 'overview_report.html')
+            with open(overview_file, 'w', encoding='utf-8', buffering=_WRITE_BUFFER_SIZE) as f:
+                f.writelines(overview_parts)
+            
+            result = {
+                'success': True,
+                'generate_time': generate_time.isoformat(),
+                'overview_file': overview_file,
+                'detail_files': generated_files,
+                'paper_count': len(papers),
+                'has_llm_response': llm_response is not None
+            }
+            
+            self.logger.success(f"HTML报告生成完成")
+            self.logger.info(f"主报告: {overview_file}")
+            self.logger.info(f"详情页: {len(generated_files)} 个")
+            
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"生成报告失败: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return {
+                'success': False,
+                'error': str(e),
+                'generate_time': generate_time.isoformat()
+            }
+    
+    def _generate_overview_html(self, data: Dict, llm_response: Optional[Dict], 
+                                 project_path: str, papers: List[Dict], detail_files: Dict[str, str],
+                                 status_counts: Counter, report_date: str) -> List[str]:
+        """
+        生成主报告HTML，按顺序返回各片段（CSS常量单独作为一段，写文件时不必拼成整页字符串）
         
-        .paper-links { display: flex; gap: 10px; flex-wrap: wrap; }
+        papers 为 _escape_paper 转义后的论文列表
+        """
+        search_query = escape(data.get('search', {}).get('query', '未知主题'))
         
-        .link-btn {
-            display: inline-block;
-            padding: 6px 14px;
-            border-radius: 6px;
-            font-size: 12px;
-            font-weight: 600;
-            text-decoration: none;
-            transition: transform 0.2s, box-shadow 0.2s;
-        }
+        overview = llm_response.get('overview', {}) if llm_response else {}
+        papers_analysis = llm_response.get('papers', {}) if llm_response else {}
         
-        .link-btn:hover { transform: translateY(-1px); box-shadow: 0 2px 8px rgba(0,0,0,0.2); }
+        overview_cn = overview.get('overview_cn', '等待LLM生成...')
+        overview_en = overview.get('overview_en', 'Waiting for LLM generation...')
+        research_trends = overview.get('research_trends', '')
+        key_themes = overview.get('key_themes', [])
+        evidence = overview.get('evidence', {})
+        hypotheses = overview.get('hypotheses', '')
+        open_questions = overview.get('open_questions', [])
         
-        .link-btn.pubmed { background: #e0f2fe; color: #0369a1; }
-        .link-btn.doi { background: #fef3c7; color: #b45309; }
-        .link-btn.pmc { background: #d1fae5; color: #047857; }
+        themes_html = self._generate_themes_html(key_themes)
+        evidence_html = self._generate_evidence_html(evidence)
+        questions_html = self._generate_questions_html(open_questions)
+        papers_list_html = self._generate_papers_list_html(papers, papers_analysis, detail_files)
         
-        /* Main */
-        main { padding: 40px 0 60px; }
+        fulltext_count = status_counts['success']
+        abstract_count = len(papers) - fulltext_count
         
-        .section { margin-bottom: 40px; }
+        head = f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{search_query} - 文献综述</title>
+    <style>
+        """
+        tail = f"""
+    </style>
+</head>
+<body>
+    <header>
+        <div class="container header-content">
+            <span class="doc-type">Literature Review</span>
+            <h1>{search_query}</h1>
+            <div class="meta-info">
+                <span class="meta-item">
+                    {_SVG_BOOK}
+                    共 {len(papers)} 篇论文
+                </span>
+                <span class="meta-item">
+                    {_SVG_CLOCK}
+                    生成时间: {report_date}
+                </span>
+                <span class="meta-item">
+                    {_SVG_FILE}
+                    {fulltext_count}篇全文 / {abstract_count}篇摘要
+                </span>
+            </div>
+        </div>
+    </header>
+    
+    <main>
+        <div class="container">
+            <!-- 综合综述 -->
+            <section class="section">
+                <h2 class="section-title">综合综述 Overview</h2>
+                
+                <div class="overview-card">
+                    <h3><span class="lang-tag">ZH</span> 中文综述</h3>
+                    <div class="overview-content">{self._format_paragraphs(overview_cn)}</div>
+                </div>
+                
+                <div class="overview-card en-version">
+                    <h3><span class="lang-tag">EN</span> English Summary</h3>
+                    <div class="overview-content">{self._format_paragraphs(overview_en)}</div>
+                </div>
+            </section>
+            
+            <!-- 研究趋势 -->
+            {f'''<section class="section">
+                <h2 class="section-title">研究趋势 Research Trends</h2>
+                <div class="trends-box">
+                    <div class="trends-content">{self._format_paragraphs(research_trends)}</div>
+                </div>
+            </section>''' if research_trends else ''}
+            
+            <!-- 核心主题 -->
+            {f'''<section class="section">
+                <h2 class="section-title">核心研究主题 Key Themes</h2>
+                {themes_html}
+            </section>''' if key_themes else ''}
+            
+            <!-- 研究证据 -->
+            {f'''<section class="section">
+                <h2 class="section-title">研究证据 Research Evidence</h2>
+                {evidence_html}
+            </section>''' if evidence else ''}
+            
+            <!-- 推测性假说 -->
+            {f'''<section class="section">
+                <h2 class="section-title">推测性假说 Hypotheses</h2>
+                <div class="hypotheses-box">
+                    <div class="hypotheses-content">{self._format_paragraphs(hypotheses)}</div>
+                </div>
+            </section>''' if hypotheses else ''}
+            
+            <!-- 未解决问题 -->
+            {f'''<section class="section">
+                <h2 class="section-title">未解决问题与实验策略 Open Questions</h2>
+                {questions_html}
+            </section>''' if open_questions else ''}
+            
+            <!-- 论文列表 -->
+            <section class="section">
+                <h2 class="section-title">纳入文献 Included Studies</h2>
+                <div class="papers-summary">
+                    {papers_list_html}
+                </div>
+            </section>
+        </div>
+    </main>
+    
+    <footer>
+        <div class="container">
+            <p>Generated by PubMed2Zhihu | 文献综述报告</p>
+            <p>数据来源: NCBI PubMed / PubMed Central | {report_date}</p>
+        </div>
+    </footer>
+</body>
+</html>
+"""
+        return [head, _OVERVIEW_CSS, tail]
+    
+    def _generate_paper_detail_html(self, paper: Dict, paper_analysis: Dict,
+                                     figures: List[Dict], available_images: Set[str]) -> List[str]:
+        """生成单篇论文详情页HTML，按顺序返回各片段（paper 为 _escape_paper 转义后的论文信息）"""
+        pmid = paper.get('pmid', '')
+        title = paper.get('title', '未知标题')
+        journal = paper.get('journal', '未知期刊')
+        pub_date = paper.get('pub_date', '')
+        abstract = paper.get('abstract', '摘要不可用')
+        doi = paper.get('doi', '')
+        pmcid = paper.get('pmcid', '')
         
-        .section-title {
-            font-family: 'Playfair Display', 'Noto Serif SC', serif;
-            font-size: 20px;
-            font-weight: 600;
-            color: var(--primary);
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 2px solid var(--border-color);
-        }
+        authors_str = format_authors(paper)
         
-        /* Themes */
-        .themes-container { display: flex; flex-wrap: wrap; gap: 10px; }
+        research_content = paper_analysis.get('research_content', '')
+        future_directions = paper_analysis.get('future_directions', '')
+        paper_themes = paper_analysis.get('paper_themes', [])
         
-        .theme-tag {
-            display: inline-block;
-            background: linear-gradient(135deg, var(--accent), #dd6b20);
-            color: #fff;
-            padding: 8px 18px;
-            border-radius: 20px;
-            font-size: 14px;
-            font-weight: 500;
-        }
+        themes_tags = ''.join([f'<span class="theme-tag">{t}</span>' for t in paper_themes])
+        figures_html = self._generate_figures_html(figures, available_images)
         
-        /* Content Cards */
-        .content-card, .directions-card, .abstract-card {
-            background: var(--bg-card);
-            border-radius: 12px;
-            padding: 28px;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.05);
-        }
+        pubmed_link = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
+        doi_link = f"https://doi.org/{doi}" if doi else ""
+        pmc_link = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/" if pmcid else ""
+        
+        head = f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{paper['short_title']} - 论文详情</title>
+    <style>
+        """
+        tail = f"""
+    </style>
+</head>
+<body>
+    <nav class="top-nav">
+        <div class="container">
+            <a href="overview_report.html" class="back-link">
+                {_SVG_BACK}
+                返回综述
+            </a>
+        </div>
+    </nav>
+    
+    <header>
+        <div class="container header-content">
+            <span class="paper-type">Research Article</span>
+            <h1>{title}</h1>
+            <div class="paper-meta">
+                <span class="authors">{authors_str}</span>
+                <span class="journal">{journal}</span>
+                <span class="date">{pub_date}</span>
+            </div>
+            <div class="paper-links">
+                <a href="{pubmed_link}" target="_blank" class="link-btn pubmed">PubMed</a>
+                {f'<a href="{doi_link}" target="_blank" class="link-btn doi">DOI</a>' if doi_link else ''}
+                {f'<a href="{pmc_link}" target="_blank" class="link-btn pmc">PMC全文</a>' if pmc_link else ''}
+            </div>
+        </div>
+    </header>
+    
+    <main>
+        <div class="container">
+            <!-- 关键主题 -->
+            {f'''<section class="section themes-section">
+                <h2 class="section-title">关键主题 Key Themes</h2>
+                <div class="themes-container">
+                    {themes_tags}
+                </div>
+            </section>''' if paper_themes else ''}
+            
+            <!-- 研究内容 -->
+            {f'''<section class="section">
+                <h2 class="section-title">研究内容 Research Content</h2>
+                <div class="content-card">
+                    {self._format_paragraphs(research_content)}
+                </div>
+            </section>''' if research_content else ''}
+            
+            <!-- 潜在研究方向 -->
+            {f'''<section class="section">
+                <h2 class="section-title">潜在研究方向 Future Directions</h2>
+                <div class="directions-card">
+                    {self._format_paragraphs(future_directions)}
+                </div>
+            </section>''' if future_directions else ''}
+            
+            <!-- 原文摘要 -->
+            <section class="section">
+                <h2 class="section-title">原文摘要 Abstract</h2>
+                <div class="abstract-card">
+                    <p>{abstract}</p>
+                </div>
+            </section>
+            
+            <!-- 图片 -->
+            {figures_html}
+        </div>
+    </main>
+    
+    <footer>
+        <div class="container">
+            <p>PMID: {pmid} | Generated by PubMed2Zhihu</p>
+        </div>
+    </footer>
+</body>
+</html>
+"""
+        return [head, _DETAIL_CSS, tail]
+    
+    def _format_paragraphs(self, text: str) -> str:
+        """将文本格式化为HTML段落"""
+        if not text:
+            return '<p>内容待生成...</p>'
         
-        .content-card { border-left: 4px solid var(--info); }
-        .directions-card { border-left: 4px solid var(--success); }
-        .abstract-card { border-left: 4px solid var(--primary); }
+        if '\n\n' in text:
+            paragraphs = text.split('\n\n')
+        elif text.count('。') < 3:
+            # 单段短文本（最常见），不必分句
+            text = text.strip()
+            return f'<p>{text}</p>' if text else ''
+        else:
+            # 没有空行分段时按句号切分，每3句合为一段（完整的3句段补回句号）
+            sentences = text.split('。')
+            paragraphs = [
+                '。'.join(sentences[i:i + 3]) + ('。' if i + 3 <= len(sentences) else '')
+                for i in range(0, len(sentences), 3)
+            ]
         
-        .content-card p, .directions-card p, .abstract-card p {
-            margin-bottom: 12px;
-            text-align: justify;
-        }
+        return ''.join([f'<p>{p.strip()}</p>' for p in paragraphs if p.strip()])
+    
+    def _generate_themes_html(self, themes: List[Dict]) -> str:
+        """生成主题卡片HTML"""
+        if not themes:
+            return ''
         
-        /* Figures */
-        .figures-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(300px, 1fr));
-            gap: 20px;
-        }
+        cards = []
+        for theme in themes:
+            title_cn = theme.get('title_cn', theme.get('title', ''))
+            title_en = theme.get('title_en', '')
+            description = theme.get('description', '')
+            
+            cards.append(f'''
+            <div class="theme-card">
+                <h4>{title_cn}</h4>
+                {f'<span class="theme-en">{title_en}</span>' if title_en else ''}
+                <p>{description}</p>
+            </div>
+            ''')
         
-        .figure-item {
-            background: var(--bg-card);
-            border-radius: 10px;
-            overflow: hidden;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.05);
-        }
+        return f'<div class="themes-grid">{"".join(cards)}</div>'
+    
+    def _generate_evidence_html(self, evidence: Dict) -> str:
+        """生成研究证据HTML"""
+        if not evidence:
+            return ''
         
-        .figure-header {
-            background: var(--primary);
-            color: #fff;
-            padding: 10px 16px;
-            font-size: 14px;
-            font-weight: 600;
-        }
+        basic = evidence.get('basic_research', '')
+        clinical = evidence.get('clinical_research', '')
         
-        .figure-image {
-            padding: 16px;
-            text-align: center;
-            background: #fafafa;
-        }
+        return f'''
+        <div class="evidence-grid">
+            <div class="evidence-card basic">
+                <h4>
+                    {_SVG_GRID}
+                    基础研究证据
+                </h4>
+                <div class="evidence-content">{self._format_paragraphs(basic)}</div>
+            </div>
+            <div class="evidence-card clinical">
+                <h4>
+                    {_SVG_CLIPBOARD}
+                    临床研究证据
+                </h4>
+                <div class="evidence-content">{self._format_paragraphs(clinical)}</div>
+            </div>
+        </div>
+        '''
+    
+    def _generate_questions_html(self, questions: List[Dict]) -> str:
+        """生成未解决问题HTML"""
+        if not questions:
+            return ''
         
-        .figure-image img { 
-            max-width: 100%; 
-            height: auto; 
-            border-radius: 4px; 
-            transition: transform 0.2s ease;
-        }
+        items = []
+        for i, q in enumerate(questions, 1):
+            question = q.get('question', '')
+            strategy = q.get('strategy', '')
+            
+            items.append(f'''
+            <div class="question-item">
+                <div class="question-num">{i}</div>
+                <div class="question-content">
+                    <h4>{question}</h4>
+                    <div class="strategy">
+                        <span class="strategy-label">实验策略:</span>
+                        <p>{strategy}</p>
+                    </div>
+                </div>
+            </div>
+            ''')
         
-        .figure-link {
-            display: inline-block;
-            text-decoration: none;
-        }
+        return f'<div class="questions-list">{"".join(items)}</div>'
+    
+    def _generate_papers_list_html(self, papers: List[Dict], papers_analysis: Dict, 
+                                    detail_files: Dict[str, str]) -> str:
+        """生成论文列表HTML（detail_files 为 PMID 到详情页文件名的映射）"""
+        items = []
         
-        .figure-link:hover img {
-            transform: scale(1.02);
-            box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-        }
+        for i, paper in enumerate(papers, 1):
+            pmid = paper.get('pmid', '')
+            title = paper.get('title', '未知标题')
+            authors = paper.get('authors', [])
+            journal = paper.get('journal', '未知期刊')
+            pub_date = paper.get('pub_date', '')
+            
+            if isinstance(authors, list):
+                first_author = authors[0] if authors else '未知'
+            else:
+                first_author = str(authors)
+            
+            analysis = papers_analysis.get(pmid, {})
+            paper_themes = analysis.get('paper_themes', [])
+            themes_html = ''.join([f'<span class="mini-tag">{t}</span>' for t in paper_themes[:3]])
+            
+            detail_file = detail_files.get(pmid, '')
+            
+            if detail_file:
+                items.append(f'''
+                <a href="{detail_file}" class="paper-item">
+                    <span class="paper-num">{i}</span>
+                    <div class="paper-info">
+                        <div class="paper-title">{title}</div>
+                        <div class="paper-meta">{first_author} 等 | {journal} | {pub_date}</div>
+                        {f'<div class="paper-themes">{themes_html}</div>' if themes_html else ''}
+                    </div>
+                    {_SVG_ARROW}
+                </a>
+                ''')
+            else:
+                items.append(f'''
+                <div class="paper-item no-link">
+                    <span class="paper-num">{i}</span>
+                    <div class="paper-info">
+                        <div class="paper-title">{title}</div>
+                        <div class="paper-meta">{first_author} 等 | {journal} | {pub_date}</div>
+                    </div>
+                </div>
+                ''')
         
-        .figure-caption {
-            padding: 14px 16px;
-            font-size: 13px;
-            color: var(--text-muted);
-            border-top: 1px solid var(--border-color);
-        }
+        return f'<div class="papers-list">{"".join(items)}</div>'
+    
+    def _generate_figures_html(self, figures: List[Dict], available_images: Set[str]) -> str:
+        """生成图片展示HTML（本地图片不在 available_images 中时改用原图URL）"""
+        if not figures:
+            return ''
         
-        /* Footer */
-        footer {
-            background: var(--primary);
-            color: rgba(255,255,255,0.7);
-            padding: 20px 0;
-            text-align: center;
-            font-size: 13px;
-        }
+        figures_items = []
+        for fig in figures:
+            fig_id = escape(fig.get('figure_id', ''))
+            caption = escape(fig.get('caption', ''))
+            local_path = fig.get('local_path')
+            original_url = escape(fig.get('original_url', ''))
+            
+            if local_path and local_path in available_images:
+                # 使用相对路径，使HTML文件可以直接在文件系统中打开
+                # FinalOutput目录下的HTML需要访问 ../step3_figures/images/
+                img_path = escape(f"../step3_figures/{local_path}")
+                # 添加点击放大功能
+                img_html = f'<a href="{img_path}" target="_blank" class="figure-link"><img src="{img_path}" alt="{fig_id}" style="max-width: {self.image_width}px; cursor: pointer;" title="点击查看大图"></a>'
+            elif original_url:
+                img_html = f'<img src="{original_url}" alt="{fig_id}" style="max-width: {self.image_width}px;" onerror="this.style.display=\'none\'">'
+            else:
+                img_html = '<p class="no-image">图片不可用</p>'
+            
+            figures_items.append(f'''
+            <div class="figure-item">
+                <div class="figure-header">{fig_id}</div>
+                <div class="figure-image">{img_html}</div>
+                <div class="figure-caption">{caption}</div>
+            </div>
+            ''')
         
-        /* Responsive */
-        @media (max-width: 768px) {
-            header h1 { font-size: 20px; }
-            .paper-meta { flex-direction: column; gap: 8px; }
-            .figures-grid { grid-template-columns: 1fr; }
-        }
-        """
+        return f'''
+        <section class="section">
+            <h2 class="section-title">图片 Figures ({len(figures)})</h2>
+            <div class="figures-grid">{"".join(figures_items)}</div>
+        </section>
+        '''
 
 
 def main(project_path: str) -> bool:
@@ -1238,13 +1306,13 @@ def main(project_path: str) -> bool:
             
             # 保存到 FinalOutput（主要位置）
             output_file = os.path.join(final_output_dir, 'report_info.json')
-            file_manager.save_json(output_file, result)
+            file_manager.save_json(output_file, result, pretty=True)
             
             # 同时保存到 step6_report（兼容旧版本）
             step6_dir = os.path.join(project_path, 'step6_report')
             os.makedirs(step6_dir, exist_ok=True)
             legacy_output_file = os.path.join(step6_dir, 'report_info.json')
-            file_manager.save_json(legacy_output_file, result)
+            file_manager.save_json(legacy_output_file, result, pretty=True)
             
             logger.step_complete(6, "生成HTML报告")
             return True
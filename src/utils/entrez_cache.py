@@ -0,0 +1,206 @@
+"""
+Entrez请求磁盘缓存模块
+相同参数的 efetch/elink 请求直接读取本地缓存的XML，重复运行同一批PMID时不再访问NCBI
+"""
+import asyncio
+import hashlib
+import io
+import os
+import threading
+import time
+from typing import BinaryIO, Dict, List, Optional
+from urllib.error import HTTPError
+
+from Bio import Entrez
+
+from .config import Config
+from .logger import Logger
+from .xml_utils import iter_elements
+
+# 重试也不会成功的HTTP状态码（请求参数错误、未授权、禁止访问、不存在）
+PERMANENT_HTTP_ERRORS = frozenset((400, 401, 403, 404))
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """Entrez请求异常是否为永久性错误（此时应直接失败而不是等待重试）"""
+    return isinstance(error, HTTPError) and error.code in PERMANENT_HTTP_ERRORS
+
+
+class NcbiThrottle:
+    """
+    直接访问NCBI的HTTP请求（PDF、PMC页面、原图）的限流器，同一进程内的步骤2、步骤3共用
+
+    按每秒请求数限速：相邻两个请求的开始时间至少间隔 1/rate 秒，同时进行中的请求也不超过 rate 个
+    """
+
+    def __init__(self, rate: int):
+        self._slots = threading.BoundedSemaphore(rate)
+        self._interval = 1.0 / rate
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """预约下一个请求的开始时间，返回还需等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+        return start - now
+
+    def acquire(self) -> None:
+        """请求开始前调用（占用一个并发名额，并等到允许的开始时间）"""
+        self._slots.acquire()
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self) -> None:
+        """异步代码中请求开始前调用（只按速率等待，不占用并发名额）"""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def release(self) -> None:
+        """收到响应后调用"""
+        self._slots.release()
+
+    def __enter__(self) -> 'NcbiThrottle':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+_ncbi_throttles: Dict[int, NcbiThrottle] = {}
+_ncbi_throttles_lock = threading.Lock()
+
+
+def get_ncbi_throttle(config: Config) -> NcbiThrottle:
+    """
+    返回进程内共享的NCBI限流器
+
+    NCBI限制无api_key约3次/秒、有api_key约10次/秒；各步骤取得的是同一个实例，
+    并行执行时合计的请求数也不会超出限制
+    """
+    limit = 10 if config.get('pubmed', 'api_key', '') else 3
+    with _ncbi_throttles_lock:
+        throttle = _ncbi_throttles.get(limit)
+        if throttle is None:
+            throttle = _ncbi_throttles[limit] = NcbiThrottle(limit)
+    return throttle
+
+
+class EntrezCache:
+    """按请求参数哈希缓存 Entrez.efetch / Entrez.elink 的响应"""
+
+    def __init__(self, config: Config):
+        cache_root = config.get('basic', 'cache_dir', './cache')
+        self.cache_dir = os.path.join(cache_root, 'entrez')
+        # 缓存有效期（天），0 表示禁用缓存
+        self.ttl = config.get_float('pubmed', 'entrez_cache_days', 7) * 86400
+        self.retry_attempts = config.get_int('pubmed', 'retry_attempts', 3)
+        self.retry_delay = config.get_int('pubmed', 'retry_delay', 2)
+
+    def efetch(self, **params) -> BinaryIO:
+        """带缓存的 Entrez.efetch，参数与原函数一致"""
+        return self._call('efetch', params)
+
+    def elink(self, **params) -> BinaryIO:
+        """带缓存的 Entrez.elink，参数与原函数一致"""
+        return self._call('elink', params)
+
+    def fetch_pmcids(self, pmids: List[str], logger: Logger) -> Dict[str, Optional[str]]:
+        """
+        通过一次elink请求批量获取PMCID（步骤2、步骤3共用）
+
+        id 以列表传入：Biopython 会将其编码为多个 id 参数，每个PMID各返回一个LinkSet
+        （拼接成逗号分隔的字符串则所有PMID合并为一个LinkSet，无法对应到单篇论文）
+
+        Args:
+            pmids: PMID列表
+            logger: 记录重试警告的日志器
+
+        Returns:
+            Dict: {pmid: 'PMCxxxxxxx' 或 None}，请求失败时所有PMID均为None
+        """
+        for attempt in range(self.retry_attempts):
+            try:
+                handle = self.elink(dbfrom="pubmed", db="pmc", id=pmids, linkname="pubmed_pmc")
+                pmcid_map = {}
+                try:
+                    for record in iter_elements(handle, 'LinkSet'):
+                        pmid = record.findtext('IdList/Id', '')
+                        pmcid = None
+                        for linkset in record.iterfind('LinkSetDb'):
+                            if linkset.findtext('LinkName') == 'pubmed_pmc':
+                                pmc_id = linkset.findtext('Link/Id')
+                                if pmc_id:
+                                    pmcid = f"PMC{pmc_id}"
+                                break
+                        pmcid_map[pmid] = pmcid
+                finally:
+                    handle.close()
+                return pmcid_map
+            except Exception as e:
+                logger.warning(f"获取PMC链接尝试 {attempt + 1}/{self.retry_attempts} 失败: {str(e)}")
+                if is_permanent_error(e):
+                    break
+                if attempt < self.retry_attempts - 1:
+                    time.sleep(self.retry_delay)
+
+        return {pmid: None for pmid in pmids}
+
+    @staticmethod
+    def _cache_key(func_name: str, params: dict) -> str:
+        """
+        由函数名和参数生成缓存键（参数名排序）
+
+        ID列表保持原顺序：efetch 按请求的ID顺序返回记录，顺序不同的请求不能共用缓存，
+        否则步骤1的相关性排序会变成首次请求时的顺序
+        """
+        parts = [func_name]
+        for key in sorted(params):
+            value = params[key]
+            if isinstance(value, set):
+                # 集合本身无序，排序后得到确定的键
+                value = sorted(str(v) for v in value)
+            if isinstance(value, (list, tuple)):
+                value = ','.join(str(v) for v in value)
+            parts.append(f"{key}={value}")
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def _call(self, func_name: str, params: dict) -> BinaryIO:
+        """命中且未过期时返回缓存文件，否则请求NCBI并写入缓存"""
+        if self.ttl <= 0:
+            return getattr(Entrez, func_name)(**params)
+
+        path = os.path.join(self.cache_dir, self._cache_key(func_name, params) + '.xml')
+        try:
+            if time.time() - os.path.getmtime(path) < self.ttl:
+                return open(path, 'rb')
+        except OSError:
+            pass
+
+        handle = getattr(Entrez, func_name)(**params)
+        try:
+            data = handle.read()
+        finally:
+            handle.close()
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        # 只缓存完整且不含错误信息的响应，避免把截断或报错的结果缓存下来
+        if data.rstrip().endswith(b'>') and b'<ERROR>' not in data:
+            # 先写临时文件再替换，并发请求同一键时不会读到写了一半的缓存
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        return io.BytesIO(data)
@@ -3,19 +3,77 @@
 """
 import os
 import json
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
 from .config import Config
 from .logger import Logger
 
+# orjson（可选）：C扩展，直接输出UTF-8字节，读写速度明显快于标准库json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _dumps(data, pretty: bool = False) -> bytes:
+    """序列化为UTF-8编码的JSON字节（保留非ASCII字符；pretty为True时缩进2空格）"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _loads(raw: bytes):
+    """从UTF-8编码的JSON字节反序列化"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
+
+
+def _read_only_view(data):
+    """
+    共享的解析结果交给调用方前的只读视图：顶层为只读映射，顶层的列表/字典（如 papers）为本次调用各自的浅拷贝
+    
+    只复制顶层容器（指针复制，不深拷贝）；其中的论文记录等更深层的对象仍与缓存共享
+    """
+    if isinstance(data, dict):
+        return MappingProxyType({
+            key: value.copy() if isinstance(value, (list, dict)) else value
+            for key, value in data.items()
+        })
+    if isinstance(data, list):
+        return data.copy()
+    return data
+
 
 class FileManager:
+    # list_projects 使用的项目总结缓存：summary文件路径 -> ((mtime_ns, size), summary)
+    # 定义为类属性，Web端每次请求新建 FileManager 时也能复用
+    _project_cache: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+    
+    # load_json(cached=True) 的解析结果缓存：文件路径 -> ((mtime_ns, size), data)，只保留最近使用的 _JSON_CACHE_SIZE 个
+    # 同一进程中多个步骤读取同一文件（如 papers_details.json）时只解析一次
+    _json_cache: 'OrderedDict[str, Tuple[Tuple[int, int], Any]]' = OrderedDict()
+    _json_cache_lock = threading.Lock()
+    _JSON_CACHE_SIZE = 8
+    
     def __init__(self, config: Config, logger: Optional[Logger] = None):
         self.config = config
         self.logger = logger or Logger("file_manager")
         self.output_dir = config.get('basic', 'output_dir', './projects')
         self.cache_dir = config.get('basic', 'cache_dir', './cache')
         
+        # 记录每个 project_summary.json 最近一次写入的内容（不含 last_updated），内容未变化时跳过写盘
+        self._last_summary_content: Dict[str, Dict] = {}
+        
         # 确保目录存在
         self._ensure_directories()
     
@@ -75,26 +133,165 @@ class FileManager:
             os.makedirs(step_dir)
         return step_dir
     
-    def save_json(self, file_path: str, data: Dict) -> str:
-        """保存JSON文件"""
+    def save_json(self, file_path: str, data: Dict, pretty: bool = False,
+                  atomic: bool = False) -> str:
+        """
+        保存JSON文件
+        
+        中间结果只供程序读取，默认输出紧凑格式；面向人阅读的文件传 pretty=True。
+        atomic=True 时先写临时文件再替换，适用于跨运行复用的缓存文件
+        """
+        if atomic:
+            self._write_atomic(file_path, _dumps(data, pretty))
+            self.logger.file_created(file_path)
+            return file_path
+        
         # 确保目录存在
         dir_path = os.path.dirname(file_path)
         if dir_path and not os.path.exists(dir_path):
             os.makedirs(dir_path)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(file_path, 'wb') as f:
+            f.write(_dumps(data, pretty))
         
         self.logger.file_created(file_path)
         return file_path
     
-    def load_json(self, file_path: str) -> Dict:
-        """加载JSON文件"""
+    def save_json_stream(self, file_path: str, header: Dict, array_key: str,
+                         iterator: Iterable, trailer: Optional[Callable[[], Dict]] = None) -> int:
+        """
+        流式保存JSON文件：逐条序列化数组元素，不在内存中拼出完整结果
+        
+        输出形如 {"header字段...","array_key":[rec1,rec2,...],"trailer字段..."}
+        
+        Args:
+            file_path: 文件路径
+            header: 数组之前写入的字段
+            array_key: 数组字段名
+            iterator: 逐条产出记录的迭代器
+            trailer: 迭代结束后调用，返回追加在数组之后的字段（如统计信息）
+        
+        Returns:
+            int: 写入的记录数
+        """
+        dir_path = os.path.dirname(file_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        
+        # 写入临时文件，迭代中途出错时不覆盖已有的结果文件
+        tmp_path = file_path + '.tmp'
+        count = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(b'{')
+                for key, value in header.items():
+                    f.write(_dumps(key) + b':' + _dumps(value) + b',')
+                f.write(_dumps(array_key) + b':[')
+                for record in iterator:
+                    if count:
+                        f.write(b',')
+                    f.write(_dumps(record))
+                    count += 1
+                f.write(b']')
+                if trailer:
+                    for key, value in trailer().items():
+                        f.write(b',' + _dumps(key) + b':' + _dumps(value))
+                f.write(b'}')
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        self.logger.file_created(file_path)
+        return count
+
+    def load_json(self, file_path: str, cached: bool = False) -> Dict:
+        """
+        加载JSON文件
+        
+        Args:
+            file_path: 文件路径
+            cached: 为True时文件未变化（修改时间、大小相同）则复用上次解析的结果，返回其只读视图
+                    （见 _read_only_view）：顶层不能修改，papers 等顶层列表可以修改，其中的记录仍不能修改
+        """
+        if cached:
+            return self._load_json_cached(file_path)
+        
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"文件不存在: {file_path}")
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        # 整体读入后再解析（不使用内存映射：其他进程同时原地重写该文件时，映射的内容被截断会导致进程崩溃）
+        with open(file_path, 'rb') as f:
+            return _loads(f.read())
+    
+    def _load_json_cached(self, file_path: str) -> Mapping[str, Any]:
+        """带缓存的 load_json，见 load_json 的 cached 参数"""
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"文件不存在: {file_path}")
+        key = (st.st_mtime_ns, st.st_size)
+        
+        with self._json_cache_lock:
+            entry = self._json_cache.get(file_path)
+            if entry and entry[0] == key:
+                self._json_cache.move_to_end(file_path)
+                return _read_only_view(entry[1])
+        
+        data = self.load_json(file_path)
+        with self._json_cache_lock:
+            self._json_cache[file_path] = (key, data)
+            self._json_cache.move_to_end(file_path)
+            while len(self._json_cache) > self._JSON_CACHE_SIZE:
+                self._json_cache.popitem(last=False)
+        return _read_only_view(data)
+    
+    def append_jsonl(self, file_path: str, record: Dict) -> None:
+        """
+        向JSON Lines文件追加一条记录并立即落盘（用于逐条记录进度，进程中断后可从已写入的记录恢复）
+        
+        Args:
+            file_path: 文件路径
+            record: 要追加的记录
+        """
+        with open(file_path, 'ab') as f:
+            self.write_jsonl(f, record)
+    
+    def write_jsonl(self, f: BinaryIO, record: Dict) -> None:
+        """
+        向已打开的JSON Lines文件写入一条记录（由调用方打开和关闭文件，连续写入多条记录时共用同一个缓冲写入流）
+        
+        Args:
+            f: 以二进制模式打开的文件对象
+            record: 要写入的记录
+        """
+        f.write(_dumps(record) + b'\n')
+    
+    def load_jsonl(self, file_path: str) -> List[Dict]:
+        """
+        读取JSON Lines文件（文件不存在时返回空列表；中断写入留下的不完整行会被跳过）
+        
+        Args:
+            file_path: 文件路径
+        
+        Returns:
+            List[Dict]: 记录列表（按写入顺序）
+        """
+        if not os.path.exists(file_path):
+            return []
+        
+        records = []
+        with open(file_path, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(_loads(line))
+                except ValueError:
+                    continue
+        return records
     
     def save_step_info(self, project_path: str, step_name: str, info: Dict) -> str:
         """保存步骤信息到JSON文件"""
@@ -140,54 +337,96 @@ class FileManager:
         return {}
     
     def update_project_summary(self, project_path: str, summary: Dict) -> str:
-        """更新项目总结信息"""
+        """更新项目总结信息（内存中序列化后原子替换，内容未变化时不写盘）"""
         summary_file = os.path.join(project_path, 'project_summary.json')
         
+        content = {k: v for k, v in summary.items() if k != 'last_updated'}
+        if self._last_summary_content.get(summary_file) == content:
+            return summary_file
+        
         # 添加更新时间
         summary['last_updated'] = datetime.now().isoformat()
         
-        return self.save_json(summary_file, summary)
+        self._write_atomic(summary_file, _dumps(summary, pretty=True))
+        self._last_summary_content[summary_file] = content
+        
+        self.logger.file_created(summary_file)
+        return summary_file
+    
+    def _write_atomic(self, file_path: str, data: bytes) -> None:
+        """先写临时文件再 os.replace，避免崩溃时留下写了一半的文件"""
+        dir_path = os.path.dirname(file_path)
+        if dir_path and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, file_path)
     
     def list_projects(self) -> List[Dict]:
-        """列出所有项目"""
+        """
+        列出所有项目
+        
+        使用 os.scandir 遍历，project_summary.json 按 (mtime, size) 缓存解析结果，
+        未变化的项目不再重复读取JSON
+        """
         projects = []
         
         if not os.path.exists(self.output_dir):
             return projects
         
-        for item in os.listdir(self.output_dir):
-            item_path = os.path.join(self.output_dir, item)
-            if os.path.isdir(item_path):
-                # 检查是否是有效的项目目录（包含project_summary.json或step1_search）
-                summary_file = os.path.join(item_path, 'project_summary.json')
-                step1_dir = os.path.join(item_path, 'step1_search')
+        with os.scandir(self.output_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
                 
-                if not os.path.exists(summary_file) and not os.path.exists(step1_dir):
+                summary = self._get_cached_summary(entry.path)
+                if summary is None:
                     continue  # 跳过非项目目录
                 
-                project_info = {
-                    'name': item,
-                    'path': item_path,
-                    'created_time': datetime.fromtimestamp(
-                        os.path.getctime(item_path)
-                    ).isoformat(),
-                    'modified_time': datetime.fromtimestamp(
-                        os.path.getmtime(item_path)
-                    ).isoformat(),
-                    'summary': {}
-                }
-                
-                # 尝试读取项目总结
-                summary = self.get_project_summary(item_path)
-                if summary:
-                    project_info['summary'] = summary
-                
-                projects.append(project_info)
+                st = entry.stat()
+                projects.append({
+                    'name': entry.name,
+                    'path': entry.path,
+                    'status': summary.get('status', '未知'),
+                    'search_query': summary.get('search_query', ''),
+                    'current_step': summary.get('current_step', 0),
+                    'created_time': datetime.fromtimestamp(st.st_ctime).isoformat(),
+                    'modified_time': datetime.fromtimestamp(st.st_mtime).isoformat(),
+                    'summary': summary
+                })
         
         # 按修改时间排序
         projects.sort(key=lambda x: x['modified_time'], reverse=True)
         return projects
     
+    def _get_cached_summary(self, project_path: str) -> Optional[Dict]:
+        """
+        读取项目总结（按文件 mtime/size 缓存）
+        
+        Returns:
+            Optional[Dict]: 项目总结；无总结文件但有 step1_search 时返回空字典，非项目目录返回None
+        """
+        summary_file = os.path.join(project_path, 'project_summary.json')
+        try:
+            st = os.stat(summary_file)
+        except FileNotFoundError:
+            self._project_cache.pop(summary_file, None)
+            return {} if os.path.isdir(os.path.join(project_path, 'step1_search')) else None
+        
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._project_cache.get(summary_file)
+        if cached and cached[0] == key:
+            return cached[1]
+        
+        try:
+            summary = self.load_json(summary_file)
+        except (OSError, ValueError):
+            summary = {}
+        self._project_cache[summary_file] = (key, summary)
+        return summary
+    
     def get_step_files(self, project_path: str, step_name: str) -> List[Dict]:
         """获取步骤的所有文件"""
         step_dir = self.get_step_directory(project_path, step_name)
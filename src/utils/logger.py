@@ -3,7 +3,11 @@
 """
 import logging
 import os
+import sys
+import threading
+import time
 from datetime import datetime
+from typing import Optional
 from colorama import init, Fore, Style
 
 # 初始化colorama
@@ -11,10 +15,23 @@ init()
 
 
 class Logger:
+    # 进度条最小刷新间隔（秒）
+    PROGRESS_INTERVAL = 0.05
+    # 占用进度行的任务超过该时间（秒）没有更新时，其他任务可以接管进度行
+    PROGRESS_OWNER_TIMEOUT = 1.0
+    
     def __init__(self, name: str, log_dir: str = "logs"):
         self.name = name
         self.log_dir = log_dir
         self.logger = self._setup_logger()
+        
+        # 进度条限频状态
+        self._last_progress_ts = 0.0
+        self._progress_isatty = sys.stdout.isatty()
+        # 多个任务同时输出进度（如并行执行步骤2、3）时，进度行由一个任务占用到其完成或长时间没有更新
+        self._progress_lock = threading.Lock()
+        self._progress_owner: Optional[str] = None
+        self._progress_owner_ts = 0.0
     
     def _setup_logger(self) -> logging.Logger:
         """设置日志记录器"""
@@ -84,24 +101,44 @@ class Logger:
         self.logger.error(message, exc_info=exc_info)
         print(colored_message)
     
-    def progress(self, current: int, total: int, message: str = "") -> None:
-        """记录进度信息"""
+    def progress(self, current: int, total: int, message: str = "", task: str = "") -> None:
+        """
+        记录进度信息
+        
+        刷新频率限制在约20Hz，每次只写一次终端；输出不是终端时（重定向到文件/管道）只输出最终进度。
+        多个任务（task）同时输出进度时只刷新占用进度行的任务的中间进度，占用者长时间没有更新前其他任务只输出最终进度
+        """
+        finished = current >= total
+        with self._progress_lock:
+            if finished:
+                if self._progress_owner == task:
+                    self._progress_owner = None
+            else:
+                if not self._progress_isatty:
+                    return
+                now = time.monotonic()
+                if (self._progress_owner not in (None, task)
+                        and now - self._progress_owner_ts < self.PROGRESS_OWNER_TIMEOUT):
+                    return
+                self._progress_owner = task
+                self._progress_owner_ts = now
+                if now - self._last_progress_ts < self.PROGRESS_INTERVAL:
+                    return
+                self._last_progress_ts = now
+            self._write_progress(current, total, message, finished)
+    
+    def _write_progress(self, current: int, total: int, message: str, finished: bool) -> None:
+        """输出一行进度（完成时换行）"""
+        percentage = (current / total) * 100 if total > 0 else 0
+        end = "\n" if finished else ""
         try:
-            percentage = (current / total) * 100 if total > 0 else 0
             progress_bar = self._create_progress_bar(percentage)
             progress_message = f"{progress_bar} {current}/{total} ({percentage:.1f}%) {message}"
-            colored_message = f"{Fore.CYAN}{progress_message}{Style.RESET_ALL}"
-            print(f"\r{colored_message}", end="", flush=True)
-            
-            if current >= total:
-                print()  # 换行
+            sys.stdout.write(f"\r{Fore.CYAN}{progress_message}{Style.RESET_ALL}{end}")
         except UnicodeEncodeError:
             # 如果编码失败，使用简单的进度显示
-            percentage = (current / total) * 100 if total > 0 else 0
-            simple_message = f"Progress: {current}/{total} ({percentage:.1f}%) {message}"
-            print(f"\r{simple_message}", end="", flush=True)
-            if current >= total:
-                print()
+            sys.stdout.write(f"\rProgress: {current}/{total} ({percentage:.1f}%) {message}{end}")
+        sys.stdout.flush()
     
     def _create_progress_bar(self, percentage: float, width: int = 20) -> str:
         """创建进度条"""
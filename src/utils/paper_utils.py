@@ -0,0 +1,70 @@
+"""
+论文信息格式化工具模块
+"""
+import os
+from typing import Dict, Iterable, Set
+
+# 显示的作者数上限（Step 1 也只保存这么多位作者的姓名）
+DISPLAY_AUTHORS = 5
+
+
+def format_authors(paper: Dict) -> str:
+    """
+    格式化作者列表：前 DISPLAY_AUTHORS 位作者，超出时注明作者总数
+
+    Args:
+        paper: 论文信息（authors 只保留前几位，author_count 为作者总数）
+
+    Returns:
+        str: 如 "A, B, C, D, E 等（共12位作者）"
+    """
+    authors = paper.get('authors', [])
+    if not isinstance(authors, list):
+        return str(authors)
+    authors_str = ', '.join(authors[:DISPLAY_AUTHORS])
+    author_count = paper.get('author_count', len(authors))
+    if author_count > DISPLAY_AUTHORS:
+        authors_str += f' 等（共{author_count}位作者）'
+    return authors_str
+
+
+def list_existing_files(base_dir: str, rel_paths: Iterable[str]) -> Set[str]:
+    """
+    列出相对路径中实际存在的文件（每个目录只 scandir 一次，代替逐个 os.path.exists）
+
+    Args:
+        base_dir: 相对路径的基准目录
+        rel_paths: 以 '/' 分隔的相对路径
+
+    Returns:
+        Set[str]: 存在的相对路径（与传入的写法一致）
+    """
+    subdirs = {os.path.dirname(path) for path in rel_paths if path}
+    existing = set()
+    for subdir in subdirs:
+        try:
+            with os.scandir(os.path.join(base_dir, subdir)) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        existing.add(f"{subdir}/{entry.name}" if subdir else entry.name)
+        except OSError:
+            continue
+    return existing
+
+
+def list_fulltext_files(step2_dir: str, papers: Iterable[Dict]) -> Set[str]:
+    """
+    列出论文全文文件中实际存在的那些
+
+    Args:
+        step2_dir: Step 2 输出目录（fulltext_path 相对于该目录）
+        papers: 论文信息列表
+
+    Returns:
+        Set[str]: 存在的 fulltext_path（与论文中记录的写法一致）
+    """
+    return list_existing_files(step2_dir, (
+        paper['fulltext_path']
+        for paper in papers
+        if paper.get('fulltext_status', '') == 'success' and paper.get('fulltext_path')
+    ))
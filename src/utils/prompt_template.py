@@ -0,0 +1,85 @@
+"""
+Prompt模板模块
+模板在加载时解析一次，为每篇论文填充时只做字符串拼接，不再重复解析模板
+"""
+import os
+import string
+from collections.abc import Iterator as IteratorABC
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 模板文件内容缓存：路径 -> ((mtime_ns, size), 内容)。多个生成器、多次运行共用，文件修改后自动重新读取
+_template_cache: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+def read_template(paths: List[str]) -> Optional[str]:
+    """
+    按顺序查找第一个存在的模板文件，返回其内容
+
+    Args:
+        paths: 候选路径列表
+
+    Returns:
+        Optional[str]: 模板内容，所有路径都不存在时返回None
+    """
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        key = (st.st_mtime_ns, st.st_size)
+        cached = _template_cache.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        _template_cache[path] = (key, content)
+        return content
+    return None
+
+
+class PromptTemplate:
+    """预解析的 str.format 模板，format() 的结果与 str.format 一致"""
+
+    def __init__(self, template: str):
+        self.template = template
+        # [(字面文本, 字段名)]，字段名为None表示模板末尾只剩字面文本；{{ }} 已还原为单个花括号
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        # 只含 {name} 形式的字段时直接拼接；带格式说明、转换或位置参数时交给 str.format
+        self._simple = True
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+            if field_name is not None and (format_spec or conversion or not field_name.isidentifier()):
+                self._simple = False
+            self._parts.append((literal, field_name))
+
+    def format(self, **values) -> str:
+        """填充模板"""
+        if not self._simple:
+            return self.template.format(**values)
+        return ''.join(self.format_parts(**values))
+
+    def format_parts(self, **values) -> List[str]:
+        """
+        填充模板，返回按顺序拼接即为结果的字符串片段（不生成完整的结果字符串）
+
+        值为列表时视为已分段的内容，各片段直接展开，用于论文内容等大段文本
+        """
+        return list(self.iter_parts(**values))
+
+    def iter_parts(self, **values) -> Iterator[str]:
+        """
+        同 format_parts，但逐个产出片段；值也可以是迭代器（如生成器），产出到该字段时才从中取片段，
+        可边生成边写文件。迭代器只能使用一次，对应字段在模板中应只出现一次
+        """
+        if not self._simple:
+            joined = {key: ''.join(value) if isinstance(value, (list, IteratorABC)) else value
+                      for key, value in values.items()}
+            yield self.template.format(**joined)
+            return
+        for literal, field_name in self._parts:
+            yield literal
+            if field_name is not None:
+                value = values[field_name]
+                if isinstance(value, (list, IteratorABC)):
+                    yield from value
+                else:
+                    yield format(value)
@@ -0,0 +1,65 @@
+"""
+XML流式解析工具模块
+用于解析Entrez返回的XML（efetch/elink），逐条产出记录并及时释放已处理的节点
+"""
+from typing import Callable, Iterator, List, Optional
+
+# lxml（C实现，解析更快）；未安装时回退到标准库 ElementTree，两者接口在此处用法上一致
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    import xml.etree.ElementTree as etree
+    LXML_AVAILABLE = False
+
+
+def iter_elements(source, tag: str) -> Iterator:
+    """
+    流式解析XML，逐个产出指定标签的元素
+
+    调用方处理完当前元素后，已解析的节点会被清除，内存占用与记录数无关
+
+    Args:
+        source: 文件对象（如 Entrez.efetch 返回的 handle）或文件路径
+        tag: 要产出的元素标签，如 'PubmedArticle'
+
+    Yields:
+        Element: 匹配的XML元素
+    """
+    root = None
+    for event, elem in etree.iterparse(source, events=('start', 'end')):
+        if root is None:
+            root = elem
+        if event == 'end' and elem.tag == tag:
+            yield elem
+            # 清除根节点下已处理的子节点
+            root.clear()
+
+
+def element_text(elem) -> str:
+    """获取元素的全部文本（包含 <i>、<sup> 等内嵌标签中的文本）"""
+    if elem is None:
+        return ''
+    return ''.join(elem.itertext())
+
+
+def compile_path(path: str) -> Callable[[object], List]:
+    """
+    预编译元素路径表达式（模块加载时调用一次）
+
+    lxml 下编译为 XPath，匹配在C中完成；标准库下退化为 findall。
+    path 只能使用两者都支持的语法（子元素路径和 [@attr='value']、[tag] 谓词）
+
+    Returns:
+        Callable: 接收元素、返回匹配元素列表的函数
+    """
+    if LXML_AVAILABLE:
+        return etree.XPath(path)
+    return lambda elem: elem.findall(path)
+
+
+def first_text(nodes: List, default: Optional[str] = '') -> Optional[str]:
+    """返回匹配结果中第一个元素的文本，与 findtext 行为一致（无匹配返回 default，无文本返回空串）"""
+    if not nodes:
+        return default
+    return nodes[0].text or ''
@@ -2,6 +2,10 @@
 import sys
 sys.path.insert(0, '.')
 
+import io
+import os
+import tempfile
+
 from src.core.steps.step1_search_pubmed import PubMedSearcher
 from src.utils.config import Config
 from src.utils.logger import Logger
@@ -27,7 +31,106 @@ def test_search():
             print(f"   日期: {paper['pub_date']}")
             print(f"   作者: {', '.join(paper['authors'][:3])}...")
 
+
+_ARTICLES_XML = b"""<?xml version="1.0"?>
+<PubmedArticleSet>
+<PubmedArticle>
+  <MedlineCitation>
+    <PMID Version="1">101</PMID>
+    <Article>
+      <Journal>
+        <JournalIssue><PubDate><Year>2019</Year><Month>Jan</Month></PubDate></JournalIssue>
+        <Title>Nature Medicine</Title>
+        <ISOAbbreviation>Nat Med</ISOAbbreviation>
+      </Journal>
+      <ArticleTitle>PD-1 blockade in <i>KRAS</i>-mutant tumours</ArticleTitle>
+      <Abstract>
+        <AbstractText Label="BACKGROUND">Some <sup>2</sup> context.</AbstractText>
+        <AbstractText Label="RESULTS">Tumours shrank.</AbstractText>
+      </Abstract>
+      <AuthorList>
+        <Author><LastName>Li</LastName><ForeName>Wei</ForeName></Author>
+        <Author><CollectiveName>Study Group</CollectiveName></Author>
+        <Author><LastName>Wang</LastName><ForeName>Fang</ForeName></Author>
+        <Author><LastName>Zhang</LastName></Author>
+        <Author><LastName>Chen</LastName><ForeName>Jie</ForeName></Author>
+        <Author><LastName>Liu</LastName><ForeName>Yang</ForeName></Author>
+        <Author><LastName>Zhao</LastName><ForeName>Lei</ForeName></Author>
+      </AuthorList>
+      <ArticleDate DateType="Electronic"><Year>2018</Year><Month>12</Month><Day>03</Day></ArticleDate>
+    </Article>
+  </MedlineCitation>
+  <PubmedData>
+    <ArticleIdList>
+      <ArticleId IdType="pubmed">101</ArticleId>
+      <ArticleId IdType="doi">10.1038/s41591-018-0001-1</ArticleId>
+    </ArticleIdList>
+  </PubmedData>
+</PubmedArticle>
+<PubmedArticle>
+  <MedlineCitation>
+    <PMID Version="1">102</PMID>
+    <Article>
+      <Journal>
+        <JournalIssue><PubDate><Year>2020</Year></PubDate></JournalIssue>
+        <ISOAbbreviation>J Immunol</ISOAbbreviation>
+      </Journal>
+      <ArticleTitle>Short report</ArticleTitle>
+      <Abstract><AbstractText>Plain abstract.</AbstractText></Abstract>
+    </Article>
+  </MedlineCitation>
+</PubmedArticle>
+</PubmedArticleSet>
+"""
+
+
+class _FakeEntrez:
+    """代替 EntrezCache，efetch 返回固定的XML"""
+    
+    def efetch(self, **params):
+        return io.BytesIO(_ARTICLES_XML)
+
+
+def test_parse_articles():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_path = os.path.join(tmp_dir, 'config.ini')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            f.write(f"[basic]\noutput_dir = {tmp_dir}\ncache_dir = {tmp_dir}\n")
+        searcher = PubMedSearcher(Config(config_path), Logger('test'))
+        searcher.entrez = _FakeEntrez()
+        
+        papers = searcher._fetch_basic_info(['101', '102'])
+    
+    assert papers == [
+        {
+            'pmid': '101',
+            # 内嵌标签中的文本保留
+            'title': 'PD-1 blockade in KRAS-mutant tumours',
+            'abstract': 'BACKGROUND: Some 2 context. RESULTS: Tumours shrank.',
+            # 只保留前5位有姓氏的作者，团体作者不计入
+            'authors': ['Li Wei', 'Wang Fang', 'Zhang', 'Chen Jie', 'Liu Yang'],
+            'author_count': 6,
+            'journal': 'Nature Medicine',
+            # 优先使用 ArticleDate
+            'pub_date': '2018-12',
+            'doi': '10.1038/s41591-018-0001-1',
+        },
+        {
+            'pmid': '102',
+            'title': 'Short report',
+            'abstract': 'Plain abstract.',
+            'authors': [],
+            'author_count': 0,
+            # 缺少期刊全称时使用缩写，缺少 ArticleDate 时使用 PubDate
+            'journal': 'J Immunol',
+            'pub_date': '2020',
+            'doi': None,
+        },
+    ]
+
+
 if __name__ == '__main__':
+    test_parse_articles()
     test_search()
 
 
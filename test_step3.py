@@ -2,6 +2,10 @@
 import sys
 sys.path.insert(0, '.')
 
+import os
+import tempfile
+
+from src.core.steps import step3_fetch_figures
 from src.core.steps.step3_fetch_figures import PMCFigureFetcher
 from src.utils.config import Config
 from src.utils.logger import Logger
@@ -28,7 +32,73 @@ def test_figure_fetch():
             for fig in paper.get('figures', []):
                 print(f"    - {fig['figure_id']}: {fig['local_path']}")
 
+
+_PAGE_HTML = """<html><body><div class="article">
+<figure class="fig" id="F1"><img src="/pmc/articles/PMC1/bin/f1.jpg">
+  <figcaption><b>Figure 1.</b> Tumour growth.</figcaption></figure>
+<div class="fig xbox" id="F2"><img data-src="https://cdn.ncbi.nlm.nih.gov/f2.png">
+  <div class="caption"><p>Figure 2.</p><p> Survival.</p></div></div>
+<div class="sidebar"><img src="/logo.png"></div>
+<div id="fig3"><div class="fig-caption">Caption only</div></div>
+<figure class="fig"><img src="/f4.jpg"></figure>
+<div class="note" id="Footnote"></div>
+<figure class="fig" id="F6"><img src="/f6.jpg"></figure>
+</div></body></html>"""
+
+
+class _FakeResponse:
+    status_code = 200
+    text = _PAGE_HTML
+    content = _PAGE_HTML.encode('utf-8')
+    
+    def raise_for_status(self):
+        pass
+
+
+class _FakeHttp:
+    """代替 requests.Session，返回固定的PMC页面并记录请求次数"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return _FakeResponse()
+
+
+def test_parse_page_figures():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_path = os.path.join(tmp_dir, 'config.ini')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            f.write(f"[basic]\noutput_dir = {tmp_dir}\ncache_dir = {tmp_dir}\n\n"
+                    f"[pmc]\nmax_figures_per_paper = 5\n")
+        fetcher = PMCFigureFetcher(Config(config_path), Logger('test'))
+    fetcher.http = _FakeHttp()
+    
+    expected = [
+        {'figure_id': 'F1', 'caption': 'Figure 1.Tumour growth.',
+         'img_url': 'https://www.ncbi.nlm.nih.gov/pmc/articles/PMC1/bin/f1.jpg'},
+        {'figure_id': 'F2', 'caption': 'Figure 2.Survival.', 'img_url': 'https://cdn.ncbi.nlm.nih.gov/f2.png'},
+        {'figure_id': 'fig3', 'caption': 'Caption only', 'img_url': ''},
+        # 没有id的figure按序号命名；既无图片也无caption的元素不保留；最多取前 max_figures 个元素
+        {'figure_id': 'fig4', 'caption': '', 'img_url': 'https://www.ncbi.nlm.nih.gov/f4.jpg'},
+    ]
+    assert fetcher._parse_page_figures('PMC1') == expected
+    # 同一页面只请求一次
+    assert fetcher._parse_page_figures('PMC1') == expected
+    assert fetcher.http.calls == 1
+    
+    # lxml 与 BeautifulSoup 两种解析结果一致
+    if step3_fetch_figures.LXML_AVAILABLE:
+        try:
+            import bs4
+        except ImportError:
+            return
+        assert fetcher._select_figures_lxml(_FakeResponse.content) == fetcher._select_figures_bs4(_FakeResponse.text)
+
+
 if __name__ == '__main__':
+    test_parse_page_figures()
     test_figure_fetch()
 
 
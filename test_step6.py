@@ -0,0 +1,104 @@
+"""测试Step 6: 报告文件名与段落格式化"""
+import sys
+sys.path.insert(0, '.')
+
+import os
+import re
+import tempfile
+
+from src.core.steps.step6_generate_report import ReportGenerator
+from src.utils.config import Config
+from src.utils.logger import Logger
+
+
+def _make_generator(tmp_dir):
+    """在临时目录中生成测试用配置文件并创建报告生成器"""
+    config_path = os.path.join(tmp_dir, 'config.ini')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write(f"[basic]\noutput_dir = {tmp_dir}\ncache_dir = {tmp_dir}\n")
+    return ReportGenerator(Config(config_path), Logger('test'))
+
+
+def _reference_slug(title):
+    """原正则实现，作为 _generate_slug 的对照"""
+    slug = re.sub(r'[^\w\s-]', '', title.lower())
+    slug = re.sub(r'[-\s]+', '_', slug)
+    return slug[:50]
+
+
+def _reference_paragraphs(text):
+    """原逐句拼接实现，作为 _format_paragraphs 的对照"""
+    if not text:
+        return '<p>内容待生成...</p>'
+    
+    paragraphs = text.split('\n\n')
+    if len(paragraphs) == 1:
+        paragraphs = text.split('。')
+        if len(paragraphs) > 3:
+            chunks = []
+            current = []
+            for p in paragraphs:
+                current.append(p)
+                if len(current) >= 3:
+                    chunks.append('。'.join(current) + '。')
+                    current = []
+            if current:
+                chunks.append('。'.join(current))
+            paragraphs = chunks
+        else:
+            paragraphs = [text]
+    
+    return ''.join([f'<p>{p.strip()}</p>' for p in paragraphs if p.strip()])
+
+
+def test_generate_slug():
+    titles = [
+        # ASCII标题走 str.translate 快速路径
+        'CRISPR-Cas9: a new tool?',
+        'Tumour <micro>environment & T-cells',
+        '  leading and trailing  ',
+        'x_y  --  z',
+        '---',
+        '   ',
+        '',
+        'A' * 80,
+        'tab\tand\nnewline\x0bvt',
+        'under_score-and - dash',
+        # 非ASCII标题走正则路径
+        '单细胞 RNA-seq 分析',
+        'Ångström résumé',
+        'β-catenin — Wnt signalling: a review?',
+        '  前后 空白  ',
+        'é' * 80,
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        generator = _make_generator(tmp_dir)
+        for title in titles:
+            assert generator._generate_slug(title) == _reference_slug(title), title
+
+
+def test_format_paragraphs():
+    texts = [
+        '',
+        '单句。',
+        '一。二。三',
+        '一。二。三。',
+        '一。二。三。四',
+        '一。二。三。四。五。六。',
+        '一。二。三。四。五。六。七',
+        '第一段\n\n第二段\n\n\n第三段',
+        '  前后空白  ',
+        '   ',
+        '。。。。',
+        'English only, no separators.',
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        generator = _make_generator(tmp_dir)
+        for text in texts:
+            assert generator._format_paragraphs(text) == _reference_paragraphs(text), repr(text)
+
+
+if __name__ == '__main__':
+    test_generate_slug()
+    test_format_paragraphs()
+    print("Step 6 测试通过")
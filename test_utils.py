@@ -0,0 +1,262 @@
+"""测试工具模块: Entrez请求与缓存、XML路径、Prompt模板、文件读写"""
+import sys
+sys.path.insert(0, '.')
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+from src.utils import entrez_cache, xml_utils
+from src.utils.config import Config
+from src.utils.entrez_cache import EntrezCache
+from src.utils.file_manager import FileManager
+from src.utils.logger import Logger
+from src.utils.prompt_template import PromptTemplate
+
+
+def _make_config(tmp_dir, entrez_cache_days=7):
+    """在临时目录中生成测试用配置文件"""
+    config_path = os.path.join(tmp_dir, 'config.ini')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        f.write(f"[basic]\noutput_dir = {tmp_dir}\ncache_dir = {tmp_dir}\n\n"
+                f"[pubmed]\nentrez_cache_days = {entrez_cache_days}\nretry_delay = 0\n")
+    return Config(config_path)
+
+
+class _FakeEntrezCall:
+    """代替 Entrez.efetch / Entrez.elink，记录调用次数和参数并返回固定的XML"""
+    
+    def __init__(self, data=b'<eFetchResult><Id>1</Id></eFetchResult>', error=None):
+        self.data = data
+        self.error = error
+        self.calls = 0
+        self.params = None
+    
+    def __call__(self, **params):
+        self.calls += 1
+        self.params = params
+        if self.error is not None:
+            raise self.error
+        return io.BytesIO(self.data)
+
+
+def _with_fake_entrez(func_name, fake, func):
+    """临时替换 Entrez 的 func_name 函数后执行 func"""
+    original = getattr(entrez_cache.Entrez, func_name, None)
+    setattr(entrez_cache.Entrez, func_name, fake)
+    try:
+        return func()
+    finally:
+        setattr(entrez_cache.Entrez, func_name, original)
+
+
+def test_fetch_pmcids():
+    data = (b'<eLinkResult>'
+            b'<LinkSet><IdList><Id>1</Id></IdList>'
+            b'<LinkSetDb><LinkName>pubmed_pmc</LinkName><Link><Id>100</Id></Link></LinkSetDb></LinkSet>'
+            b'<LinkSet><IdList><Id>2</Id></IdList></LinkSet>'
+            b'<LinkSet><IdList><Id>3</Id></IdList>'
+            b'<LinkSetDb><LinkName>pubmed_pmc_refs</LinkName><Link><Id>300</Id></Link></LinkSetDb></LinkSet>'
+            b'</eLinkResult>')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = EntrezCache(_make_config(tmp_dir, entrez_cache_days=0))
+        logger = Logger('test')
+        
+        # 一次elink请求取得所有PMID的PMCID，没有PMC全文的为None
+        fake = _FakeEntrezCall(data)
+        pmcid_map = _with_fake_entrez('elink', fake, lambda: cache.fetch_pmcids(['1', '2', '3'], logger))
+        assert pmcid_map == {'1': 'PMC100', '2': None, '3': None}
+        assert fake.calls == 1
+        # ID以列表传入，每个PMID各返回一个LinkSet
+        assert fake.params['id'] == ['1', '2', '3']
+        
+        # 请求失败时所有PMID均为None
+        fake = _FakeEntrezCall(error=RuntimeError('busy'))
+        pmcid_map = _with_fake_entrez('elink', fake, lambda: cache.fetch_pmcids(['1', '2'], logger))
+        assert pmcid_map == {'1': None, '2': None}
+        assert fake.calls == cache.retry_attempts
+
+
+def test_entrez_cache_key():
+    # 参数顺序不影响缓存键，键为参数串的sha1
+    key = EntrezCache._cache_key('efetch', {'id': ['2', '1'], 'db': 'pubmed'})
+    assert key == EntrezCache._cache_key('efetch', {'db': 'pubmed', 'id': ['2', '1']})
+    assert key == hashlib.sha1('efetch|db=pubmed|id=2,1'.encode('utf-8')).hexdigest()
+    # ID顺序决定返回记录的顺序，顺序不同的请求不共用缓存
+    assert key != EntrezCache._cache_key('efetch', {'id': ['1', '2'], 'db': 'pubmed'})
+    # 函数名、参数值不同时缓存键不同
+    assert key != EntrezCache._cache_key('elink', {'id': ['2', '1'], 'db': 'pubmed'})
+    assert key != EntrezCache._cache_key('efetch', {'id': ['2', '3'], 'db': 'pubmed'})
+
+
+def test_entrez_cache_ttl():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = EntrezCache(_make_config(tmp_dir, entrez_cache_days=1))
+        fake = _FakeEntrezCall()
+        
+        def fetch():
+            with cache.efetch(db='pubmed', id=['1']) as handle:
+                return handle.read()
+        
+        # 第二次请求命中缓存，不再访问NCBI
+        assert _with_fake_entrez('efetch', fake, fetch) == fake.data
+        assert _with_fake_entrez('efetch', fake, fetch) == fake.data
+        assert fake.calls == 1
+        
+        # 缓存文件超过有效期后重新请求
+        path = os.path.join(cache.cache_dir, EntrezCache._cache_key('efetch', {'db': 'pubmed', 'id': ['1']}) + '.xml')
+        expired = time.time() - cache.ttl - 60
+        os.utime(path, (expired, expired))
+        assert _with_fake_entrez('efetch', fake, fetch) == fake.data
+        assert fake.calls == 2
+
+
+def test_entrez_cache_disabled_and_incomplete():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # entrez_cache_days = 0 时每次都请求NCBI
+        cache = EntrezCache(_make_config(tmp_dir, entrez_cache_days=0))
+        fake = _FakeEntrezCall()
+        for _ in range(2):
+            _with_fake_entrez('efetch', fake, lambda: cache.efetch(db='pubmed', id=['1']).read())
+        assert fake.calls == 2
+        
+        # 截断或含错误信息的响应不写入缓存
+        cache = EntrezCache(_make_config(tmp_dir, entrez_cache_days=1))
+        for data in (b'<eFetchResult><Id>1</I', b'<eFetchResult><ERROR>busy</ERROR></eFetchResult>'):
+            fake = _FakeEntrezCall(data)
+            for _ in range(2):
+                assert _with_fake_entrez('efetch', fake, lambda: cache.efetch(db='pubmed', id=['1']).read()) == data
+            assert fake.calls == 2
+
+
+def test_compile_path_findall_fallback():
+    xml = ("<Article><AuthorList>"
+           "<Author ValidYN='Y'><LastName>Li</LastName></Author>"
+           "<Author ValidYN='N'><LastName>Wang</LastName></Author>"
+           "<Author ValidYN='Y'><LastName>Zhang</LastName></Author>"
+           "</AuthorList></Article>")
+    root = ET.fromstring(xml)
+    
+    # 未安装lxml时 compile_path 退化为 findall
+    lxml_available = xml_utils.LXML_AVAILABLE
+    xml_utils.LXML_AVAILABLE = False
+    try:
+        find_authors = xml_utils.compile_path("AuthorList/Author[@ValidYN='Y']")
+        find_missing = xml_utils.compile_path("AuthorList/Editor")
+    finally:
+        xml_utils.LXML_AVAILABLE = lxml_available
+    
+    authors = find_authors(root)
+    assert [author.findtext('LastName') for author in authors] == ['Li', 'Zhang']
+    assert xml_utils.first_text(find_missing(root), None) is None
+    assert xml_utils.first_text(authors[0].findall('LastName')) == 'Li'
+
+
+def test_prompt_template_matches_format():
+    templates = [
+        "标题: {title}\n摘要: {abstract}\n",
+        "{title}{abstract}",
+        "花括号 {{保留}} {title}",
+        "无字段的模板",
+        "{title:>10}|{abstract!r}",  # 带格式说明、转换时交给 str.format
+    ]
+    values = {'title': 'CRISPR', 'abstract': 'a {b} c'}
+    for template in templates:
+        prompt = PromptTemplate(template)
+        expected = template.format(**values)
+        assert prompt.format(**values) == expected
+        assert ''.join(prompt.iter_parts(**values)) == expected
+        assert ''.join(prompt.format_parts(**values)) == expected
+
+
+def test_prompt_template_list_values():
+    template = "开始\n{content}\n结束 {title}"
+    parts = ['第一段\n', '第二段\n', '第三段']
+    expected = template.format(content=''.join(parts), title='T')
+    
+    prompt = PromptTemplate(template)
+    # 列表和迭代器的值按片段展开，拼接结果与 str.format 一致
+    assert ''.join(prompt.iter_parts(content=parts, title='T')) == expected
+    assert ''.join(prompt.iter_parts(content=iter(parts), title='T')) == expected
+    assert prompt.format_parts(content=parts, title='T')[1:4] == parts
+    
+    # 带格式说明的模板也接受列表值
+    prompt = PromptTemplate("{title:>3}{content}")
+    assert ''.join(prompt.iter_parts(content=parts, title='T')) == '  T' + ''.join(parts)
+
+
+def test_write_atomic():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_manager = FileManager(_make_config(tmp_dir), Logger('test'))
+        file_path = os.path.join(tmp_dir, 'sub', 'data.json')
+        
+        file_manager._write_atomic(file_path, b'{"a":1}')
+        file_manager._write_atomic(file_path, b'{"a":2}')
+        
+        with open(file_path, 'rb') as f:
+            assert f.read() == b'{"a":2}'
+        assert os.listdir(os.path.dirname(file_path)) == ['data.json']
+
+
+def test_save_json_stream():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_manager = FileManager(_make_config(tmp_dir), Logger('test'))
+        file_path = os.path.join(tmp_dir, 'papers.json')
+        records = [{'pmid': '1', 'title': '中文标题'}, {'pmid': '2', 'title': 'B'}]
+        
+        count = file_manager.save_json_stream(
+            file_path, {'success': True}, 'papers', iter(records),
+            trailer=lambda: {'stats': {'total': len(records)}}
+        )
+        assert count == 2
+        with open(file_path, encoding='utf-8') as f:
+            assert json.load(f) == {'success': True, 'papers': records, 'stats': {'total': 2}}
+        
+        # 没有记录时输出空数组
+        file_manager.save_json_stream(file_path, {}, 'papers', iter([]))
+        with open(file_path, encoding='utf-8') as f:
+            assert json.load(f) == {'papers': []}
+        
+        # 迭代中途出错时保留原有文件，不留下临时文件
+        def failing():
+            yield {'pmid': '3'}
+            raise RuntimeError('中断')
+        try:
+            file_manager.save_json_stream(file_path, {}, 'papers', failing())
+        except RuntimeError:
+            pass
+        else:
+            assert False, '应抛出迭代中的异常'
+        with open(file_path, encoding='utf-8') as f:
+            assert json.load(f) == {'papers': []}
+        assert not os.path.exists(file_path + '.tmp')
+
+
+def test_load_jsonl():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_manager = FileManager(_make_config(tmp_dir), Logger('test'))
+        file_path = os.path.join(tmp_dir, 'cache.jsonl')
+        
+        # 文件不存在时返回空列表
+        assert file_manager.load_jsonl(file_path) == []
+        
+        file_manager.append_jsonl(file_path, {'pmcid': 'PMC1', 'figures': []})
+        file_manager.append_jsonl(file_path, {'pmcid': 'PMC2', 'figures': [{'figure_id': 'F1'}]})
+        # 模拟写入中断留下的不完整行和空行
+        with open(file_path, 'ab') as f:
+            f.write(b'\n{"pmcid": "PMC3", "fig')
+        
+        records = file_manager.load_jsonl(file_path)
+        assert [record['pmcid'] for record in records] == ['PMC1', 'PMC2']
+        assert records[1]['figures'] == [{'figure_id': 'F1'}]
+
+
+if __name__ == '__main__':
+    for name, func in list(globals().items()):
+        if name.startswith('test_') and callable(func):
+            func()
+            print(f"{name}: 通过")
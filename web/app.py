@@ -57,7 +57,10 @@ def new_project():
         
         # 创建项目并执行步骤1-4（包含自动生成Prompt）
         processor = PubMedProcessor()
-        result = processor.execute_steps_1_to_4(query)
+        try:
+            result = processor.execute_steps_1_to_4(query)
+        finally:
+            processor.close()
         
         if result['success']:
             project_path = result['project_path']
@@ -96,7 +99,10 @@ def execute_step(project_name, step_num):
         return jsonify({'success': False, 'error': '项目不存在'})
     
     processor = PubMedProcessor()
-    result = processor.execute_step(project_path, step_num)
+    try:
+        result = processor.execute_step(project_path, step_num)
+    finally:
+        processor.close()
     
     return jsonify(result)
 
@@ -110,7 +116,10 @@ def execute_steps_56(project_name):
         return jsonify({'success': False, 'error': '项目不存在'})
     
     processor = PubMedProcessor()
-    result = processor.execute_steps_5_to_6(project_path)
+    try:
+        result = processor.execute_steps_5_to_6(project_path)
+    finally:
+        processor.close()
     
     return jsonify(result)
 
@@ -124,7 +133,10 @@ def execute_steps_456(project_name):
         return jsonify({'success': False, 'error': '项目不存在'})
     
     processor = PubMedProcessor()
-    result = processor.execute_steps_4_to_6(project_path)
+    try:
+        result = processor.execute_steps_4_to_6(project_path)
+    finally:
+        processor.close()
     
     return jsonify(result)
 
@@ -177,7 +189,19 @@ def view_prompts(project_name):
     prompts = []
     prompts_dir = os.path.join(project_path, 'step4_prompts')
     
-    if os.path.exists(prompts_dir):
+    bundle_file = os.path.join(prompts_dir, 'prompts.jsonl')
+    if os.path.exists(bundle_file):
+        # Prompt合并输出：每行一篇论文
+        with open(bundle_file, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    item = json.loads(line)
+                    prompts.append({
+                        'pmid': item['pmid'],
+                        'filename': 'prompts.jsonl',
+                        'content': item['prompt']
+                    })
+    elif os.path.exists(prompts_dir):
         for f in os.listdir(prompts_dir):
             if f.startswith('prompt_') and f.endswith('.txt'):
                 pmid = f.replace('prompt_', '').replace('.txt', '')
@@ -287,42 +311,39 @@ def load_project_data(project_path):
         'report_info': {}
     }
     
+    # load_json 优先使用 orjson 解析，papers_details.json 等大文件加载更快
+    file_manager = FileManager(config, logger)
+    
     # 项目摘要
     summary_file = os.path.join(project_path, 'project_summary.json')
     if os.path.exists(summary_file):
-        with open(summary_file, 'r', encoding='utf-8') as f:
-            data['summary'] = json.load(f)
+        data['summary'] = file_manager.load_json(summary_file)
     
     # 搜索结果
     search_file = os.path.join(project_path, 'step1_search', 'search_results.json')
     if os.path.exists(search_file):
-        with open(search_file, 'r', encoding='utf-8') as f:
-            data['search'] = json.load(f)
+        data['search'] = file_manager.load_json(search_file)
     
     # 论文详情
     details_file = os.path.join(project_path, 'step2_details', 'papers_details.json')
     if os.path.exists(details_file):
-        with open(details_file, 'r', encoding='utf-8') as f:
-            details = json.load(f)
-            data['papers'] = details.get('papers', [])
+        details = file_manager.load_json(details_file)
+        data['papers'] = details.get('papers', [])
     
     # 图片信息
     figures_file = os.path.join(project_path, 'step3_figures', 'figures_info.json')
     if os.path.exists(figures_file):
-        with open(figures_file, 'r', encoding='utf-8') as f:
-            data['figures'] = json.load(f)
+        data['figures'] = file_manager.load_json(figures_file)
     
     # Prompts信息
     prompts_file = os.path.join(project_path, 'step4_prompts', 'prompts_info.json')
     if os.path.exists(prompts_file):
-        with open(prompts_file, 'r', encoding='utf-8') as f:
-            data['prompts_info'] = json.load(f)
+        data['prompts_info'] = file_manager.load_json(prompts_file)
     
     # 综合概述信息
     overview_file = os.path.join(project_path, 'step5_overview', 'overview_info.json')
     if os.path.exists(overview_file):
-        with open(overview_file, 'r', encoding='utf-8') as f:
-            data['overview_info'] = json.load(f)
+        data['overview_info'] = file_manager.load_json(overview_file)
     
     # 报告信息 - 优先从FinalOutput读取，兼容旧路径step6_report
     report_file = os.path.join(project_path, 'FinalOutput', 'report_info.json')
@@ -330,8 +351,7 @@ def load_project_data(project_path):
         report_file = os.path.join(project_path, 'step6_report', 'report_info.json')
     
     if os.path.exists(report_file):
-        with open(report_file, 'r', encoding='utf-8') as f:
-            data['report_info'] = json.load(f)
+        data['report_info'] = file_manager.load_json(report_file)
     
     return data
 